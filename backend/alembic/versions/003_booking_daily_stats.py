@@ -0,0 +1,35 @@
+"""Add hourly booking stats rollup
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "003"
+down_revision = "002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_daily_stats",
+        sa.Column("court_id", sa.Integer(), sa.ForeignKey("courts.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("hour", sa.Integer(), primary_key=True),
+        sa.Column("booked_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("blocked_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("paid_revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("cancellations", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_booking_daily_stats_day", "booking_daily_stats", ["day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_booking_daily_stats_day", table_name="booking_daily_stats")
+    op.drop_table("booking_daily_stats")
@@ -0,0 +1,50 @@
+"""Add member tariffs and pricing rules
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "membership_status", sa.String(length=20), nullable=False, server_default="NON_MEMBER"
+        ),
+    )
+    op.add_column("users", sa.Column("membership_expires_at", sa.DateTime(), nullable=True))
+    op.add_column("courts", sa.Column("member_hourly_rate", sa.Float(), nullable=True))
+    op.create_table(
+        "pricing_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("court_id", sa.Integer(), sa.ForeignKey("courts.id"), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("weekday_mask", sa.Integer(), nullable=False, server_default="127"),
+        sa.Column("start_minute", sa.Integer(), nullable=False),
+        sa.Column("end_minute", sa.Integer(), nullable=False),
+        sa.Column("multiplier", sa.Float(), nullable=False, server_default="1"),
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_pricing_rules_court_id", "pricing_rules", ["court_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pricing_rules_court_id", table_name="pricing_rules")
+    op.drop_table("pricing_rules")
+    op.drop_column("courts", "member_hourly_rate")
+    op.drop_column("users", "membership_expires_at")
+    op.drop_column("users", "membership_status")
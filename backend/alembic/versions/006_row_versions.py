@@ -0,0 +1,29 @@
+"""Add version columns for optimistic concurrency
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "bookings", sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+    )
+    op.add_column("courts", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    op.drop_column("courts", "version")
+    op.drop_column("bookings", "version")
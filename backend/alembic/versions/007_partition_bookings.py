@@ -0,0 +1,87 @@
+"""Partition bookings by month of start_time (PostgreSQL only)
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+The table is rebuilt as ``PARTITION BY RANGE (start_time)`` with one partition
+per month from the oldest booking to three months ahead, plus a default
+partition for anything outside them. The primary key becomes
+``(id, start_time)`` because PostgreSQL requires the partition key in unique
+constraints; ids still come from ``bookings_id_seq`` and stay unique. Rows are
+copied before the indexes are built. ``python -m app.cli maintain-partitions``
+keeps creating future months afterwards.
+
+SQLite keeps the plain table.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_keys_and_indexes(primary_key: str) -> None:
+    op.execute(f"ALTER TABLE bookings ADD PRIMARY KEY ({primary_key})")
+    op.create_foreign_key("bookings_user_id_fkey", "bookings", "users", ["user_id"], ["id"])
+    op.create_foreign_key("bookings_court_id_fkey", "bookings", "courts", ["court_id"], ["id"])
+    for column in ("court_id", "user_id", "start_time", "end_time"):
+        op.create_index(f"ix_bookings_{column}", "bookings", [column])
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE bookings RENAME TO bookings_unpartitioned")
+    op.execute(
+        "CREATE TABLE bookings (LIKE bookings_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (start_time)"
+    )
+    # Keep the id sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            first_month date := date_trunc(
+                'month', coalesce((SELECT min(start_time) FROM bookings_unpartitioned), now())
+            );
+            last_month date := date_trunc('month', now()) + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE first_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF bookings FOR VALUES FROM (%L) TO (%L)',
+                    'bookings_p' || to_char(first_month, 'YYYY_MM'),
+                    first_month,
+                    (first_month + interval '1 month')::date
+                );
+                first_month := first_month + interval '1 month';
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute("CREATE TABLE bookings_default PARTITION OF bookings DEFAULT")
+
+    op.execute("INSERT INTO bookings SELECT * FROM bookings_unpartitioned")
+    op.execute("DROP TABLE bookings_unpartitioned")
+    _add_keys_and_indexes("id, start_time")
+
+
+def downgrade() -> None:
+    # Partitions that were detached or archived are not brought back
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE bookings RENAME TO bookings_partitioned")
+    op.execute("CREATE TABLE bookings (LIKE bookings_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+    op.execute("INSERT INTO bookings SELECT * FROM bookings_partitioned")
+    op.execute("DROP TABLE bookings_partitioned")
+    _add_keys_and_indexes("id")
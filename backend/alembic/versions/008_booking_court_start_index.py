@@ -0,0 +1,24 @@
+"""Add a (court_id, start_time) index on bookings
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # On PostgreSQL this cascades to every monthly partition
+    op.create_index("ix_bookings_court_id_start_time", "bookings", ["court_id", "start_time"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_court_id_start_time", table_name="bookings")
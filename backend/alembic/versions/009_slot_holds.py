@@ -0,0 +1,41 @@
+"""Add slot holds
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "slot_holds",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("court_id", sa.Integer(), sa.ForeignKey("courts.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_slot_holds_court_id_start_time", "slot_holds", ["court_id", "start_time"]
+    )
+    op.create_index("ix_slot_holds_user_id", "slot_holds", ["user_id"])
+    op.create_index("ix_slot_holds_expires_at", "slot_holds", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_slot_holds_expires_at", table_name="slot_holds")
+    op.drop_index("ix_slot_holds_user_id", table_name="slot_holds")
+    op.drop_index("ix_slot_holds_court_id_start_time", table_name="slot_holds")
+    op.drop_table("slot_holds")
@@ -0,0 +1,47 @@
+"""Add court opening hours and slot templates
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "court_opening_hours",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("court_id", sa.Integer(), sa.ForeignKey("courts.id"), nullable=False),
+        sa.Column("weekday_mask", sa.Integer(), nullable=False, server_default="127"),
+        sa.Column("start_minute", sa.Integer(), nullable=False),
+        sa.Column("end_minute", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_court_opening_hours_court_id", "court_opening_hours", ["court_id"])
+    op.create_table(
+        "court_slot_templates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("court_id", sa.Integer(), sa.ForeignKey("courts.id"), nullable=False),
+        sa.Column("weekday_mask", sa.Integer(), nullable=False, server_default="127"),
+        sa.Column("start_minute", sa.Integer(), nullable=False),
+        sa.Column("end_minute", sa.Integer(), nullable=False),
+        sa.Column("slot_minutes", sa.Integer(), nullable=False, server_default="60"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_court_slot_templates_court_id", "court_slot_templates", ["court_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_court_slot_templates_court_id", table_name="court_slot_templates")
+    op.drop_table("court_slot_templates")
+    op.drop_index("ix_court_opening_hours_court_id", table_name="court_opening_hours")
+    op.drop_table("court_opening_hours")
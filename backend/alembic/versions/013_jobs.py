@@ -0,0 +1,56 @@
+"""Add background jobs and their schedules
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("queue", sa.String(length=50), nullable=False),
+        sa.Column("task", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(length=100), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    # Finished jobs drop out of the index the workers claim from
+    op.create_index(
+        "ix_jobs_claimable",
+        "jobs",
+        ["queue", "run_at"],
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+        sqlite_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+    op.create_index("ix_jobs_finished_at", "jobs", ["finished_at"])
+    op.create_table(
+        "job_schedules",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("next_run_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_schedules")
+    op.drop_index("ix_jobs_finished_at", table_name="jobs")
+    op.drop_index("ix_jobs_claimable", table_name="jobs")
+    op.drop_table("jobs")
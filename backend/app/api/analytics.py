@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session, select
+
+from app.api.bookings import require_admin_or_manager
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import get_session
+from app.models import Court, User
+from app.schemas import (
+    CourtForecast,
+    CourtHeatmap,
+    ForecastDay,
+    ForecastResponse,
+    HeatmapResponse,
+)
+from app.services import analytics
+
+router = APIRouter()
+
+MAX_HEATMAP_DAYS = 2 * 366
+FORECAST_HISTORY_DAYS = 2 * 364
+
+analytics_cache = TTLCache("analytics", ttl=settings.analytics_cache_ttl_seconds, maxsize=128)
+
+
+def _court_ids(session: Session, court_id: int | None) -> list[int]:
+    if court_id is not None:
+        if session.get(Court, court_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Court not found")
+        return [court_id]
+    return list(session.exec(select(Court.id).order_by(Court.id)).all())
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_heatmap(
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    court_id: int | None = Query(None, gt=0),
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> HeatmapResponse:
+    """Weekday x half-hour occupancy per court for ``[from, to)`` (admin/manager only)."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(weeks=12)
+    if date_to <= date_from or (date_to - date_from).days > MAX_HEATMAP_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'to' must be after 'from' and at most {MAX_HEATMAP_DAYS} days later",
+        )
+
+    def compute() -> HeatmapResponse:
+        courts = _court_ids(session, court_id)
+        intervals = analytics.load_intervals(session, date_from, date_to, courts)
+        heatmap = analytics.occupancy_heatmap(intervals, courts, date_from, date_to)
+        return HeatmapResponse(
+            date_from=date_from,
+            date_to=date_to,
+            slot_minutes=analytics.SLOT_MINUTES,
+            courts=[
+                CourtHeatmap(court_id=court, occupancy=heatmap[index].round(4).tolist())
+                for index, court in enumerate(courts)
+            ],
+        )
+
+    return analytics_cache.get_or_compute(("heatmap", date_from, date_to, court_id), compute)
+
+
+@router.get("/forecast", response_model=ForecastResponse)
+async def get_forecast(
+    weeks: int = Query(4, ge=1, le=12),
+    court_id: int | None = Query(None, gt=0),
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> ForecastResponse:
+    """Expected daily demand per court for the coming weeks (admin/manager only)."""
+    today = date.today()
+    history_from = today - timedelta(days=FORECAST_HISTORY_DAYS)
+
+    def compute() -> ForecastResponse:
+        courts = _court_ids(session, court_id)
+        intervals = analytics.load_intervals(session, history_from, today, courts)
+        daily = analytics.daily_minutes(intervals, courts, history_from, today)
+        expected = analytics.forecast_demand(daily, weeks * 7)
+        days = [today + timedelta(days=offset) for offset in range(weeks * 7)]
+        return ForecastResponse(
+            history_from=history_from,
+            forecast_from=today,
+            courts=[
+                CourtForecast(
+                    court_id=court,
+                    days=[
+                        ForecastDay(
+                            day=day,
+                            expected_minutes=round(minutes, 1),
+                            utilization=round(minutes / analytics.MINUTES_PER_DAY, 4),
+                        )
+                        for day, minutes in zip(days, expected[index].tolist(), strict=True)
+                    ],
+                )
+                for index, court in enumerate(courts)
+            ],
+        )
+
+    return analytics_cache.get_or_compute(("forecast", today, weeks, court_id), compute)
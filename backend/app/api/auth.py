@@ -13,6 +13,7 @@ from app.schemas import Token, UserCreate, UserResponse
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -99,3 +100,16 @@ async def get_current_user(
         raise credentials_exception
 
     return user
+
+
+async def get_optional_user(
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+    session: Session = Depends(get_session),
+) -> User | None:
+    """Get the authenticated user if a valid token was sent, None otherwise."""
+    if token is None:
+        return None
+    try:
+        return await get_current_user(token, session)
+    except HTTPException:
+        return None
@@ -1,15 +1,63 @@
+import csv
+import io
+import zlib
+from collections.abc import Iterator
 from datetime import datetime
+from enum import Enum
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
 from sqlmodel import Session, and_, or_, select
 
 from app.api.auth import get_current_user
+from app.core.concurrency import check_if_match, compare_and_swap, set_etag
+from app.core.config import settings
+from app.core.metrics import BOOKING_CONFLICTS, BOOKINGS_CREATED
+from app.core.serialization import projected_rows, rows_response
+from app.db.partitions import start_time_window
 from app.db.session import get_session
 from app.models import Booking, BookingStatus, Court, PaymentStatus, User, UserRole
-from app.schemas import AdminBlockRequest, BookingCreate, BookingResponse, BookingUpdate
+from app.schemas import (
+    AdminBlockRequest,
+    BookingConflictResponse,
+    BookingCreate,
+    BookingResponse,
+    BookingUpdate,
+    FreeSlot,
+    TimeInterval,
+)
+from app.services import (
+    availability,
+    holds,
+    idempotency,
+    outbox,
+    pricing,
+    schedules,
+    stats,
+    write_queue,
+)
 
 router = APIRouter()
 
+CONFLICT_RESPONSES: dict[int | str, dict] = {
+    status.HTTP_409_CONFLICT: {"model": BookingConflictResponse}
+}
+
+
+class SlotConflict(HTTPException):
+    """409 whose body also lists the conflicting intervals and nearby alternatives."""
+
+    def __init__(self, body: BookingConflictResponse) -> None:
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=body.detail)
+        self.body = body
+
+
+async def slot_conflict_handler(request: Request, exc: SlotConflict) -> JSONResponse:
+    return JSONResponse(status_code=exc.status_code, content=exc.body.model_dump(mode="json"))
+
 
 async def require_admin_or_manager(current_user: User = Depends(get_current_user)) -> User:
     """Dependency to require admin or manager role."""
@@ -22,13 +70,28 @@ async def require_admin_or_manager(current_user: User = Depends(get_current_user
 
 
 def check_court_availability(
-    session: Session, court_id: int, start_time: datetime, end_time: datetime, exclude_booking_id: int | None = None
+    session: Session,
+    court_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_booking_id: int | None = None,
+    holder_id: int | None = None,
 ) -> bool:
-    """Check if a court is available for the given time slot."""
-    statement = select(Booking).where(
+    """Check if a court is available for the given time slot.
+
+    Unexpired slot holds block it too, except those of ``holder_id``. Holds
+    granted by this process are checked in memory first; bookings and the holds
+    of every replica are then checked in one query.
+    """
+    now = datetime.utcnow()
+    if holds.index.blocks(court_id, start_time, end_time, holder_id, now):
+        return False
+
+    statement = select(Booking.id).where(
         and_(
             Booking.court_id == court_id,
             Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED]),
+            start_time_window(start_time, end_time),
             or_(
                 # New booking starts during existing booking
                 and_(Booking.start_time <= start_time, Booking.end_time > start_time),
@@ -43,8 +106,51 @@ def check_court_availability(
     if exclude_booking_id is not None:
         statement = statement.where(Booking.id != exclude_booking_id)
 
-    conflicts = session.exec(statement).first()
-    return conflicts is None
+    held = holds.overlapping(court_id, start_time, end_time, holder_id, now)
+    conflict = session.connection().execute(statement.union_all(held).limit(1)).first()
+    return conflict is None
+
+
+def slot_conflict(
+    session: Session,
+    operation: str,
+    court_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_booking_id: int | None = None,
+    holder_id: int | None = None,
+    report: availability.ConflictReport | None = None,
+) -> SlotConflict:
+    """Count a rejected write and build its 409 with conflicts and alternatives.
+
+    ``report`` is computed here unless the caller already has it.
+    """
+    BOOKING_CONFLICTS.labels(operation=operation).inc()
+    if report is None:
+        report = availability.conflict_report(
+            session,
+            court_id,
+            start_time,
+            end_time,
+            exclude_booking_id=exclude_booking_id,
+            holder_id=holder_id,
+        )
+    duration = end_time - start_time
+    return SlotConflict(
+        BookingConflictResponse(
+            detail="Court is not available for the selected time slot",
+            conflicts=[TimeInterval(start_time=s, end_time=e) for s, e in report.conflicts],
+            alternatives=[
+                FreeSlot(
+                    court_id=slot.court_id,
+                    start_time=slot.start,
+                    end_time=slot.start + duration,
+                    free_until=slot.end,
+                )
+                for slot in report.alternatives
+            ],
+        )
+    )
 
 
 def validate_booking_window(start_time: datetime, end_time: datetime) -> None:
@@ -76,13 +182,49 @@ def validate_booking_window(start_time: datetime, end_time: datetime) -> None:
         )
 
 
-@router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+def require_open(session: Session, court_id: int, start_time: datetime, end_time: datetime) -> None:
+    """Reject slots outside the court's opening hours (one mask check on its schedule)."""
+    if not schedules.get_schedule(session, court_id).is_open(start_time, end_time):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Court is closed at the selected time",
+        )
+
+
+@router.post(
+    "/",
+    response_model=BookingResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses=CONFLICT_RESPONSES,
+)
 async def create_booking(
     booking_data: BookingCreate,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
-) -> Booking:
-    """Create a new booking."""
+) -> Booking | Response:
+    """Create a new booking; retries with the same Idempotency-Key replay the first response."""
+
+    async def handler() -> Booking:
+        if settings.booking_write_queue:
+            return await _enqueue_booking(booking_data, session, current_user)
+        return _create_booking(booking_data, session, current_user)
+
+    return await idempotency.run(
+        session,
+        current_user.id,
+        "bookings.create",
+        idempotency_key,
+        booking_data,
+        handler,
+        BookingResponse,
+        status.HTTP_201_CREATED,
+    )
+
+
+def _validate_new_booking(
+    booking_data: BookingCreate, session: Session, current_user: User
+) -> Court:
     if current_user.role == UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -106,33 +248,88 @@ async def create_booking(
             detail="Cannot book in the past",
         )
 
-    # Check court availability
-    if not check_court_availability(
-        session, booking_data.court_id, booking_data.start_time, booking_data.end_time
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Court is not available for the selected time slot",
-        )
+    require_open(session, court.id, booking_data.start_time, booking_data.end_time)
+    return court
 
-    # Calculate total price based on hourly rate
-    duration_hours = (booking_data.end_time - booking_data.start_time).total_seconds() / 3600
-    total_price = court.hourly_rate * duration_hours
 
-    # Create booking
-    booking = Booking(
-        **booking_data.model_dump(),
+def _new_booking(
+    booking_data: BookingCreate, session: Session, court: Court, current_user: User
+) -> Booking:
+    # Price with the court's time-of-day rules and the user's tariff
+    total_price = pricing.quote(
+        session, court, booking_data.start_time, booking_data.end_time, current_user
+    ).total_price
+    return Booking(
+        **booking_data.model_dump(exclude={"hold_id"}),
         user_id=current_user.id,
         total_price=total_price,
         status=BookingStatus.PENDING,
         payment_status=PaymentStatus.PENDING,
     )
+
+
+def _create_booking(booking_data: BookingCreate, session: Session, current_user: User) -> Booking:
+    court = _validate_new_booking(booking_data, session, current_user)
+
+    # Serialise with hold grants and other writers of the court. Under the lock a
+    # matching hold means the slot is still free: no conflict query
+    holds.lock_court(session, booking_data.court_id)
+    converted = booking_data.hold_id is not None and holds.convert(
+        session,
+        booking_data.hold_id,
+        current_user.id,
+        booking_data.court_id,
+        booking_data.start_time,
+        booking_data.end_time,
+    )
+    if not converted and not check_court_availability(
+        session,
+        booking_data.court_id,
+        booking_data.start_time,
+        booking_data.end_time,
+        holder_id=current_user.id,
+    ):
+        raise slot_conflict(
+            session,
+            "create",
+            booking_data.court_id,
+            booking_data.start_time,
+            booking_data.end_time,
+            holder_id=current_user.id,
+        )
+
+    booking = _new_booking(booking_data, session, court, current_user)
     session.add(booking)
+    stats.record_change(session, None, stats.snapshot(booking))
+    outbox.emit(session, outbox.BOOKING_CREATED, [booking])
+    idempotency.record(session, idempotency.current(), booking)
     session.commit()
     session.refresh(booking)
+    BOOKINGS_CREATED.labels(kind="booking").inc()
     return booking
 
 
+async def _enqueue_booking(
+    booking_data: BookingCreate, session: Session, current_user: User
+) -> Booking:
+    """Create through the per-(court, day) write queue, which checks conflicts for the batch."""
+    court = _validate_new_booking(booking_data, session, current_user)
+    start_time, end_time = booking_data.start_time, booking_data.end_time
+    report = None
+    if not holds.index.blocks(court.id, start_time, end_time, current_user.id, datetime.utcnow()):
+        booking = _new_booking(booking_data, session, court, current_user)
+        # Release the request's own transaction before waiting on the batch
+        session.commit()
+        report = await write_queue.queue.submit(
+            session.get_bind(), booking, booking_data.hold_id, idempotency.current()
+        )
+        if report is None:
+            return booking
+    raise slot_conflict(
+        session, "create", court.id, start_time, end_time, holder_id=current_user.id, report=report
+    )
+
+
 @router.get("/", response_model=list[BookingResponse])
 async def list_bookings(
     skip: int = Query(0, ge=0),
@@ -140,7 +337,7 @@ async def list_bookings(
     status_filter: BookingStatus | None = None,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
-) -> list[Booking]:
+) -> list[Booking] | Response:
     """List bookings. Users see their own, admins/managers see all."""
     statement = select(Booking)
 
@@ -153,17 +350,129 @@ async def list_bookings(
         statement = statement.where(Booking.status == status_filter)
 
     statement = statement.offset(skip).limit(limit).order_by(Booking.start_time.desc())
+    if settings.fast_list_responses:
+        rows = projected_rows(session, statement, Booking, BookingResponse)
+        return rows_response(rows, BookingResponse)
     bookings = session.exec(statement).all()
     return list(bookings)
 
 
+EXPORT_COLUMNS = (
+    "id",
+    "court_id",
+    "user_id",
+    "start_time",
+    "end_time",
+    "status",
+    "payment_status",
+    "is_blocked",
+    "total_price",
+    "stripe_session_id",
+    "notes",
+    "created_at",
+)
+EXPORT_BATCH_SIZE = 2000
+
+
+def _export_value(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _export_chunks(bind: Engine, statement: Select, output: str, compress: bool) -> Iterator[bytes]:
+    """Encode rows batch by batch from a server-side cursor.
+
+    A dedicated session is opened here because the request-scoped one is closed
+    once the endpoint returns, before the body has been streamed.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    if output == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield emit(buffer.getvalue().encode())
+
+    with Session(bind) as export_session:
+        result = (
+            export_session.connection()
+            .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+            .execute(statement)
+        )
+        for rows in result.partitions():
+            if output == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_export_value(v) for v in row] for row in rows)
+                chunk = buffer.getvalue().encode()
+            else:
+                chunk = b"".join(
+                    orjson.dumps(dict(zip(EXPORT_COLUMNS, row, strict=True))) + b"\n"
+                    for row in rows
+                )
+            data = emit(chunk)
+            if data:
+                yield data
+
+    if compressor:
+        yield compressor.flush()
+
+
+@router.get("/export")
+async def export_bookings(
+    request: Request,
+    output: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    court_id: int | None = Query(None, gt=0),
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> StreamingResponse:
+    """Stream bookings as CSV or NDJSON (admin/manager only).
+
+    Only the exported columns are selected and rows are fetched in batches, so
+    memory stays flat whatever the range. Clients sending ``Accept-Encoding: gzip``
+    get the stream gzip-compressed on the fly.
+    """
+    statement = select(*(getattr(Booking, column) for column in EXPORT_COLUMNS))
+    if date_from is not None:
+        statement = statement.where(Booking.start_time >= date_from)
+    if date_to is not None:
+        statement = statement.where(Booking.start_time < date_to)
+    if court_id is not None:
+        statement = statement.where(Booking.court_id == court_id)
+    statement = statement.order_by(Booking.start_time, Booking.id)
+
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    media_type = "text/csv" if output == "csv" else "application/x-ndjson"
+    headers = {
+        "Content-Disposition": f'attachment; filename="bookings.{output}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        _export_chunks(session.get_bind(), statement, output, compress),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: int,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> Booking:
-    """Get booking by ID."""
+    """Get booking by ID; the ETag header carries its version."""
     booking = session.get(Booking, booking_id)
     if not booking:
         raise HTTPException(
@@ -178,17 +487,20 @@ async def get_booking(
             detail="Not authorized to view this booking",
         )
 
+    set_etag(response, booking.version)
     return booking
 
 
-@router.patch("/{booking_id}", response_model=BookingResponse)
+@router.patch("/{booking_id}", response_model=BookingResponse, responses=CONFLICT_RESPONSES)
 async def update_booking(
     booking_id: int,
     booking_data: BookingUpdate,
+    response: Response,
+    if_match: str | None = Header(None, alias="If-Match"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> Booking:
-    """Update a booking."""
+    """Update a booking; with If-Match the update only applies to that version (else 412)."""
     booking = session.get(Booking, booking_id)
     if not booking:
         raise HTTPException(
@@ -205,6 +517,7 @@ async def update_booking(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this booking",
         )
+    check_if_match(if_match, booking.version)
 
     # Only admins/managers can change status
     if booking_data.status is not None and not is_admin_or_manager:
@@ -219,23 +532,43 @@ async def update_booking(
 
     if booking_data.start_time or booking_data.end_time:
         validate_booking_window(new_start, new_end)
+        if not booking.is_blocked:
+            require_open(session, booking.court_id, new_start, new_end)
 
-    if (booking_data.start_time or booking_data.end_time) and not check_court_availability(
-        session, booking.court_id, new_start, new_end, exclude_booking_id=booking_id
+    moved = booking_data.start_time is not None or booking_data.end_time is not None
+    if moved:
+        holds.lock_court(session, booking.court_id)
+    if moved and not check_court_availability(
+        session,
+        booking.court_id,
+        new_start,
+        new_end,
+        exclude_booking_id=booking_id,
+        holder_id=booking.user_id,
     ):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Court is not available for the selected time slot",
+        raise slot_conflict(
+            session,
+            "update",
+            booking.court_id,
+            new_start,
+            new_end,
+            exclude_booking_id=booking_id,
+            holder_id=booking.user_id,
         )
 
-    # Update booking fields
+    # Update booking fields; the UPDATE matches the version read above
+    before = stats.snapshot(booking)
     update_data = booking_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(booking, key, value)
 
-    session.add(booking)
-    session.commit()
+    with compare_and_swap(session):
+        session.add(booking)
+        stats.record_change(session, before, stats.snapshot(booking))
+        outbox.emit(session, outbox.BOOKING_UPDATED, [booking])
+        session.commit()
     session.refresh(booking)
+    set_etag(response, booking.version)
     return booking
 
 
@@ -263,12 +596,21 @@ async def cancel_booking(
             detail="Not authorized to cancel this booking",
         )
 
+    before = stats.snapshot(booking)
     booking.status = BookingStatus.CANCELLED
-    session.add(booking)
-    session.commit()
-
-
-@router.post("/block", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+    with compare_and_swap(session):
+        session.add(booking)
+        stats.record_change(session, before, stats.snapshot(booking))
+        outbox.emit(session, outbox.BOOKING_CANCELLED, [booking])
+        session.commit()
+
+
+@router.post(
+    "/block",
+    response_model=BookingResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses=CONFLICT_RESPONSES,
+)
 async def block_timeslot(
     block_data: AdminBlockRequest,
     session: Session = Depends(get_session),
@@ -284,15 +626,15 @@ async def block_timeslot(
             detail="Court not found or inactive",
         )
 
+    holds.lock_court(session, block_data.court_id)
     if not check_court_availability(
         session,
         block_data.court_id,
         block_data.start_time,
         block_data.end_time,
     ):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Court is not available for the selected time slot",
+        raise slot_conflict(
+            session, "block", block_data.court_id, block_data.start_time, block_data.end_time
         )
 
     booking = Booking(
@@ -307,6 +649,9 @@ async def block_timeslot(
         payment_status=PaymentStatus.WAIVED,
     )
     session.add(booking)
+    stats.record_change(session, None, stats.snapshot(booking))
+    outbox.emit(session, outbox.BOOKING_BLOCKED, [booking])
     session.commit()
     session.refresh(booking)
+    BOOKINGS_CREATED.labels(kind="block").inc()
     return booking
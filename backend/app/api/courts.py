@@ -1,15 +1,53 @@
 from datetime import date, datetime, time, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import delete
 from sqlmodel import Session, and_, select
 
 from app.api.auth import get_current_user
+from app.api.bookings import (
+    CONFLICT_RESPONSES,
+    check_court_availability,
+    require_open,
+    slot_conflict,
+    validate_booking_window,
+)
+from app.core.concurrency import check_if_match, compare_and_swap, set_etag
+from app.core.config import settings
+from app.core.serialization import projected_rows, rows_response
+from app.db.partitions import start_time_window
 from app.db.session import get_session
-from app.models import Booking, BookingStatus, Court, User, UserRole
-from app.schemas import CourtCreate, CourtResponse, CourtUpdate
+from app.models import (
+    Booking,
+    BookingStatus,
+    Court,
+    CourtOpeningHours,
+    CourtSlotTemplate,
+    SlotHold,
+    User,
+    UserRole,
+)
+from app.schemas import (
+    CourtCreate,
+    CourtDeactivationResponse,
+    CourtResponse,
+    CourtScheduleResponse,
+    CourtScheduleUpdate,
+    CourtUpdate,
+    FreeSlot,
+    SlotHoldCreate,
+    SlotHoldResponse,
+    SlotSearchResponse,
+    SlotTemplateWindow,
+    WeeklyWindow,
+)
+from app.services import availability, holds, pricing, relocation, reminders, schedules
 
 router = APIRouter()
 
+DEFAULT_SEARCH_DAYS = 7
+MAX_SEARCH_DAYS = 31
+
 
 async def require_admin_or_manager(current_user: User = Depends(get_current_user)) -> User:
     """Dependency to require admin or manager role."""
@@ -41,28 +79,77 @@ async def list_courts(
     limit: int = Query(100, ge=1, le=100),
     active_only: bool = Query(True),
     session: Session = Depends(get_session),
-) -> list[Court]:
+) -> list[Court] | Response:
     """List all courts."""
     statement = select(Court)
     if active_only:
         statement = statement.where(Court.is_active.is_(True))
     statement = statement.offset(skip).limit(limit)
+    if settings.fast_list_responses:
+        rows = projected_rows(session, statement, Court, CourtResponse)
+        return rows_response(rows, CourtResponse)
     courts = session.exec(statement).all()
     return list(courts)
 
 
+@router.get("/search", response_model=SlotSearchResponse)
+async def search_free_slots(
+    duration: int = Query(60, ge=30, le=24 * 60, multiple_of=30, description="Minutes"),
+    earliest: datetime | None = Query(None, description="Default: now"),
+    latest: datetime | None = Query(None, description=f"Default: {DEFAULT_SEARCH_DAYS} days later"),
+    time_window: str | None = Query(None, description="Daily window, e.g. 18:00-22:00"),
+    court_ids: list[int] | None = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    session: Session = Depends(get_session),
+) -> SlotSearchResponse:
+    """Earliest free slots of ``duration`` minutes across active courts and dates."""
+    earliest = max(earliest or datetime.utcnow(), datetime.utcnow())
+    latest = latest or earliest + timedelta(days=DEFAULT_SEARCH_DAYS)
+    if latest <= earliest or latest - earliest > timedelta(days=MAX_SEARCH_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'latest' must be after 'earliest' and at most {MAX_SEARCH_DAYS} days later",
+        )
+    window = (0, availability.MINUTES_PER_DAY)
+    if time_window is not None:
+        try:
+            window = availability.parse_time_window(time_window)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    intervals = availability.search(
+        session, duration, earliest, latest, window, court_ids=court_ids, limit=limit
+    )
+    return SlotSearchResponse(
+        duration=duration,
+        earliest=earliest,
+        latest=latest,
+        slots=[
+            FreeSlot(
+                court_id=interval.court_id,
+                start_time=interval.start,
+                end_time=interval.start + timedelta(minutes=duration),
+                free_until=interval.end,
+            )
+            for interval in intervals
+        ],
+    )
+
+
 @router.get("/{court_id}", response_model=CourtResponse)
 async def get_court(
     court_id: int,
+    response: Response,
     session: Session = Depends(get_session),
 ) -> Court:
-    """Get court by ID."""
+    """Get court by ID; the ETag header carries its version."""
     court = session.get(Court, court_id)
     if not court:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Court not found",
         )
+    set_etag(response, court.version)
     return court
 
 
@@ -72,7 +159,7 @@ async def get_court_availability(
     date_value: date = Query(..., alias="date"),
     session: Session = Depends(get_session),
 ) -> dict[str, object]:
-    """Get occupied and free one-hour slots for a specific court and date."""
+    """Get occupied and free slots of a court's slot grid (hourly by default) for a date."""
     court = session.get(Court, court_id)
     if not court or not court.is_active:
         raise HTTPException(
@@ -87,7 +174,7 @@ async def get_court_availability(
         and_(
             Booking.court_id == court_id,
             Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED]),
-            Booking.start_time < day_end,
+            start_time_window(day_start, day_end),
             Booking.end_time > day_start,
         )
     )
@@ -97,9 +184,12 @@ async def get_court_availability(
     occupied_hours: list[str] = []
     free_hours: list[str] = []
 
-    for hour in range(24):
-        slot_start = day_start + timedelta(hours=hour)
-        slot_end = slot_start + timedelta(hours=1)
+    # The court's slot grid for this weekday, already clipped to its opening hours
+    for start_minute, end_minute in schedules.get_schedule(session, court_id).slots[
+        date_value.weekday()
+    ]:
+        slot_start = day_start + timedelta(minutes=start_minute)
+        slot_end = day_start + timedelta(minutes=end_minute)
         slot_label = f"{slot_start.strftime('%H:%M')}-{slot_end.strftime('%H:%M')}"
 
         is_occupied = any(
@@ -119,39 +209,219 @@ async def get_court_availability(
     }
 
 
+def _schedule_response(session: Session, court_id: int) -> CourtScheduleResponse:
+    hours = session.exec(
+        select(CourtOpeningHours)
+        .where(CourtOpeningHours.court_id == court_id)
+        .order_by(CourtOpeningHours.id)
+    ).all()
+    templates = session.exec(
+        select(CourtSlotTemplate)
+        .where(CourtSlotTemplate.court_id == court_id)
+        .order_by(CourtSlotTemplate.id)
+    ).all()
+    return CourtScheduleResponse(
+        court_id=court_id,
+        opening_hours=[
+            WeeklyWindow(
+                weekdays=pricing.mask_to_weekdays(row.weekday_mask),
+                start_minute=row.start_minute,
+                end_minute=row.end_minute,
+            )
+            for row in hours
+        ],
+        slot_templates=[
+            SlotTemplateWindow(
+                weekdays=pricing.mask_to_weekdays(row.weekday_mask),
+                start_minute=row.start_minute,
+                end_minute=row.end_minute,
+                slot_minutes=row.slot_minutes,
+            )
+            for row in templates
+        ],
+    )
+
+
+@router.get("/{court_id}/schedule", response_model=CourtScheduleResponse)
+async def get_court_schedule(
+    court_id: int,
+    session: Session = Depends(get_session),
+) -> CourtScheduleResponse:
+    """Get a court's opening hours and slot templates."""
+    if not session.get(Court, court_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Court not found",
+        )
+    return _schedule_response(session, court_id)
+
+
+@router.put("/{court_id}/schedule", response_model=CourtScheduleResponse)
+async def replace_court_schedule(
+    court_id: int,
+    schedule_data: CourtScheduleUpdate,
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> CourtScheduleResponse:
+    """Replace a court's opening hours and slot templates (existing bookings are kept)."""
+    if not session.get(Court, court_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Court not found",
+        )
+
+    session.exec(delete(CourtOpeningHours).where(CourtOpeningHours.court_id == court_id))  # type: ignore[call-overload]
+    session.exec(delete(CourtSlotTemplate).where(CourtSlotTemplate.court_id == court_id))  # type: ignore[call-overload]
+    session.add_all(
+        CourtOpeningHours(
+            court_id=court_id,
+            weekday_mask=pricing.weekdays_to_mask(window.weekdays),
+            start_minute=window.start_minute,
+            end_minute=window.end_minute,
+        )
+        for window in schedule_data.opening_hours
+    )
+    session.add_all(
+        CourtSlotTemplate(
+            court_id=court_id,
+            weekday_mask=pricing.weekdays_to_mask(window.weekdays),
+            start_minute=window.start_minute,
+            end_minute=window.end_minute,
+            slot_minutes=window.slot_minutes,
+        )
+        for window in schedule_data.slot_templates
+    )
+    session.commit()
+    schedules.invalidate(court_id)
+    return _schedule_response(session, court_id)
+
+
+@router.post(
+    "/{court_id}/holds",
+    response_model=SlotHoldResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses=CONFLICT_RESPONSES,
+)
+async def create_slot_hold(
+    court_id: int,
+    hold_data: SlotHoldCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> SlotHold:
+    """Keep a slot free for the current user during checkout; replaces their previous hold."""
+    if current_user.role == UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admins must use block endpoint to reserve slots",
+        )
+
+    validate_booking_window(hold_data.start_time, hold_data.end_time)
+
+    court = session.get(Court, court_id)
+    if not court or not court.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Court not found or inactive",
+        )
+
+    if hold_data.start_time < datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot hold a slot in the past",
+        )
+    require_open(session, court_id, hold_data.start_time, hold_data.end_time)
+
+    ttl_seconds = hold_data.ttl_seconds or settings.slot_hold_ttl_seconds
+    if ttl_seconds > settings.slot_hold_max_ttl_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Holds last at most {settings.slot_hold_max_ttl_seconds} seconds",
+        )
+
+    holds.lock_court(session, court_id)
+    released = holds.release_user_holds(session, current_user.id)
+    if not check_court_availability(
+        session, court_id, hold_data.start_time, hold_data.end_time, holder_id=current_user.id
+    ):
+        session.rollback()
+        raise slot_conflict(
+            session,
+            "hold",
+            court_id,
+            hold_data.start_time,
+            hold_data.end_time,
+            holder_id=current_user.id,
+        )
+
+    hold = holds.grant(
+        session,
+        court_id,
+        current_user.id,
+        hold_data.start_time,
+        hold_data.end_time,
+        ttl_seconds,
+        released,
+    )
+    if settings.reminders_enabled:
+        reminders.scheduler.schedule(reminders.hold_notice(hold.id, hold.expires_at))
+    return hold
+
+
+@router.delete("/{court_id}/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_slot_hold(
+    court_id: int,
+    hold_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> None:
+    """Release one of the current user's holds before it expires."""
+    if not holds.release(session, hold_id, current_user.id, court_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hold not found",
+        )
+
+
 @router.patch("/{court_id}", response_model=CourtResponse)
 async def update_court(
     court_id: int,
     court_data: CourtUpdate,
+    response: Response,
+    if_match: str | None = Header(None, alias="If-Match"),
     session: Session = Depends(get_session),
     _: User = Depends(require_admin_or_manager),
 ) -> Court:
-    """Update court information."""
+    """Update court information; with If-Match only that version is updated (else 412)."""
     court = session.get(Court, court_id)
     if not court:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Court not found",
         )
+    check_if_match(if_match, court.version)
 
-    # Update court fields
+    # Update court fields; the UPDATE matches the version read above
     update_data = court_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(court, key, value)
 
-    session.add(court)
-    session.commit()
+    with compare_and_swap(session):
+        session.add(court)
+        session.commit()
     session.refresh(court)
+    pricing.invalidate(court.id)
+    set_etag(response, court.version)
     return court
 
 
-@router.delete("/{court_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{court_id}", response_model=CourtDeactivationResponse)
 async def delete_court(
     court_id: int,
+    relocate: bool = Query(True, description="Move future bookings to an equivalent free court"),
     session: Session = Depends(get_session),
     _: User = Depends(require_admin_or_manager),
-) -> None:
-    """Soft delete a court (set is_active to False)."""
+) -> relocation.DeactivationReport:
+    """Soft delete a court; its future bookings are relocated or cancelled in the same transaction."""
     court = session.get(Court, court_id)
     if not court:
         raise HTTPException(
@@ -160,5 +430,11 @@ async def delete_court(
         )
 
     court.is_active = False
-    session.add(court)
-    session.commit()
+    with compare_and_swap(session):
+        session.add(court)
+        # The version-checked UPDATE locks the court before its bookings are read
+        session.flush()
+        report = relocation.deactivate(session, court, relocate=relocate)
+        session.commit()
+    pricing.invalidate(court.id)
+    return report
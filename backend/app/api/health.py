@@ -11,7 +11,7 @@ router = APIRouter()
 
 
 @router.get("/health")
-async def health() -> dict[str, str]:
+async def health() -> dict[str, Any]:
     """Health check endpoint.
 
     For debugging deployments we also return the configured CORS origins so
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -7,9 +7,11 @@ from sqlmodel import Session
 
 from app.api.auth import get_current_user
 from app.core.config import settings
+from app.core.metrics import WEBHOOK_EVENTS
 from app.db.session import get_session
-from app.models import Booking, BookingStatus, PaymentStatus, User, UserRole
+from app.models import Booking, PaymentStatus, User, UserRole
 from app.schemas import CheckoutRequest, CheckoutResponse
+from app.services import idempotency, payments
 
 router = APIRouter()
 
@@ -31,10 +33,32 @@ def _configure_stripe() -> None:
 @router.post("/create-checkout-session", response_model=CheckoutResponse)
 async def create_checkout_session(
     payload: CheckoutRequest,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
+) -> CheckoutResponse | Response:
+    """Crea una sessione Stripe per una prenotazione, se abilitato.
+
+    Con lo stesso Idempotency-Key i retry ricevono la stessa sessione senza richiamare Stripe.
+    """
+
+    async def handler() -> CheckoutResponse:
+        return _create_checkout_session(payload, session, current_user)
+
+    return await idempotency.run(
+        session,
+        current_user.id,
+        "payments.checkout",
+        idempotency_key,
+        payload,
+        handler,
+        CheckoutResponse,
+    )
+
+
+def _create_checkout_session(
+    payload: CheckoutRequest, session: Session, current_user: User
 ) -> CheckoutResponse:
-    """Crea una sessione Stripe per una prenotazione, se abilitato."""
     if not settings.payments_enabled:
         raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Pagamenti disabilitati")
 
@@ -91,11 +115,13 @@ async def create_checkout_session(
         cancel_url=settings.stripe_cancel_url,
     )
 
+    response = CheckoutResponse(checkout_url=checkout_session.url)
     booking.stripe_session_id = checkout_session.id
     session.add(booking)
+    idempotency.record(session, idempotency.current(), response)
     session.commit()
 
-    return CheckoutResponse(checkout_url=checkout_session.url)
+    return response
 
 
 @router.post("/webhook", status_code=status.HTTP_204_NO_CONTENT)
@@ -127,19 +153,25 @@ async def stripe_webhook(
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
-    if event["type"] != "checkout.session.completed":
+    event_type = event["type"]
+    if event_type != "checkout.session.completed":
+        WEBHOOK_EVENTS.labels(event_type=event_type, outcome="ignored").inc()
         return
 
     event_object = event["data"]["object"]
     booking_id = event_object.get("metadata", {}).get("booking_id")
     if not booking_id:
+        WEBHOOK_EVENTS.labels(event_type=event_type, outcome="ignored").inc()
         return
 
     booking = session.get(Booking, int(booking_id))
     if not booking:
+        WEBHOOK_EVENTS.labels(event_type=event_type, outcome="unknown_booking").inc()
         return
 
-    booking.payment_status = PaymentStatus.PAID
-    booking.status = BookingStatus.CONFIRMED
-    session.add(booking)
-    session.commit()
+    # Stripe redelivers events, and reconciliation may have confirmed it already
+    if booking.payment_status == PaymentStatus.PAID:
+        outcome = "duplicate"
+    else:
+        outcome = "processed" if payments.confirm(session, booking) else "stale"
+    WEBHOOK_EVENTS.labels(event_type=event_type, outcome=outcome).inc()
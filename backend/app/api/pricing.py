@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session, select
+
+from app.api.auth import get_optional_user
+from app.api.bookings import require_admin_or_manager
+from app.db.session import get_session
+from app.models import Court, PricingRule, User
+from app.schemas import PricingQuoteResponse, PricingRuleCreate, PricingRuleResponse
+from app.services import pricing
+
+router = APIRouter()
+
+
+def _rule_response(rule: PricingRule) -> PricingRuleResponse:
+    return PricingRuleResponse(
+        id=rule.id,
+        court_id=rule.court_id,
+        name=rule.name,
+        weekdays=pricing.mask_to_weekdays(rule.weekday_mask),
+        start_minute=rule.start_minute,
+        end_minute=rule.end_minute,
+        multiplier=rule.multiplier,
+        priority=rule.priority,
+        is_active=rule.is_active,
+        created_at=rule.created_at,
+    )
+
+
+@router.get("/quote", response_model=PricingQuoteResponse)
+async def get_quote(
+    court_id: int = Query(..., gt=0),
+    start_time: datetime = Query(..., alias="start"),
+    end_time: datetime = Query(..., alias="end"),
+    session: Session = Depends(get_session),
+    current_user: User | None = Depends(get_optional_user),
+) -> PricingQuoteResponse:
+    """Quote a booking; signed-in members get their tariff."""
+    court = session.get(Court, court_id)
+    if not court or not court.is_active:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Court not found")
+
+    quote = pricing.quote(session, court, start_time, end_time, current_user)
+    return PricingQuoteResponse(
+        court_id=quote.court_id,
+        start_time=quote.start_time,
+        end_time=quote.end_time,
+        duration_hours=quote.duration_hours,
+        hourly_rate=quote.hourly_rate,
+        total_price=quote.total_price,
+        tariff_type=quote.tariff.value,
+        tariff_label=quote.tariff_label,
+    )
+
+
+@router.get("/rules", response_model=list[PricingRuleResponse])
+async def list_rules(
+    court_id: int | None = Query(None, gt=0),
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> list[PricingRuleResponse]:
+    """List pricing rules (admin/manager only)."""
+    statement = select(PricingRule).order_by(PricingRule.priority, PricingRule.id)
+    if court_id is not None:
+        statement = statement.where(PricingRule.court_id == court_id)
+    return [_rule_response(rule) for rule in session.exec(statement).all()]
+
+
+@router.post("/rules", response_model=PricingRuleResponse, status_code=status.HTTP_201_CREATED)
+async def create_rule(
+    rule_data: PricingRuleCreate,
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> PricingRuleResponse:
+    """Create a pricing rule (admin/manager only)."""
+    if rule_data.court_id is not None and session.get(Court, rule_data.court_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Court not found")
+
+    rule = PricingRule(
+        **rule_data.model_dump(exclude={"weekdays"}),
+        weekday_mask=pricing.weekdays_to_mask(rule_data.weekdays),
+    )
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    pricing.invalidate(rule.court_id)
+    return _rule_response(rule)
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: int,
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> None:
+    """Delete a pricing rule (admin/manager only)."""
+    rule = session.get(PricingRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pricing rule not found")
+
+    session.delete(rule)
+    session.commit()
+    pricing.invalidate(rule.court_id)
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.users import require_admin
+from app.core import profiler
+from app.core.config import settings
+from app.models import User
+
+router = APIRouter()
+
+
+def _render(sampler: profiler.SamplingProfiler, output: str, name: str) -> Any:
+    if output == "collapsed":
+        return PlainTextResponse(sampler.collapsed())
+    return sampler.speedscope(name=name)
+
+
+@router.post("/")
+async def profile_worker(
+    seconds: float = Query(5.0, gt=0),
+    output: str = Query("speedscope", alias="format", pattern="^(speedscope|collapsed)$"),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+    _: User = Depends(require_admin),
+) -> Any:
+    """Sample every thread of this worker for N seconds and return the profile."""
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profiling is limited to {settings.profiler_max_seconds} seconds",
+        )
+    if not profiler.try_acquire():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker",
+        )
+
+    sampler = profiler.SamplingProfiler(interval=interval_ms / 1000)
+    sampler.start()
+    try:
+        # Sleep asynchronously so the event loop keeps serving the traffic being profiled
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+        profiler.release()
+
+    return _render(sampler, output, name=f"worker profile ({seconds:g}s)")
+
+
+@router.get("/requests/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    output: str = Query("speedscope", alias="format", pattern="^(speedscope|collapsed)$"),
+    _: User = Depends(require_admin),
+) -> Any:
+    """Download a profile captured with the ``X-Profile`` request header."""
+    sampler = profiler.get_request_profile(profile_id)
+    if sampler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found on this worker",
+        )
+    return _render(sampler, output, name=f"request {profile_id}")
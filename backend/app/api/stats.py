@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.api.bookings import require_admin_or_manager
+from app.db.session import get_session
+from app.models import BookingDailyStats, User
+from app.schemas import CourtDayUtilization, CourtUtilization, UtilizationResponse
+
+router = APIRouter()
+
+MINUTES_PER_DAY = 24 * 60
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/utilization", response_model=UtilizationResponse)
+async def get_utilization(
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    court_id: int | None = Query(None, gt=0),
+    session: Session = Depends(get_session),
+    _: User = Depends(require_admin_or_manager),
+) -> UtilizationResponse:
+    """Per-court, per-day utilization for ``[from, to)`` (admin/manager only).
+
+    Served from the ``booking_daily_stats`` rollup, so the cost depends on the
+    number of courts and days, never on the number of bookings.
+    """
+    date_to = date_to or date.today() + timedelta(days=1)
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_to <= date_from or (date_to - date_from).days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'to' must be after 'from' and at most {MAX_RANGE_DAYS} days later",
+        )
+
+    statement = (
+        select(
+            BookingDailyStats.court_id,
+            BookingDailyStats.day,
+            func.sum(BookingDailyStats.booked_minutes),
+            func.sum(BookingDailyStats.blocked_minutes),
+            func.sum(BookingDailyStats.paid_revenue),
+            func.sum(BookingDailyStats.cancellations),
+        )
+        .where(BookingDailyStats.day >= date_from, BookingDailyStats.day < date_to)
+        .group_by(BookingDailyStats.court_id, BookingDailyStats.day)
+        .order_by(BookingDailyStats.court_id, BookingDailyStats.day)
+    )
+    if court_id is not None:
+        statement = statement.where(BookingDailyStats.court_id == court_id)
+
+    days: list[CourtDayUtilization] = []
+    totals: dict[int, list[float]] = {}
+    for row_court, day, booked, blocked, revenue, cancellations in session.connection().execute(
+        statement
+    ):
+        days.append(
+            CourtDayUtilization(
+                court_id=row_court,
+                day=day,
+                booked_minutes=booked,
+                blocked_minutes=blocked,
+                paid_revenue=round(revenue, 2),
+                cancellations=cancellations,
+                utilization=round((booked + blocked) / MINUTES_PER_DAY, 4),
+            )
+        )
+        total = totals.setdefault(row_court, [0, 0, 0.0, 0])
+        total[0] += booked
+        total[1] += blocked
+        total[2] += revenue
+        total[3] += cancellations
+
+    available = (date_to - date_from).days * MINUTES_PER_DAY
+    courts = [
+        CourtUtilization(
+            court_id=row_court,
+            booked_minutes=int(booked),
+            blocked_minutes=int(blocked),
+            paid_revenue=round(revenue, 2),
+            cancellations=int(cancellations),
+            utilization=round((booked + blocked) / available, 4),
+        )
+        for row_court, (booked, blocked, revenue, cancellations) in totals.items()
+    ]
+    return UtilizationResponse(date_from=date_from, date_to=date_to, days=days, courts=courts)
@@ -1,9 +1,11 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlmodel import Session, select
 
 from app.api.auth import get_current_user
+from app.core.config import settings
+from app.core.serialization import projected_rows, rows_response
 from app.db.session import get_session
 from app.models import User, UserRole
 from app.schemas import UserResponse, UserUpdate
@@ -33,9 +35,12 @@ async def list_users(
     limit: int = Query(100, ge=1, le=100),
     session: Session = Depends(get_session),
     _: User = Depends(require_admin),
-) -> list[User]:
+) -> list[User] | Response:
     """List all users (admin only)."""
     statement = select(User).offset(skip).limit(limit)
+    if settings.fast_list_responses:
+        rows = projected_rows(session, statement, User, UserResponse)
+        return rows_response(rows, UserResponse)
     users = session.exec(statement).all()
     return list(users)
 
@@ -79,11 +84,12 @@ async def update_user(
             detail="Not authorized to update this user",
         )
 
-    # Only admins can change role and is_active
-    if not is_admin and (user_data.role is not None or user_data.is_active is not None):
+    # Only admins can change role, is_active and membership
+    admin_only = ("role", "is_active", "membership_status", "membership_expires_at")
+    if not is_admin and user_data.model_fields_set & set(admin_only):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins can change role or active status",
+            detail="Only admins can change role, active status or membership",
         )
 
     user = session.get(User, user_id)
@@ -0,0 +1,204 @@
+"""Operational commands: ``python -m app.cli <command> --help``."""
+import argparse
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlmodel import SQLModel, create_engine
+
+from app.core.config import settings
+
+
+def _engine(url: str | None):  # type: ignore[no-untyped-def]
+    return create_engine(url or settings.database_url)
+
+
+def generate_data(args: argparse.Namespace) -> None:
+    """Bulk-load synthetic courts, users and bookings for load testing."""
+    from app.db.synthetic import REFERENCE_TIME, GeneratorConfig, generate, reset_synthetic_data
+
+    engine = _engine(args.database_url)
+    if args.create_tables:
+        SQLModel.metadata.create_all(engine)
+    if args.reset:
+        reset_synthetic_data(engine)
+
+    config = GeneratorConfig(
+        courts=args.courts,
+        users=args.users,
+        bookings=args.bookings,
+        seed=args.seed,
+        cancellation_ratio=args.cancellation_ratio,
+        unpaid_ratio=args.unpaid_ratio,
+        blocked_ratio=args.blocked_ratio,
+        bcrypt_rounds=args.bcrypt_rounds,
+        reference_time=args.reference_time or REFERENCE_TIME,
+        end=args.end,
+    )
+    started = time.perf_counter()
+    result = generate(engine, config)
+    elapsed = time.perf_counter() - started
+    print(
+        f"✓ Generated {result.courts} courts, {result.users:,} users and "
+        f"{result.bookings:,} bookings ({result.first_day} → {result.last_day}) "
+        f"in {elapsed:.1f}s"
+    )
+
+
+def rebuild_stats(args: argparse.Namespace) -> None:
+    """Recompute the hourly booking stats rollup for a date range."""
+    from app.services.stats import rebuild
+
+    engine = _engine(args.database_url)
+    started = time.perf_counter()
+    buckets = rebuild(engine, args.date_from, args.date_to)
+    elapsed = time.perf_counter() - started
+    print(
+        f"✓ Rebuilt {buckets:,} hourly buckets ({args.date_from} → {args.date_to}) "
+        f"in {elapsed:.1f}s"
+    )
+
+
+def purge_idempotency_keys(args: argparse.Namespace) -> None:
+    """Delete expired Idempotency-Key records (run periodically, e.g. hourly from cron)."""
+    from sqlmodel import Session
+
+    from app.services.idempotency import purge_expired
+
+    with Session(_engine(args.database_url)) as session:
+        purged = purge_expired(session)
+    print(f"✓ Purged {purged:,} expired idempotency keys")
+
+
+def purge_outbox(args: argparse.Namespace) -> None:
+    """Delete delivered outbox events older than the retention window (run e.g. hourly)."""
+    from sqlmodel import Session
+
+    from app.services.outbox import purge_dispatched
+
+    with Session(_engine(args.database_url)) as session:
+        purged = purge_dispatched(session)
+    print(f"✓ Purged {purged:,} delivered outbox events")
+
+
+def complete_bookings(args: argparse.Namespace) -> None:
+    """Mark ended CONFIRMED bookings COMPLETED in small batches (safe on several replicas)."""
+    from app.services.completion import CompletionReport, complete_ended_bookings
+
+    def progress(report: CompletionReport) -> None:
+        verb = "would complete" if report.dry_run else "completed"
+        print(f"  batch {report.batches}: scanned {report.scanned:,}, {verb} {report.completed:,}")
+
+    report = complete_ended_bookings(
+        _engine(args.database_url),
+        cutoff=args.before,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        max_batches=args.max_batches,
+        pause=args.pause_ms / 1000,
+        on_batch=progress,
+    )
+    if report.dry_run:
+        print(f"✓ Dry run: {report.completed:,} bookings ended before {report.cutoff} would complete")
+    else:
+        print(
+            f"✓ Completed {report.completed:,} of {report.scanned:,} ended bookings "
+            f"in {report.batches} batches ({report.elapsed:.1f}s)"
+        )
+
+
+def maintain_partitions(args: argparse.Namespace) -> None:
+    """Create upcoming monthly booking partitions and detach or archive old ones (PostgreSQL)."""
+    from app.db.partitions import maintain
+
+    engine = _engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Booking partitions require PostgreSQL")
+    try:
+        report = maintain(
+            engine, ahead=args.ahead, detach_before=args.detach_before, archive_dir=args.archive_dir
+        )
+    except (RuntimeError, ValueError) as exc:
+        raise SystemExit(str(exc)) from exc
+    print(f"✓ Created {len(report.created)} partitions {', '.join(report.created)}".rstrip())
+    if report.detached:
+        print(f"✓ Detached {len(report.detached)} partitions {', '.join(report.detached)}")
+    for path in report.archives:
+        print(f"  archived to {path}")
+    if report.default_rows:
+        print(f"! {report.default_rows:,} bookings are in the default partition")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL from settings")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate-data", help=generate_data.__doc__)
+    generate.add_argument("--courts", type=int, default=30)
+    generate.add_argument("--users", type=int, default=200_000)
+    generate.add_argument("--bookings", type=int, default=2_000_000)
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument(
+        "--reference-time",
+        type=datetime.fromisoformat,
+        help="Bookings after it are upcoming (default: a fixed epoch, for reproducible data)",
+    )
+    generate.add_argument(
+        "--end", type=date.fromisoformat, help="Last day (default: reference time + 30 days)"
+    )
+    generate.add_argument("--cancellation-ratio", type=float, default=0.12)
+    generate.add_argument("--unpaid-ratio", type=float, default=0.05)
+    generate.add_argument("--blocked-ratio", type=float, default=0.01)
+    generate.add_argument("--bcrypt-rounds", type=int, default=4)
+    generate.add_argument(
+        "--reset", action="store_true", help="Delete previously generated synthetic rows first"
+    )
+    generate.add_argument("--create-tables", action="store_true", help="Create missing tables")
+    generate.set_defaults(handler=generate_data)
+
+    rebuild = commands.add_parser("rebuild-stats", help=rebuild_stats.__doc__)
+    rebuild.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True)
+    rebuild.add_argument(
+        "--to", dest="date_to", type=date.fromisoformat, required=True, help="Exclusive"
+    )
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    purge = commands.add_parser("purge-idempotency-keys", help=purge_idempotency_keys.__doc__)
+    purge.set_defaults(handler=purge_idempotency_keys)
+
+    outbox = commands.add_parser("purge-outbox", help=purge_outbox.__doc__)
+    outbox.set_defaults(handler=purge_outbox)
+
+    complete = commands.add_parser("complete-bookings", help=complete_bookings.__doc__)
+    complete.add_argument("--before", type=datetime.fromisoformat, help="Cutoff (default: now)")
+    complete.add_argument("--batch-size", type=int, default=1_000)
+    complete.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    complete.add_argument("--pause-ms", type=float, default=0.0, help="Sleep between batches")
+    complete.add_argument("--dry-run", action="store_true", help="Count without writing")
+    complete.set_defaults(handler=complete_bookings)
+
+    partitions = commands.add_parser("maintain-partitions", help=maintain_partitions.__doc__)
+    partitions.add_argument("--ahead", type=int, default=3, help="Months to create ahead")
+    partitions.add_argument(
+        "--detach-before",
+        type=date.fromisoformat,
+        help="Detach monthly partitions that end on or before this date",
+    )
+    partitions.add_argument(
+        "--archive-dir",
+        type=Path,
+        help="Dump detached partitions here as <name>.csv.gz and drop them",
+    )
+    partitions.set_defaults(handler=maintain_partitions)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Small in-process TTL caches for expensive read-mostly results.
+
+Each cache is a bounded LRU whose entries also expire after ``ttl`` seconds.
+Lookups are counted in the ``cache_requests_total`` metric under the cache's
+name, and every cache registers itself in :data:`registry` so that writers can
+evict entries by cache name without importing the module that owns the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from app.core.metrics import record_cache_lookup
+
+registry: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 256) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        registry[name] = self
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, entry is not None)
+        return None if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value or compute, store and return it."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        """Drop every entry (or those whose key matches ``predicate``); return the count."""
+        with self._lock:
+            if predicate is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
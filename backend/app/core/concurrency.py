@@ -0,0 +1,49 @@
+"""ETag / If-Match helpers for optimistic concurrency on versioned rows.
+
+Versioned models (``Booking``, ``Court``) let SQLAlchemy turn every UPDATE into
+a compare-and-swap on their ``version`` column. The ETag of a row is its
+version; a PATCH carrying ``If-Match`` is rejected with 412 when the client's
+copy is outdated, and a concurrent writer that commits between our read and
+our UPDATE surfaces as ``StaleDataError``, also reported as 412.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def set_etag(response: Response, version: int) -> None:
+    response.headers["ETag"] = etag(version)
+
+
+def check_if_match(if_match: str | None, version: int) -> None:
+    """Raise 412 unless ``If-Match`` is absent, ``*`` or lists the current ETag."""
+    if if_match is None:
+        return
+    candidates = {tag.strip().removeprefix("W/") for tag in if_match.split(",")}
+    if "*" not in candidates and etag(version) not in candidates:
+        raise precondition_failed()
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource was modified by another request; reload it and retry",
+    )
+
+
+@contextmanager
+def compare_and_swap(session: Session) -> Iterator[None]:
+    """Turn a lost compare-and-swap during the enclosed flush/commit into a 412."""
+    try:
+        yield
+    except StaleDataError as exc:
+        session.rollback()
+        raise precondition_failed() from exc
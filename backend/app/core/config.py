@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,6 +17,8 @@ class Settings(BaseSettings):
     environment: str = "development"
     debug: bool = False
     log_level: str = "INFO"
+    # Per-logger sampling of sub-WARNING records, e.g. "app.api.bookings=0.1,httpx=0"
+    log_sampling: str = ""
 
     # Security
     secret_key: str = "dev-secret-key-change-in-production"
@@ -34,6 +38,71 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_minute: int = 60
 
+    # Build list responses from projected row tuples and encode them with orjson
+    fast_list_responses: bool = False
+
+    # Manager analytics (heatmaps, demand forecast) are cached in-process
+    analytics_cache_ttl_seconds: int = 300
+
+    # Compiled court price tables; writers evict them on every worker through the cache
+    # invalidation bus, and the TTL bounds staleness when a notification is lost
+    pricing_cache_ttl_seconds: int = 3600
+    # Compiled court opening hours and slot templates, cached the same way
+    schedule_cache_ttl_seconds: int = 3600
+
+    # NOTIFY channel of the cross-worker cache invalidation bus (PostgreSQL only)
+    cache_invalidation_channel: str = "cache_invalidation"
+
+    # Idempotency-Key records are kept this long, then purged by the cleanup command
+    idempotency_key_ttl_hours: int = 24
+    # How long a retry waits for the first request with the same key to finish
+    idempotency_wait_seconds: float = 10.0
+
+    # Slot holds (checkout leases): default and longest lifetime a client may ask for
+    slot_hold_ttl_seconds: int = 120
+    slot_hold_max_ttl_seconds: int = 600
+
+    # Batch contending booking creations per (court, day)
+    booking_write_queue: bool = False
+    booking_write_queue_window_ms: float = 5.0
+    booking_write_queue_max_batch: int = 200
+
+    # Outbox relay: delivers booking events written with each change to in-process subscribers
+    outbox_relay_enabled: bool = True
+    outbox_poll_interval_seconds: float = 1.0
+    outbox_batch_size: int = 100
+    # Delivered events are kept this long, then purged by the cleanup command
+    outbox_retention_hours: int = 24
+
+    # Match reminders and hold-expiry notices, scheduled in memory per worker
+    reminders_enabled: bool = True
+    reminder_lead_minutes: int = 120
+    # Reminders due within this window are kept in memory; the window is reloaded hourly
+    reminder_horizon_hours: int = 24
+    reminder_batch_size: int = 500
+    reminder_tick_seconds: float = 1.0
+    # "log", or "file" to append JSON lines to notification_file
+    notification_sender: str = "log"
+    notification_file: str = "notifications.jsonl"
+
+    # Background jobs: run a worker in each API process, or separately with `python -m app.worker`
+    jobs_in_process: bool = False
+    job_worker_threads: int = 4
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 300
+    # Most jobs running at once per queue across all workers, e.g. "maintenance=1"; others unlimited
+    job_queue_concurrency: str = "maintenance=1,payments=1"
+    # Finished jobs are kept this long, then purged by a periodic job
+    job_retention_hours: int = 72
+
+    # Metrics (set PROMETHEUS_MULTIPROC_DIR when running several workers)
+    metrics_enabled: bool = True
+
+    # Sampling profiler (admin-only; nothing is imported unless enabled)
+    profiler_enabled: bool = False
+    profiler_max_seconds: int = 60
+    profiler_request_interval_ms: float = 1.0
+
     # OpenTelemetry
     otel_service_name: str = "padelbooking-api"
     otel_exporter_otlp_endpoint: str = "http://localhost:4317"
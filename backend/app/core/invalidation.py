@@ -0,0 +1,149 @@
+"""Cross-process cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Writers call :func:`publish` with a cache name from :data:`app.core.cache.registry`
+and, optionally, the key to drop. The entry is evicted locally at once and, on
+PostgreSQL, a compact JSON message (cache, key, publish time, node) is sent
+with ``pg_notify``. Every worker keeps one connection listening on the
+channel in a background thread and evicts what other nodes announce. After a
+reconnect every registered cache is flushed, since messages sent while the
+connection was down are lost. The cache TTLs remain the bound on staleness if
+a notification does not arrive at all.
+
+Without PostgreSQL (local development, tests) the bus only evicts in process.
+
+The latency from publish on one node to eviction on another is recorded in
+``cache_invalidation_latency_seconds``; it relies on the clocks of the nodes
+being in sync. Local evictions are only counted.
+"""
+import os
+import select
+import socket
+import threading
+import time
+from typing import Any
+
+import orjson
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import Engine
+
+from app.core.cache import registry
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import CACHE_INVALIDATION_LATENCY, CACHE_INVALIDATIONS
+
+logger = get_logger(__name__)
+
+Key = int | str | None  # None drops every entry of the cache
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+HOST = socket.gethostname()
+
+
+def encode(cache: str, key: Key, node: str, published: float | None = None) -> str:
+    message = {"c": cache, "k": key, "t": published or time.time(), "n": node}
+    return orjson.dumps(message).decode()
+
+
+def evict(cache: str, key: Key) -> int:
+    """Drop ``key`` (every entry when None) from a registered cache; unknown caches are ignored."""
+    target = registry.get(cache)
+    if target is None:
+        return 0
+    if key is None:
+        return target.invalidate()
+    return target.invalidate(lambda candidate: candidate == key)
+
+
+class InvalidationBus:
+    """Publishes invalidations and, once started on PostgreSQL, applies those of other nodes."""
+
+    def __init__(self) -> None:
+        self._engine: Engine | None = None
+        self._listener: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def node(self) -> str:
+        # Derived on use, so workers forked after import each get their own
+        return f"{HOST}:{os.getpid()}:{id(self):x}"
+
+    def start(self, engine: Engine) -> None:
+        """Start listening when ``engine`` is PostgreSQL; otherwise stay in-process."""
+        if engine.dialect.name != "postgresql" or self._listener is not None:
+            return
+        self._engine = engine
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._stop.set()
+            self._listener.join(timeout=5)
+        self._listener = None
+        self._engine = None
+
+    def publish(self, cache: str, key: Key = None) -> None:
+        """Evict locally, then tell the other nodes; a failed NOTIFY is logged, not raised."""
+        message = encode(cache, key, self.node)
+        self.deliver(message, local=True)
+        if self._engine is None:
+            return
+        try:
+            notify = func.pg_notify(settings.cache_invalidation_channel, message)
+            with self._engine.begin() as connection:
+                connection.execute(sql_select(notify))
+        except Exception as exc:
+            logger.warning(f"Cache invalidation for {cache!r} not broadcast: {exc!r}")
+
+    def deliver(self, payload: str, local: bool = False) -> None:
+        """Apply one message; messages this node published were already applied."""
+        message: dict[str, Any] = orjson.loads(payload)
+        if not local and message["n"] == self.node:
+            return
+        evict(message["c"], message["k"])
+        CACHE_INVALIDATIONS.labels(cache=message["c"], source="local" if local else "remote").inc()
+        if not local:
+            CACHE_INVALIDATION_LATENCY.observe(max(time.time() - message["t"], 0.0))
+
+    def _listen(self) -> None:
+        assert self._engine is not None
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                connection = self._engine.raw_connection()
+                try:
+                    driver: Any = connection.driver_connection
+                    driver.rollback()
+                    driver.autocommit = True
+                    with driver.cursor() as cursor:
+                        cursor.execute(f"LISTEN {settings.cache_invalidation_channel}")
+                    # Whatever was published while nobody listened is lost
+                    for cache in list(registry):
+                        evict(cache, None)
+                    delay = RECONNECT_DELAY
+                    while not self._stop.is_set():
+                        if select.select([driver], [], [], 1.0)[0]:
+                            driver.poll()
+                            while driver.notifies:
+                                self.deliver(driver.notifies.pop(0).payload)
+                finally:
+                    # A LISTENing autocommit connection must not go back to the pool
+                    connection.invalidate()
+            except Exception:
+                logger.exception("Cache invalidation listener failed; reconnecting")
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+bus = InvalidationBus()
+
+
+def publish(cache: str, key: Key = None) -> None:
+    """Invalidate ``key`` of ``cache`` (every entry when None) on every node."""
+    bus.publish(cache, key)
@@ -1,34 +1,167 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 from app.core.config import settings
 
+# Attributes every LogRecord carries; anything else was passed via ``extra=``.
+_RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "trace_id"}
+
+_listener: QueueListener | None = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line, keeping ``extra=`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, tz=UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", "N/A"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of sub-WARNING records from selected loggers.
+
+    Rates apply to the longest matching logger prefix, so ``app.api=0.1`` also
+    samples ``app.api.bookings``. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            best = -1
+            for prefix, value in self.rates.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """Queue handler that defers formatting to the listener thread.
+
+    The stock ``prepare`` formats the whole record on the caller's thread and
+    flattens it into a string; here we only resolve what cannot safely cross
+    threads (message args and the traceback) and keep the structured fields.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """Parse ``"app.api.bookings=0.1,httpx=0"`` into a logger -> rate mapping."""
+    rates: dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        rates[name.strip()] = min(max(float(value), 0.0), 1.0)
+    return rates
+
 
 def setup_logging() -> None:
-    """Configure structured logging for the application."""
+    """Configure structured logging for the application.
+
+    Records are pushed onto an unbounded queue by the calling thread and written
+    to stdout by a background ``QueueListener``, so request handlers never block
+    on log I/O.
+    """
+    global _listener, _atexit_registered
+
     log_level = getattr(logging, settings.log_level.upper())
+    shutdown_logging()
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = _StructuredQueueHandler(log_queue)
+    rates = parse_sampling(settings.log_sampling)
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
 
-    # Configure root logger
-    logging.basicConfig(
-        level=log_level,
-        format='{"time": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", '
-        '"message": "%(message)s", "trace_id": "%(trace_id)s"}',
-        datefmt="%Y-%m-%dT%H:%M:%S",
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _StructuredQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(log_level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
 
     # Add trace_id to log records
     old_factory = logging.getLogRecordFactory()
+    if getattr(old_factory, "_adds_trace_id", False):
+        return
 
     def record_factory(*args: Any, **kwargs: Any) -> logging.LogRecord:
         record = old_factory(*args, **kwargs)
         record.trace_id = getattr(record, "trace_id", "N/A")  # type: ignore
         return record
 
+    record_factory._adds_trace_id = True  # type: ignore[attr-defined]
     logging.setLogRecordFactory(record_factory)
 
 
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance."""
     return logging.getLogger(name)
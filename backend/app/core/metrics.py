@@ -0,0 +1,261 @@
+"""Prometheus metrics for the API.
+
+Metrics are plain ``prometheus_client`` objects, so recording a sample is a
+lock-light in-memory update. When ``PROMETHEUS_MULTIPROC_DIR`` is set (it must
+point to an empty, writable directory shared by all uvicorn workers) every
+worker writes its samples to mmap'd files there and ``/metrics`` aggregates
+them, so the endpoint reports the whole server whichever worker answers.
+"""
+import os
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+# Any other request method is labelled "other"
+HTTP_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured database pool size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Database connections opened beyond the configured pool size",
+    multiprocess_mode="livesum",
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"],
+)
+CACHE_INVALIDATIONS = Counter(
+    "cache_invalidations_total",
+    "Cache invalidation messages applied, by cache and source (local or remote node)",
+    ["cache", "source"],
+)
+CACHE_INVALIDATION_LATENCY = Histogram(
+    "cache_invalidation_latency_seconds",
+    "Time from an invalidation being published to the entry being evicted on another node",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+BOOKINGS_CREATED = Counter(
+    "bookings_created_total",
+    "Bookings created, by kind (booking or block)",
+    ["kind"],
+)
+BOOKING_CONFLICTS = Counter(
+    "booking_conflicts_total",
+    "Booking writes rejected with 409 because the slot was taken",
+    ["operation"],
+)
+WRITE_QUEUE_BATCH_SIZE = Histogram(
+    "booking_write_queue_batch_size",
+    "Booking requests resolved together by one write queue batch",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 200),
+)
+WRITE_QUEUE_BATCH_DURATION = Histogram(
+    "booking_write_queue_batch_duration_seconds",
+    "Duration of one write queue batch (lock + snapshot + insert + commit)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HOLDS_CREATED = Counter(
+    "holds_created_total",
+    "Slot holds granted",
+)
+HOLDS_CONVERTED = Counter(
+    "holds_converted_total",
+    "Slot holds converted into a booking by their holder",
+)
+HOLDS_EXPIRED = Counter(
+    "holds_expired_total",
+    "Slot holds that expired without being converted into a booking",
+)
+BOOKINGS_AUTO_COMPLETED = Counter(
+    "bookings_auto_completed_total",
+    "Ended CONFIRMED bookings marked COMPLETED by the completion job",
+)
+COMPLETION_BATCH_DURATION = Histogram(
+    "booking_completion_batch_duration_seconds",
+    "Duration of one completion job batch (select + update + commit)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+COMPLETION_LAST_RUN = Gauge(
+    "booking_completion_last_run_timestamp_seconds",
+    "Unix time at which the completion job last finished",
+    multiprocess_mode="max",
+)
+WEBHOOK_EVENTS = Counter(
+    "webhook_events_total",
+    "Stripe webhook events processed, by event type and outcome",
+    ["event_type", "outcome"],
+)
+
+OUTBOX_EVENTS_DISPATCHED = Counter(
+    "outbox_events_dispatched_total",
+    "Outbox events delivered to every subscriber, by topic",
+    ["topic"],
+)
+OUTBOX_DISPATCH_FAILURES = Counter(
+    "outbox_dispatch_failures_total",
+    "Outbox deliveries that raised in a subscriber and were scheduled for retry, by topic",
+    ["topic"],
+)
+OUTBOX_DELIVERY_LAG = Histogram(
+    "outbox_delivery_lag_seconds",
+    "Time from an outbox event being committed to its delivery",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+OUTBOX_PENDING_AGE = Gauge(
+    "outbox_oldest_pending_event_age_seconds",
+    "Age of the oldest undelivered outbox event (0 when the outbox is drained)",
+    multiprocess_mode="max",
+)
+
+NOTIFICATIONS_SENT = Counter(
+    "notifications_sent_total",
+    "Reminders and notices accepted by the notification sender, by kind",
+    ["kind"],
+)
+NOTIFICATION_SEND_FAILURES = Counter(
+    "notification_send_failures_total",
+    "Notification batches the sender rejected; they are retried",
+)
+NOTIFICATION_DISPATCH_LAG = Histogram(
+    "notification_dispatch_lag_seconds",
+    "Delay between a notification falling due and its sending",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+REMINDERS_PENDING = Gauge(
+    "reminders_pending",
+    "Reminders and notices scheduled in memory",
+    multiprocess_mode="liveall",
+)
+
+JOBS_FINISHED = Counter(
+    "jobs_finished_total",
+    "Background job runs, by task and outcome (done, retry or failed)",
+    ["task", "outcome"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Duration of one background job run, by task",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+JOB_START_DELAY = Histogram(
+    "job_start_delay_seconds",
+    "Delay between a job falling due and a worker claiming it",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup; the hit ratio is derived from the two series."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Keep the pool gauges current by sampling the pool on checkout/checkin."""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        # StaticPool/NullPool (SQLite, tests) have no statistics to report.
+        return
+
+    DB_POOL_SIZE.set(pool.size())
+
+    def _sample(*_: Any) -> None:
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    event.listen(engine, "checkout", _sample)
+    event.listen(engine, "checkin", _sample)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Render the exposition payload for every worker (or just this one)."""
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess directory."""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests.
+
+    The route label is the matched path template (``/api/bookings/{booking_id}``)
+    rather than the raw path, and methods outside ``HTTP_METHODS`` are labelled
+    ``other``, so label cardinality stays bounded whatever clients send.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or "unmatched"
+            REQUEST_LATENCY.labels(method=method, route=template, status=str(status_code)).observe(
+                elapsed
+            )
@@ -0,0 +1,221 @@
+"""Low-overhead sampling profiler for a running worker.
+
+A daemon thread wakes every ``interval`` seconds, grabs the current stack of
+every other thread via ``sys._current_frames()`` and counts identical stacks.
+Nothing is instrumented, so the cost is one stack walk per thread per sample
+and the profiled code runs at full speed in between. Profiles can be rendered
+as collapsed stacks (flamegraph.pl, speedscope import) or as a speedscope
+JSON document.
+"""
+import asyncio
+import inspect
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import FrameType
+from typing import Any
+
+from sqlmodel import Session
+
+from app.core.security import decode_access_token
+from app.db.session import get_session
+from app.models import User, UserRole
+
+Frame = tuple[str, str, int]
+
+# Per-request profiles kept for later download, newest last.
+_request_profiles: deque[tuple[str, "SamplingProfiler"]] = deque(maxlen=20)
+_active_lock = threading.Lock()
+
+
+def _stack(frame: FrameType | None, thread_name: str) -> tuple[Frame, ...]:
+    frames: list[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.append((f"thread:{thread_name}", "", 0))
+    frames.reverse()
+    return tuple(frames)
+
+
+class SamplingProfiler:
+    """Sample the stacks of other threads at a fixed interval."""
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None) -> None:
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: Counter[tuple[Frame, ...]] = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.stacks[_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Render ``root;caller;callee count`` lines, heaviest stacks first."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ";".join(
+                name if not filename else f"{name} ({filename}:{line})"
+                for name, filename, line in stack
+            )
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "padelbooking") -> dict[str, Any]:
+        """Render a speedscope ``sampled`` profile (weights in seconds)."""
+        frame_index: dict[Frame, int] = {}
+        frames: list[dict[str, Any]] = []
+        samples: list[list[int]] = []
+        weights: list[float] = []
+        for stack, count in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "padelbooking-sampling-profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def try_acquire() -> bool:
+    """Allow one worker-wide profile at a time; profiles of profiles are noise."""
+    return _active_lock.acquire(blocking=False)
+
+
+def release() -> None:
+    _active_lock.release()
+
+
+def store_request_profile(profile_id: str, profiler: SamplingProfiler) -> None:
+    _request_profiles.append((profile_id, profiler))
+
+
+def get_request_profile(profile_id: str) -> SamplingProfiler | None:
+    for stored_id, profiler in reversed(_request_profiles):
+        if stored_id == profile_id:
+            return profiler
+    return None
+
+
+class RequestProfilingMiddleware:
+    """Profile single requests that carry ``X-Profile: 1`` and an admin token.
+
+    Only the thread running the event loop is sampled, so concurrent requests on
+    the same worker show up too; the response carries ``X-Profile-Id`` which can
+    be downloaded from ``/api/admin/profiler/requests/{profile_id}``. The token's
+    user is loaded like ``require_admin`` does, so a demoted or deactivated admin
+    whose token has not expired yet cannot profile.
+    """
+
+    def __init__(self, app: Any, interval: float) -> None:
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        user_id = self._profile_requester(scope) if scope["type"] == "http" else None
+        if user_id is None or not await asyncio.to_thread(_is_active_admin, scope, user_id):
+            await self.app(scope, receive, send)
+            return
+        if not try_acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler(self.interval, thread_ids={threading.get_ident()})
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            release()
+            store_request_profile(profile_id, profiler)
+
+    @staticmethod
+    def _profile_requester(scope: Any) -> int | None:
+        """The user id of a valid token on a request asking to be profiled."""
+        headers = dict(scope.get("headers", []))
+        if headers.get(b"x-profile", b"").lower() not in (b"1", b"true"):
+            return None
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        payload = decode_access_token(token)
+        if payload is None or payload.get("sub") is None:
+            return None
+        return int(payload["sub"])
+
+
+@contextmanager
+def _route_session(scope: Any) -> Iterator[Session]:
+    """The session ``get_session`` gives the app's routes, overrides included."""
+    overrides = getattr(scope.get("app"), "dependency_overrides", {})
+    provided = overrides.get(get_session, get_session)()
+    if not inspect.isgenerator(provided):
+        yield provided
+        return
+    try:
+        yield next(provided)
+    finally:
+        provided.close()
+
+
+def _is_active_admin(scope: Any, user_id: int) -> bool:
+    with _route_session(scope) as session:
+        user = session.get(User, user_id)
+        return user is not None and user.is_active and user.role == UserRole.ADMIN
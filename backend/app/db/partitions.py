@@ -0,0 +1,209 @@
+"""Monthly range partitions of ``bookings`` on PostgreSQL.
+
+Migration ``007`` turns ``bookings`` into a table partitioned by ``start_time``
+with one partition per month (``bookings_p2026_10``) and a default partition
+that catches rows outside them. :func:`maintain` keeps a few months of
+partitions ready ahead of time and takes old months out of the table: detached
+partitions are left as standalone tables, or dumped to ``<name>.csv.gz`` with
+``COPY`` and dropped.
+
+Partition pruning needs the query to bound ``start_time`` on both sides, while
+an overlap test only bounds it from above. Bookings never span more than a day
+(see ``validate_booking_window``), so :func:`start_time_window` adds the
+missing lower bound; the result is unchanged on every database.
+"""
+import gzip
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import and_
+
+from app.core.logging import get_logger
+from app.models import Booking
+
+logger = get_logger(__name__)
+
+PARENT = "bookings"
+DEFAULT_PARTITION = "bookings_default"
+MAX_BOOKING_SPAN = timedelta(days=1)
+_NAME = re.compile(r"^bookings_p(\d{4})_(\d{2})$")
+
+
+def start_time_window(start_time: datetime, end_time: datetime) -> ColumnElement[bool]:
+    """``start_time`` bounds implied by overlapping ``[start_time, end_time)``."""
+    return and_(
+        Booking.start_time > start_time - MAX_BOOKING_SPAN,
+        Booking.start_time < end_time,
+    )
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month.year:04d}_{month.month:02d}"
+
+
+@dataclass(frozen=True, order=True)
+class Partition:
+    month: date
+    name: str
+
+    @property
+    def end(self) -> date:
+        return add_months(self.month, 1)
+
+
+@dataclass
+class MaintenanceReport:
+    created: list[str] = field(default_factory=list)
+    detached: list[str] = field(default_factory=list)
+    archives: list[Path] = field(default_factory=list)
+    default_rows: int = 0
+
+
+def is_partitioned(connection: Connection) -> bool:
+    kind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}
+    ).scalar()
+    return kind == "p"
+
+
+def list_partitions(connection: Connection) -> list[Partition]:
+    """Monthly partitions currently attached to ``bookings``, oldest first."""
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:parent)"
+        ),
+        {"parent": PARENT},
+    ).scalars()
+    partitions = []
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            partitions.append(Partition(date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(connection: Connection, month: date) -> bool:
+    """Create the partition of ``month`` unless it exists; return whether it was created.
+
+    Rows of that month already stored in the default partition are moved into
+    the new table before it is attached, which PostgreSQL would otherwise refuse.
+    """
+    name = partition_name(month)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return False
+    lower, upper = month, add_months(month, 1)
+    connection.exec_driver_sql(
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE start_time >= :lower AND start_time < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    connection.exec_driver_sql(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+    return True
+
+
+def archive_partition(engine: Engine, partition: Partition, directory: Path | None) -> Path | None:
+    """Detach ``partition``; with ``directory``, dump it to a gzipped CSV and drop it.
+
+    Everything happens in one transaction: if the dump fails the partition
+    stays attached. Restore with
+    ``gunzip -c FILE | psql -c "\\copy bookings FROM STDIN WITH (FORMAT csv, HEADER)"``.
+    """
+    path = None
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {partition.name}")
+            if directory is not None:
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / f"{partition.name}.csv.gz"
+                partial = path.with_name(f"{path.name}.partial")
+                with gzip.open(partial, "wb") as archive:
+                    cursor.copy_expert(
+                        f"COPY {partition.name} TO STDOUT WITH (FORMAT csv, HEADER)", archive
+                    )
+                partial.replace(path)
+                cursor.execute(f"DROP TABLE {partition.name}")
+        raw.commit()
+    except BaseException:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return path
+
+
+def maintain(
+    engine: Engine,
+    ahead: int = 3,
+    detach_before: date | None = None,
+    archive_dir: Path | None = None,
+    today: date | None = None,
+) -> MaintenanceReport:
+    """Create partitions up to ``ahead`` months from now and take out months before ``detach_before``.
+
+    Each partition is created or detached in its own transaction. Only whole
+    months that ended on or before ``detach_before`` are detached, and never the
+    current month.
+    """
+    current = month_start(today or datetime.utcnow().date())
+    if detach_before is not None and detach_before > current:
+        raise ValueError("Cannot detach the current or future months")
+
+    report = MaintenanceReport()
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            raise RuntimeError(f"{PARENT} is not partitioned; run the database migrations first")
+        existing = list_partitions(connection)
+
+    for offset in range(ahead + 1):
+        with engine.begin() as connection:
+            if create_partition(connection, add_months(current, offset)):
+                report.created.append(partition_name(add_months(current, offset)))
+
+    if detach_before is not None:
+        for partition in existing:
+            if partition.end > detach_before:
+                break
+            path = archive_partition(engine, partition, archive_dir)
+            report.detached.append(partition.name)
+            if path is not None:
+                report.archives.append(path)
+
+    with engine.connect() as connection:
+        report.default_rows = connection.execute(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+        ).scalar_one()
+    logger.info(
+        "Booking partitions maintained",
+        extra={
+            "created": report.created,
+            "detached": report.detached,
+            "default_rows": report.default_rows,
+        },
+    )
+    return report
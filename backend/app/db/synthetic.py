@@ -0,0 +1,371 @@
+"""Deterministic synthetic data for load tests and benchmarks.
+
+Bookings are laid out court by court and day by day: each free half-hour slot
+starts a booking with a probability taken from a weekday/weekend hourly demand
+profile (evening peaks on weekdays, long busy mornings at weekends), scaled by a
+per-court popularity factor. Cancelled bookings free their slot again, so the
+active bookings of a court never overlap. Everything is driven by one
+``random.Random(seed)`` and the dates default to a fixed epoch
+(:data:`REFERENCE_TIME`), so the same arguments always produce the same rows,
+whatever day the generator runs.
+
+Rows are written with PostgreSQL ``COPY`` when available and with executemany
+bulk inserts otherwise. Synthetic users share one password hashed once at a low
+bcrypt cost, instead of paying a full-cost hash per user.
+"""
+import csv
+import io
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from passlib.context import CryptContext
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Engine
+
+from app.models import (
+    Booking,
+    BookingDailyStats,
+    BookingStatus,
+    Court,
+    CourtOpeningHours,
+    CourtSlotTemplate,
+    IdempotencyKey,
+    Notification,
+    PaymentStatus,
+    PricingRule,
+    SlotHold,
+    User,
+    UserRole,
+)
+
+SYNTHETIC_DOMAIN = "synthetic.padel"
+SYNTHETIC_PASSWORD = "Player123!"
+SYNTHETIC_COURT_PREFIX = "Synthetic Court "
+# Default "now" of generated datasets; bookings run until 30 days after it.
+REFERENCE_TIME = datetime(2026, 1, 1)
+
+OPENING_HOUR = 7
+CLOSING_HOUR = 23
+
+# Probability that a free slot starting at this hour gets booked.
+WEEKDAY_DEMAND = {
+    7: 0.25, 8: 0.2, 9: 0.12, 10: 0.12, 11: 0.15, 12: 0.22, 13: 0.22, 14: 0.12,
+    15: 0.15, 16: 0.25, 17: 0.5, 18: 0.8, 19: 0.85, 20: 0.8, 21: 0.6, 22: 0.3,
+}  # fmt: skip
+WEEKEND_DEMAND = {
+    7: 0.3, 8: 0.6, 9: 0.75, 10: 0.8, 11: 0.75, 12: 0.55, 13: 0.4, 14: 0.4,
+    15: 0.5, 16: 0.6, 17: 0.65, 18: 0.65, 19: 0.6, 20: 0.45, 21: 0.3, 22: 0.15,
+}  # fmt: skip
+DURATION_SLOTS = (2, 3, 4)  # 60, 90 and 120 minutes
+DURATION_WEIGHTS = (0.55, 0.4, 0.05)
+
+BOOKING_COLUMNS = (
+    "user_id",
+    "court_id",
+    "start_time",
+    "end_time",
+    "status",
+    "payment_status",
+    "is_blocked",
+    "total_price",
+    "notes",
+    "created_at",
+    "updated_at",
+)
+INSERT_BATCH = 50_000
+
+
+@dataclass
+class GeneratorConfig:
+    """Sizes and ratios of the generated dataset."""
+
+    courts: int = 30
+    users: int = 200_000
+    bookings: int = 2_000_000
+    seed: int = 42
+    # Bookings before this instant are history, later ones are upcoming.
+    reference_time: datetime = REFERENCE_TIME
+    # Roughly the last generated day (default: ``reference_time`` + 30 days); the first
+    # day is chosen so ``bookings`` fit before it.
+    end: date | None = None
+    cancellation_ratio: float = 0.12
+    unpaid_ratio: float = 0.05
+    blocked_ratio: float = 0.01
+    bcrypt_rounds: int = 4
+
+    @property
+    def last_day(self) -> date:
+        return self.end or self.reference_time.date() + timedelta(days=30)
+
+
+@dataclass
+class GeneratorResult:
+    courts: int
+    users: int
+    bookings: int
+    first_day: date
+    last_day: date
+
+
+def _expected_bookings_per_day(config: GeneratorConfig, popularity: list[float]) -> float:
+    """Estimate rows per day across all courts by simulating a few weeks on a side RNG.
+
+    Only used to pick the first day so that the generated range ends near
+    ``config.last_day``; the estimate does not consume the main RNG.
+    """
+    rng = random.Random(config.seed ^ 0x5EED)
+    last_slot = (CLOSING_HOUR - OPENING_HOUR) * 2
+    rows = 0
+    sample_days = 14
+    for day in range(sample_days):
+        demand = WEEKEND_DEMAND if day % 7 >= 5 else WEEKDAY_DEMAND
+        for factor in popularity:
+            slot = 0
+            while slot < last_slot:
+                if rng.random() >= demand[OPENING_HOUR + slot // 2] * factor:
+                    slot += 1
+                    continue
+                rows += 1
+                if rng.random() >= config.cancellation_ratio:
+                    slot += rng.choices(DURATION_SLOTS, DURATION_WEIGHTS)[0]
+    return max(rows / sample_days, 1.0)
+
+
+def _court_rows(config: GeneratorConfig, rng: random.Random, now: datetime) -> list[dict]:
+    return [
+        {
+            "name": f"{SYNTHETIC_COURT_PREFIX}{i + 1}",
+            "description": "Generated for load testing",
+            "is_active": True,
+            "hourly_rate": float(rng.choice((15, 20, 20, 25, 25, 30, 35))),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(config.courts)
+    ]
+
+
+def _user_rows(config: GeneratorConfig, now: datetime) -> Iterator[dict]:
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=config.bcrypt_rounds).hash(
+        SYNTHETIC_PASSWORD
+    )
+    yield {
+        "email": f"admin@{SYNTHETIC_DOMAIN}",
+        "hashed_password": hashed,
+        "full_name": "Synthetic Admin",
+        "role": UserRole.ADMIN,
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    }
+    for i in range(config.users):
+        yield {
+            "email": f"player{i}@{SYNTHETIC_DOMAIN}",
+            "hashed_password": hashed,
+            "full_name": f"Synthetic Player {i}",
+            "role": UserRole.USER,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+def iter_bookings(
+    config: GeneratorConfig,
+    rng: random.Random,
+    courts: list[tuple[int, float]],
+    user_ids: list[int],
+    admin_id: int,
+    now: datetime,
+) -> Iterator[dict[str, Any]]:
+    """Yield ``config.bookings`` non-overlapping booking rows in chronological order."""
+    popularity = [rng.uniform(0.7, 1.1) for _ in courts]
+    days = max(int(config.bookings / _expected_bookings_per_day(config, popularity)) + 1, 1)
+    day = config.last_day - timedelta(days=days - 1)
+    produced = 0
+
+    while produced < config.bookings:
+        weekend = day.weekday() >= 5
+        demand = WEEKEND_DEMAND if weekend else WEEKDAY_DEMAND
+        opening = datetime(day.year, day.month, day.day, OPENING_HOUR)
+        last_slot = (CLOSING_HOUR - OPENING_HOUR) * 2
+
+        for (court_id, hourly_rate), factor in zip(courts, popularity, strict=True):
+            slot = 0
+            while slot < last_slot and produced < config.bookings:
+                hour = OPENING_HOUR + slot // 2
+                if rng.random() >= demand[hour] * factor:
+                    slot += 1
+                    continue
+                length = rng.choices(DURATION_SLOTS, DURATION_WEIGHTS)[0]
+                length = min(length, last_slot - slot)
+                if length < 2:
+                    break
+                start = opening + timedelta(minutes=30 * slot)
+                end = start + timedelta(minutes=30 * length)
+                created_at = min(start - timedelta(hours=rng.uniform(1, 24 * 14)), now)
+
+                if rng.random() < config.blocked_ratio:
+                    row = {
+                        "user_id": admin_id,
+                        "status": BookingStatus.CONFIRMED,
+                        "payment_status": PaymentStatus.WAIVED,
+                        "is_blocked": True,
+                        "total_price": 0.0,
+                        "notes": "Maintenance",
+                    }
+                else:
+                    roll = rng.random()
+                    if roll < config.cancellation_ratio:
+                        status, payment = BookingStatus.CANCELLED, PaymentStatus.PENDING
+                    elif roll < config.cancellation_ratio + config.unpaid_ratio or start > now:
+                        # Future bookings are still partly awaiting payment
+                        paid = start > now and rng.random() < 0.6
+                        status = BookingStatus.CONFIRMED if paid else BookingStatus.PENDING
+                        payment = PaymentStatus.PAID if paid else PaymentStatus.PENDING
+                    else:
+                        status, payment = BookingStatus.CONFIRMED, PaymentStatus.PAID
+                    row = {
+                        "user_id": rng.choice(user_ids),
+                        "status": status,
+                        "payment_status": payment,
+                        "is_blocked": False,
+                        "total_price": round(hourly_rate * length / 2, 2),
+                        "notes": None,
+                    }
+                row.update(
+                    court_id=court_id,
+                    start_time=start,
+                    end_time=end,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                produced += 1
+                yield row
+                # A cancelled booking leaves its slot free for someone else
+                if row["status"] != BookingStatus.CANCELLED:
+                    slot += length
+        day += timedelta(days=1)
+
+
+def _copy_rows(engine: Engine, table: str, columns: tuple[str, ...], rows: list[dict]) -> None:
+    """Stream rows into PostgreSQL with ``COPY ... FROM STDIN``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                # Enum columns store member names, matching what the ORM writes
+                "\\N" if row[c] is None else row[c].name if hasattr(row[c], "name") else row[c]
+                for c in columns
+            ]
+        )
+    buffer.seek(0)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _write(engine: Engine, model: Any, rows: list[dict]) -> None:
+    if not rows:
+        return
+    if engine.dialect.name == "postgresql":
+        _copy_rows(engine, model.__tablename__, tuple(rows[0].keys()), rows)
+    else:
+        with engine.begin() as conn:
+            conn.execute(insert(model.__table__), rows)
+
+
+def reset_synthetic_data(engine: Engine) -> None:
+    """Delete the users and courts written by :func:`generate` and the rows pointing at them.
+
+    Bookings, holds, stats, pricing rules, opening hours, slot templates,
+    idempotency keys and notifications of synthetic users or courts go with
+    them; the rest of the database is left alone.
+    """
+    users = select(User.id).where(User.email.like(f"%@{SYNTHETIC_DOMAIN}"))
+    courts = select(Court.id).where(Court.name.like(f"{SYNTHETIC_COURT_PREFIX}%"))
+    with engine.begin() as conn:
+        conn.execute(
+            delete(BookingDailyStats.__table__).where(BookingDailyStats.court_id.in_(courts))
+        )
+        for schedule in (PricingRule, CourtOpeningHours, CourtSlotTemplate):
+            conn.execute(delete(schedule.__table__).where(schedule.court_id.in_(courts)))
+        for owned in (IdempotencyKey, Notification):
+            conn.execute(delete(owned.__table__).where(owned.user_id.in_(users)))
+        for model in (SlotHold, Booking):
+            conn.execute(
+                delete(model.__table__).where(
+                    model.user_id.in_(users) | model.court_id.in_(courts)
+                )
+            )
+        conn.execute(delete(Court.__table__).where(Court.name.like(f"{SYNTHETIC_COURT_PREFIX}%")))
+        conn.execute(delete(User.__table__).where(User.email.like(f"%@{SYNTHETIC_DOMAIN}")))
+
+
+def generate(engine: Engine, config: GeneratorConfig) -> GeneratorResult:
+    """Insert courts, users and bookings according to ``config``."""
+    rng = random.Random(config.seed)
+    now = config.reference_time
+
+    _write(engine, Court, _court_rows(config, rng, now))
+    batch: list[dict] = []
+    for row in _user_rows(config, now):
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            _write(engine, User, batch)
+            batch = []
+    _write(engine, User, batch)
+
+    with engine.connect() as conn:
+        courts = [
+            (row.id, row.hourly_rate)
+            for row in conn.execute(
+                select(Court.id, Court.hourly_rate)
+                .where(Court.name.like(f"{SYNTHETIC_COURT_PREFIX}%"))
+                .order_by(Court.id)
+            )
+        ]
+        admin_id = conn.execute(
+            select(User.id).where(User.email == f"admin@{SYNTHETIC_DOMAIN}")
+        ).scalar_one()
+        user_ids = list(
+            conn.execute(
+                select(User.id)
+                .where(User.email.like(f"player%@{SYNTHETIC_DOMAIN}"))
+                .order_by(User.id)
+            ).scalars()
+        )
+
+    first_day: date | None = None
+    last_day = config.last_day
+    produced = 0
+    batch = []
+    for row in iter_bookings(config, rng, courts, user_ids or [admin_id], admin_id, now):
+        if first_day is None:
+            first_day = row["start_time"].date()
+        last_day = row["start_time"].date()
+        batch.append({column: row[column] for column in BOOKING_COLUMNS})
+        produced += 1
+        if len(batch) >= INSERT_BATCH:
+            _write(engine, Booking, batch)
+            batch = []
+    _write(engine, Booking, batch)
+
+    return GeneratorResult(
+        courts=len(courts),
+        users=len(user_ids) + 1,
+        bookings=produced,
+        first_day=first_day or config.last_day,
+        last_day=last_day,
+    )
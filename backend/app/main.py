@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -8,9 +9,23 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
-from app.api import auth, bookings, courts, health, payments, users
+from app.api import (
+    analytics,
+    auth,
+    bookings,
+    courts,
+    health,
+    metrics,
+    payments,
+    pricing,
+    stats,
+    users,
+)
+from app.core import invalidation
 from app.core.config import settings
 from app.core.logging import get_logger, setup_logging
+from app.core.metrics import MetricsMiddleware, instrument_engine, mark_process_dead
+from app.db.session import engine
 
 logger = get_logger(__name__)
 
@@ -23,8 +38,28 @@ def get_application() -> FastAPI:
     async def lifespan(app: FastAPI) -> AsyncGenerator:
         """Manage application lifecycle."""
         logger.info(f"Starting {settings.app_name} v{settings.app_version}")
+        invalidation.bus.start(engine)
+        # Background loops share one stop signal and end before the bus stops
+        stop = asyncio.Event()
+        background = []
+        if settings.outbox_relay_enabled:
+            from app.services import outbox
+
+            background.append(asyncio.create_task(outbox.run_relay(engine, stop)))
+        if settings.reminders_enabled:
+            from app.services import reminders
+
+            background.append(asyncio.create_task(reminders.run_scheduler(engine, stop)))
+        if settings.jobs_in_process:
+            from app.services import jobs, maintenance  # noqa: F401
+
+            background.append(asyncio.create_task(jobs.run_worker(engine, stop)))
         yield
         logger.info(f"Shutting down {settings.app_name}")
+        stop.set()
+        await asyncio.gather(*background)
+        invalidation.bus.stop()
+        mark_process_dead()
 
     app = FastAPI(
         title=settings.app_name,
@@ -47,10 +82,24 @@ def get_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request latency and in-flight metrics, exposed on /metrics
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        instrument_engine(engine)
+
+    # On-demand profiling, imported only when enabled
+    if settings.profiler_enabled:
+        from app.core.profiler import RequestProfilingMiddleware
+
+        app.add_middleware(
+            RequestProfilingMiddleware, interval=settings.profiler_request_interval_ms / 1000
+        )
+
     # Configure rate limiting
     limiter = Limiter(key_func=get_remote_address)
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_exception_handler(bookings.SlotConflict, bookings.slot_conflict_handler)
 
     # Register routers
     app.include_router(health.router, prefix="/api", tags=["Health"])
@@ -59,6 +108,15 @@ def get_application() -> FastAPI:
     app.include_router(courts.router, prefix="/api/courts", tags=["Courts"])
     app.include_router(bookings.router, prefix="/api/bookings", tags=["Bookings"])
     app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
+    app.include_router(pricing.router, prefix="/api/pricing", tags=["Pricing"])
+    app.include_router(stats.router, prefix="/api/stats", tags=["Stats"])
+    app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+    if settings.metrics_enabled:
+        app.include_router(metrics.router, tags=["Metrics"])
+    if settings.profiler_enabled:
+        from app.api import profiling
+
+        app.include_router(profiling.router, prefix="/api/admin/profiler", tags=["Profiling"])
 
     # Global exception handler
     @app.exception_handler(Exception)
@@ -1,7 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index, text
+from sqlalchemy.orm import declared_attr
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -13,6 +15,22 @@ class UserRole(str, Enum):
     MANAGER = "manager"
 
 
+class JobStatus(str, Enum):
+    """Background job lifecycle."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class MembershipStatus(str, Enum):
+    """Club membership status, which unlocks member tariffs."""
+
+    MEMBER = "member"
+    NON_MEMBER = "non_member"
+
+
 class User(SQLModel, table=True):
     """User model for authentication and authorization."""
 
@@ -24,6 +42,8 @@ class User(SQLModel, table=True):
     full_name: str = Field(max_length=255)
     role: UserRole = Field(default=UserRole.USER)
     is_active: bool = Field(default=True)
+    membership_status: MembershipStatus = Field(default=MembershipStatus.NON_MEMBER)
+    membership_expires_at: Optional[datetime] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -41,12 +61,19 @@ class Court(SQLModel, table=True):
     description: Optional[str] = Field(default=None, max_length=500)
     is_active: bool = Field(default=True)
     hourly_rate: float = Field(default=0.0)
+    member_hourly_rate: Optional[float] = Field(default=None)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
     bookings: list["Booking"] = Relationship(back_populates="court")
 
+    @declared_attr
+    def __mapper_args__(cls) -> dict:
+        # Every ORM UPDATE bumps version and matches the version it read (StaleDataError if not)
+        return {"version_id_col": cls.__table__.c.version}
+
 
 class BookingStatus(str, Enum):
     """Booking status enumeration."""
@@ -69,6 +96,8 @@ class Booking(SQLModel, table=True):
     """Booking model for court reservations."""
 
     __tablename__ = "bookings"
+    # Per-court time range scans: conflict checks, availability and slot search
+    __table_args__ = (Index("ix_bookings_court_id_start_time", "court_id", "start_time"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True)
@@ -81,9 +110,213 @@ class Booking(SQLModel, table=True):
     stripe_session_id: Optional[str] = Field(default=None, max_length=255)
     total_price: float = Field(default=0.0)
     notes: Optional[str] = Field(default=None, max_length=500)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
     user: Optional[User] = Relationship(back_populates="bookings")
     court: Optional[Court] = Relationship(back_populates="bookings")
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict:
+        # Optimistic concurrency, as for Court
+        return {"version_id_col": cls.__table__.c.version}
+
+
+class SlotHold(SQLModel, table=True):
+    """Short-lived lease on a court slot while its holder checks out.
+
+    Until ``expires_at`` the slot is unavailable to everyone else; the holder
+    turns the hold into a booking by sending its ``hold_id`` with the booking.
+    """
+
+    __tablename__ = "slot_holds"
+    __table_args__ = (Index("ix_slot_holds_court_id_start_time", "court_id", "start_time"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    court_id: int = Field(foreign_key="courts.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
+    start_time: datetime
+    end_time: datetime
+    expires_at: datetime = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BookingDailyStats(SQLModel, table=True):
+    """Hourly utilization and revenue rollup per court, maintained on booking writes."""
+
+    __tablename__ = "booking_daily_stats"
+
+    court_id: int = Field(foreign_key="courts.id", primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+    hour: int = Field(primary_key=True, ge=0, le=23)
+    booked_minutes: int = Field(default=0)
+    blocked_minutes: int = Field(default=0)
+    paid_revenue: float = Field(default=0.0)
+    cancellations: int = Field(default=0)
+
+
+class PricingRule(SQLModel, table=True):
+    """Rate multiplier for a weekly time window (peak/off-peak, weekend, ...).
+
+    Rules without ``court_id`` apply to every court. Where rules overlap, the
+    one with the highest ``priority`` wins, court-specific before global.
+    """
+
+    __tablename__ = "pricing_rules"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    court_id: Optional[int] = Field(default=None, foreign_key="courts.id", index=True)
+    name: str = Field(max_length=100)
+    # Bit 0 is Monday, bit 6 is Sunday
+    weekday_mask: int = Field(default=0b1111111, ge=1, le=0b1111111)
+    start_minute: int = Field(ge=0, le=1440)
+    end_minute: int = Field(ge=0, le=1440)
+    multiplier: float = Field(default=1.0, ge=0)
+    priority: int = Field(default=0)
+    is_active: bool = Field(default=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CourtOpeningHours(SQLModel, table=True):
+    """A weekly window in which a court can be booked.
+
+    A court with no rows is open around the clock; otherwise it is open in the
+    union of its windows, so maintenance gaps are the time between two windows.
+    """
+
+    __tablename__ = "court_opening_hours"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    court_id: int = Field(foreign_key="courts.id", index=True)
+    # Bit 0 is Monday, bit 6 is Sunday
+    weekday_mask: int = Field(default=0b1111111, ge=1, le=0b1111111)
+    start_minute: int = Field(ge=0, le=1440)
+    end_minute: int = Field(ge=0, le=1440)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CourtSlotTemplate(SQLModel, table=True):
+    """Slot grid shown in a court's daily availability, e.g. 90-minute slots from 08:00.
+
+    Without templates the day is shown in one-hour slots.
+    """
+
+    __tablename__ = "court_slot_templates"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    court_id: int = Field(foreign_key="courts.id", index=True)
+    weekday_mask: int = Field(default=0b1111111, ge=1, le=0b1111111)
+    start_minute: int = Field(ge=0, le=1440)
+    end_minute: int = Field(ge=0, le=1440)
+    slot_minutes: int = Field(default=60, ge=30, le=1440)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header.
+
+    ``status_code`` stays NULL while the first request is still being processed.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key: str = Field(primary_key=True, max_length=255)
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    scope: str = Field(primary_key=True, max_length=100)
+    request_hash: str = Field(max_length=64)
+    status_code: Optional[int] = Field(default=None)
+    response_body: Optional[str] = Field(default=None)
+    response_hash: Optional[str] = Field(default=None, max_length=64)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+
+class OutboxEvent(SQLModel, table=True):
+    """A booking change waiting to be delivered to in-process subscribers.
+
+    Rows are written in the transaction of the change itself and marked
+    ``dispatched_at`` by the relay; ``available_at`` delays the next attempt
+    after a subscriber failed.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(max_length=50)
+    aggregate_id: int
+    payload: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    dispatched_at: Optional[datetime] = Field(default=None)
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+
+
+class Notification(SQLModel, table=True):
+    """Dispatch state of a reminder or notice, so each one goes out at most once.
+
+    ``key`` names the notification and the event it is about (a booking's
+    start, a hold's expiry). The row is inserted when a scheduler claims the
+    notification and ``sent_at`` is set once the sender accepted it.
+    """
+
+    __tablename__ = "notifications"
+
+    key: str = Field(primary_key=True, max_length=100)
+    kind: str = Field(max_length=30)
+    user_id: int = Field(foreign_key="users.id", index=True)
+    claimed_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    sent_at: Optional[datetime] = Field(default=None)
+
+
+class Job(SQLModel, table=True):
+    """A unit of background work, claimed by workers from its queue.
+
+    A RUNNING job is leased to ``locked_by`` until ``locked_until``; a worker
+    that dies mid-job lets the lease lapse and another worker runs it again.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index(
+            "ix_jobs_claimable",
+            "queue",
+            "run_at",
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+            sqlite_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    queue: str = Field(max_length=50)
+    task: str = Field(max_length=100)
+    payload: str = Field(default="{}")
+    status: JobStatus = Field(default=JobStatus.QUEUED)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    run_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_by: Optional[str] = Field(default=None, max_length=100)
+    locked_until: Optional[datetime] = Field(default=None)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None, index=True)
+
+
+class JobSchedule(SQLModel, table=True):
+    """When a periodic job is next due; workers advance it with a compare-and-swap."""
+
+    __tablename__ = "job_schedules"
+
+    name: str = Field(primary_key=True, max_length=100)
+    next_run_at: datetime
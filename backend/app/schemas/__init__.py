@@ -1,9 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
-from app.models import BookingStatus, PaymentStatus, UserRole
+from app.models import BookingStatus, MembershipStatus, PaymentStatus, UserRole
 
 
 # User Schemas
@@ -38,6 +38,8 @@ class UserUpdate(BaseModel):
     full_name: Optional[str] = Field(default=None, min_length=1, max_length=255)
     role: Optional[UserRole] = None
     is_active: Optional[bool] = None
+    membership_status: Optional[MembershipStatus] = None
+    membership_expires_at: Optional[datetime] = None
 
 
 class UserResponse(UserBase):
@@ -46,6 +48,8 @@ class UserResponse(UserBase):
     id: int
     role: UserRole
     is_active: bool
+    membership_status: MembershipStatus
+    membership_expires_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
@@ -59,6 +63,7 @@ class CourtBase(BaseModel):
     name: str = Field(min_length=1, max_length=100)
     description: Optional[str] = Field(default=None, max_length=500)
     hourly_rate: float = Field(ge=0)
+    member_hourly_rate: Optional[float] = Field(default=None, ge=0)
 
 
 class CourtCreate(CourtBase):
@@ -73,6 +78,7 @@ class CourtUpdate(BaseModel):
     name: Optional[str] = Field(default=None, min_length=1, max_length=100)
     description: Optional[str] = Field(default=None, max_length=500)
     hourly_rate: Optional[float] = Field(default=None, ge=0)
+    member_hourly_rate: Optional[float] = Field(default=None, ge=0)
     is_active: Optional[bool] = None
 
 
@@ -81,6 +87,7 @@ class CourtResponse(CourtBase):
 
     id: int
     is_active: bool
+    version: int
     created_at: datetime
 
     class Config:
@@ -114,9 +121,9 @@ class BookingBase(BaseModel):
 
 
 class BookingCreate(BookingBase):
-    """Schema for booking creation."""
+    """Schema for booking creation; ``hold_id`` converts the caller's hold on the same slot."""
 
-    pass
+    hold_id: Optional[int] = Field(default=None, gt=0)
 
 
 class BookingUpdate(BaseModel):
@@ -138,6 +145,7 @@ class BookingResponse(BookingBase):
     is_blocked: bool
     stripe_session_id: Optional[str] = None
     total_price: float
+    version: int
     created_at: datetime
 
     class Config:
@@ -181,6 +189,247 @@ class AdminBlockRequest(BaseModel):
     notes: Optional[str] = Field(default=None, max_length=500)
 
 
+class CourtDayUtilization(BaseModel):
+    """Utilization and revenue of one court on one day."""
+
+    court_id: int
+    day: date
+    booked_minutes: int
+    blocked_minutes: int
+    paid_revenue: float
+    cancellations: int
+    utilization: float
+
+
+class CourtUtilization(BaseModel):
+    """Utilization and revenue of one court over the requested range."""
+
+    court_id: int
+    booked_minutes: int
+    blocked_minutes: int
+    paid_revenue: float
+    cancellations: int
+    utilization: float
+
+
+class UtilizationResponse(BaseModel):
+    """Utilization report served from the hourly stats rollup."""
+
+    date_from: date
+    date_to: date
+    days: list[CourtDayUtilization]
+    courts: list[CourtUtilization]
+
+
+class CourtHeatmap(BaseModel):
+    """Occupancy of one court by weekday (Monday first) and half-hour slot."""
+
+    court_id: int
+    occupancy: list[list[float]]
+
+
+class HeatmapResponse(BaseModel):
+    """Weekday x half-hour occupancy heatmaps over a date range."""
+
+    date_from: date
+    date_to: date
+    slot_minutes: int
+    courts: list[CourtHeatmap]
+
+
+class ForecastDay(BaseModel):
+    """Expected demand for one court on one day."""
+
+    day: date
+    expected_minutes: float
+    utilization: float
+
+
+class CourtForecast(BaseModel):
+    """Demand forecast of one court."""
+
+    court_id: int
+    days: list[ForecastDay]
+
+
+class ForecastResponse(BaseModel):
+    """Seasonal demand forecast for the coming weeks."""
+
+    history_from: date
+    forecast_from: date
+    courts: list[CourtForecast]
+
+
+# Slot Hold Schemas
+class SlotHoldCreate(BaseModel):
+    """Schema for holding a slot; ``ttl_seconds`` defaults to the server setting."""
+
+    start_time: datetime
+    end_time: datetime
+    ttl_seconds: Optional[int] = Field(default=None, ge=10)
+
+    @field_validator("end_time")
+    @classmethod
+    def validate_end_time(cls, v: datetime, info: dict) -> datetime:
+        """Validate that end_time is after start_time."""
+        if "start_time" in info.data and v <= info.data["start_time"]:
+            raise ValueError("end_time must be after start_time")
+        return v
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def validate_slot_boundaries(cls, v: datetime) -> datetime:
+        """Validate that the hold is on 30-minute slots."""
+        if v.minute % 30 != 0 or v.second != 0 or v.microsecond != 0:
+            raise ValueError("Booking times must be on 30-minute slots")
+        return v
+
+
+class SlotHoldResponse(BaseModel):
+    """Schema for slot hold response."""
+
+    id: int
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Slot Search Schemas
+class FreeSlot(BaseModel):
+    """Earliest bookable slot of a free stretch; the court stays free until ``free_until``."""
+
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+    free_until: datetime
+
+
+class SlotSearchResponse(BaseModel):
+    """Earliest free slots across courts, ordered by start time then court."""
+
+    duration: int
+    earliest: datetime
+    latest: datetime
+    slots: list[FreeSlot]
+
+
+class TimeInterval(BaseModel):
+    """A ``[start_time, end_time)`` interval."""
+
+    start_time: datetime
+    end_time: datetime
+
+
+class BookingConflictResponse(BaseModel):
+    """409 body: the bookings in the way and the closest free slots nearby."""
+
+    detail: str
+    conflicts: list[TimeInterval]
+    alternatives: list[FreeSlot]
+
+
+class BookingRelocation(BaseModel):
+    """A booking moved to another court at the same time."""
+
+    booking_id: int
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class CourtDeactivationResponse(BaseModel):
+    """What happened to the future bookings of a deactivated court."""
+
+    court_id: int
+    relocated: list[BookingRelocation]
+    cancelled: list[int]
+
+
+# Weekly window Schemas
+class WeeklyWindow(BaseModel):
+    """A daily window on some weekdays; minutes are counted from midnight on a half-hour grid."""
+
+    weekdays: list[int] = Field(default=[0, 1, 2, 3, 4, 5, 6], min_length=1, max_length=7)
+    start_minute: int = Field(ge=0, le=1440, multiple_of=30)
+    end_minute: int = Field(ge=0, le=1440, multiple_of=30)
+
+    @field_validator("weekdays")
+    @classmethod
+    def validate_weekdays(cls, v: list[int]) -> list[int]:
+        """Validate weekdays are 0 (Monday) to 6 (Sunday)."""
+        if any(day < 0 or day > 6 for day in v):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        return sorted(set(v))
+
+    @field_validator("end_minute")
+    @classmethod
+    def validate_end_minute(cls, v: int, info: dict) -> int:
+        """Validate the window is not empty."""
+        if "start_minute" in info.data and v <= info.data["start_minute"]:
+            raise ValueError("end_minute must be after start_minute")
+        return v
+
+
+class SlotTemplateWindow(WeeklyWindow):
+    """Availability slots of ``slot_minutes`` laid out from ``start_minute``."""
+
+    slot_minutes: int = Field(default=60, ge=30, le=1440, multiple_of=30)
+
+
+class CourtScheduleUpdate(BaseModel):
+    """A court's opening hours and slot templates; no opening hours means always open."""
+
+    opening_hours: list[WeeklyWindow] = []
+    slot_templates: list[SlotTemplateWindow] = []
+
+
+class CourtScheduleResponse(CourtScheduleUpdate):
+    """Schema for court schedule response."""
+
+    court_id: int
+
+
+# Pricing Schemas
+class PricingRuleBase(WeeklyWindow):
+    """Base pricing rule schema; minutes are counted from midnight on a half-hour grid."""
+
+    court_id: Optional[int] = Field(default=None, gt=0)
+    name: str = Field(min_length=1, max_length=100)
+    multiplier: float = Field(default=1.0, ge=0)
+    priority: int = 0
+    is_active: bool = True
+
+
+class PricingRuleCreate(PricingRuleBase):
+    """Schema for pricing rule creation."""
+
+    pass
+
+
+class PricingRuleResponse(PricingRuleBase):
+    """Schema for pricing rule response."""
+
+    id: int
+    created_at: datetime
+
+
+class PricingQuoteResponse(BaseModel):
+    """Price quote for a court and time window."""
+
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_hours: float
+    hourly_rate: float
+    total_price: float
+    tariff_type: str
+    tariff_label: str
+
+
 # Error Response
 class ErrorResponse(BaseModel):
     """Standardized error response."""
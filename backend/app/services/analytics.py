@@ -0,0 +1,205 @@
+"""Occupancy heatmaps and demand forecasts computed on NumPy arrays.
+
+Bookings are loaded once as three int64 arrays (court, start, end in minutes
+since the epoch) and turned into a dense ``(court, half-hour)`` grid of occupied
+minutes with a difference array and ``cumsum``. Heatmaps and daily series are
+reshapes and sums of that grid, so no Python loop ever runs per booking.
+
+The forecast is deliberately simple and explainable: a per-court weekday
+profile from the most recent weeks, scaled by last year's change in demand
+between the same point in the season and the weeks that followed it.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.db.partitions import start_time_window
+from app.models import Booking
+from app.services.stats import EPOCH, OCCUPYING, epoch_minutes
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+MINUTES_PER_DAY = 24 * 60
+EPOCH_WEEKDAY = EPOCH.weekday()  # 1970-01-01 was a Thursday
+
+PROFILE_WEEKS = 8
+PROFILE_DECAY = 0.8  # weight of each older week in the weekday profile
+SEASON_WINDOW_DAYS = 28
+SEASON_FACTOR_LIMITS = (0.25, 4.0)
+
+
+@dataclass
+class Intervals:
+    """Occupying booking intervals as parallel int64 arrays of epoch minutes."""
+
+    court_id: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+
+
+def _epoch_day(day: date) -> int:
+    return (day - EPOCH.date()).days
+
+
+def load_intervals(
+    session: Session, date_from: date, date_to: date, court_ids: Sequence[int] | None = None
+) -> Intervals:
+    """Load active, completed and blocked bookings overlapping ``[date_from, date_to)``."""
+    window_start = datetime.combine(date_from, time.min)
+    window_end = datetime.combine(date_to, time.min)
+    statement = select(Booking.court_id, Booking.start_time, Booking.end_time).where(
+        Booking.status.in_(OCCUPYING),
+        start_time_window(window_start, window_end),
+        Booking.end_time > window_start,
+    )
+    if court_ids is not None:
+        statement = statement.where(Booking.court_id.in_(court_ids))
+    rows = session.connection().execute(statement).all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return Intervals(empty, empty, empty)
+
+    court_id, start, end = zip(*rows, strict=True)
+    lower = _epoch_day(date_from) * MINUTES_PER_DAY
+    upper = _epoch_day(date_to) * MINUTES_PER_DAY
+    return Intervals(
+        court_id=np.array(court_id, dtype=np.int64),
+        start=np.maximum(epoch_minutes(start), lower),
+        end=np.minimum(epoch_minutes(end), upper),
+    )
+
+
+def _positions(intervals: Intervals, courts: Sequence[int]) -> np.ndarray:
+    """Index of each interval's court in ``courts`` (-1 when not requested)."""
+    lookup = np.full(max(courts, default=0) + 2, -1, dtype=np.int64)
+    lookup[np.asarray(courts, dtype=np.int64)] = np.arange(len(courts))
+    return lookup[np.clip(intervals.court_id, 0, len(lookup) - 1)]
+
+
+def slot_grid(
+    intervals: Intervals, courts: Sequence[int], date_from: date, date_to: date
+) -> np.ndarray:
+    """Occupied minutes per ``(court, half-hour)`` over the range, shape ``(courts, days * 48)``.
+
+    Whole slots inside an interval are added with a difference array and one
+    ``cumsum``; only the partial first and last slots are scattered individually,
+    so the cost is linear in bookings plus grid size whatever the durations.
+    """
+    first_day = _epoch_day(date_from)
+    slots = max(_epoch_day(date_to) - first_day, 0) * SLOTS_PER_DAY
+    if not len(courts) or not slots:
+        return np.zeros((len(courts), slots))
+
+    origin = first_day * MINUTES_PER_DAY
+    position = _positions(intervals, courts)
+    start = np.clip(intervals.start - origin, 0, slots * SLOT_MINUTES)
+    end = np.clip(intervals.end - origin, 0, slots * SLOT_MINUTES)
+    keep = (position >= 0) & (end > start)
+    position, start, end = position[keep], start[keep], end[keep]
+
+    first_full = -(-start // SLOT_MINUTES)
+    last_full = end // SLOT_MINUTES
+    full = first_full < last_full
+    width = slots + 1
+    diff = np.bincount(
+        np.concatenate(
+            [position[full] * width + first_full[full], position[full] * width + last_full[full]]
+        ),
+        weights=np.repeat([SLOT_MINUTES, -SLOT_MINUTES], full.sum()),
+        minlength=len(courts) * width,
+    )
+    grid = np.cumsum(diff.reshape(len(courts), width), axis=1)[:, :slots]
+
+    head = start % SLOT_MINUTES != 0
+    tail = (end % SLOT_MINUTES != 0) & ((last_full > start // SLOT_MINUTES) | ~head)
+    partial_index = np.concatenate(
+        [
+            position[head] * slots + start[head] // SLOT_MINUTES,
+            position[tail] * slots + last_full[tail],
+        ]
+    )
+    partial_minutes = np.concatenate(
+        [
+            np.minimum(end[head], first_full[head] * SLOT_MINUTES) - start[head],
+            end[tail] % SLOT_MINUTES,
+        ]
+    )
+    grid += np.bincount(
+        partial_index, weights=partial_minutes, minlength=len(courts) * slots
+    ).reshape(len(courts), slots)
+    return grid
+
+
+def occupancy_heatmap(
+    intervals: Intervals, courts: Sequence[int], date_from: date, date_to: date
+) -> np.ndarray:
+    """Fraction of each ``(court, weekday, half-hour)`` that was occupied over the range.
+
+    Returns an array of shape ``(len(courts), 7, 48)`` with values in ``[0, 1]``;
+    weekday 0 is Monday.
+    """
+    grid = slot_grid(intervals, courts, date_from, date_to)
+    days = grid.shape[1] // SLOTS_PER_DAY
+    weekdays = (np.arange(_epoch_day(date_from), _epoch_day(date_from) + days) + EPOCH_WEEKDAY) % 7
+    by_day = grid.reshape(len(courts), days, SLOTS_PER_DAY)
+
+    heatmap = np.zeros((len(courts), 7, SLOTS_PER_DAY))
+    for weekday in range(7):
+        heatmap[:, weekday] = by_day[:, weekdays == weekday].sum(axis=1)
+    capacity = np.bincount(weekdays, minlength=7)[np.newaxis, :, np.newaxis] * SLOT_MINUTES
+    return np.divide(heatmap, capacity, out=np.zeros_like(heatmap), where=capacity > 0)
+
+
+def daily_minutes(
+    intervals: Intervals, courts: Sequence[int], date_from: date, date_to: date
+) -> np.ndarray:
+    """Occupied minutes per ``(court, day)`` as an array of shape ``(courts, days)``."""
+    grid = slot_grid(intervals, courts, date_from, date_to)
+    return grid.reshape(len(courts), -1, SLOTS_PER_DAY).sum(axis=2)
+
+
+def _season_factors(total: np.ndarray, horizon: int) -> np.ndarray:
+    """Last year's demand change from "today" to each forecast day, for all courts together.
+
+    ``total`` is the daily demand summed over courts, ending yesterday. Without
+    a full year plus the season window of history the factor is 1.
+    """
+    year = 364  # 52 weeks keeps weekdays aligned
+    if len(total) < year + SEASON_WINDOW_DAYS:
+        return np.ones(horizon)
+    anchor = len(total) - year  # index of "today" one year ago
+    baseline = total[anchor - SEASON_WINDOW_DAYS : anchor].mean()
+    if baseline <= 0:
+        return np.ones(horizon)
+    # Centered weekly mean around each day of last year's horizon (clipped to history)
+    weekly = np.convolve(total, np.ones(7) / 7, mode="same")
+    index = np.minimum(anchor + np.arange(horizon), len(total) - 4)
+    return np.clip(weekly[index] / baseline, *SEASON_FACTOR_LIMITS)
+
+
+def forecast_demand(daily: np.ndarray, horizon: int) -> np.ndarray:
+    """Expected occupied minutes per ``(court, day)`` for the ``horizon`` days after ``daily``.
+
+    ``daily`` holds the observed minutes per court and day up to yesterday, as
+    returned by :func:`daily_minutes`.
+    """
+    courts, days = daily.shape
+    if not days:
+        return np.zeros((courts, horizon))
+
+    weeks = min(PROFILE_WEEKS, days // 7) or 1
+    recent = daily[:, days - weeks * 7 :]
+    if recent.shape[1] < 7:
+        recent = np.pad(recent, ((0, 0), (7 - recent.shape[1], 0)))
+    # (courts, weeks, 7): column i has the weekday of forecast day i (and i + 7, ...)
+    by_week = recent.reshape(courts, -1, 7)
+    weights = PROFILE_DECAY ** np.arange(by_week.shape[1] - 1, -1, -1)
+    profile = np.tensordot(by_week, weights / weights.sum(), axes=([1], [0]))
+
+    offsets = np.arange(horizon) % 7
+    expected = profile[:, offsets] * _season_factors(daily.sum(axis=0), horizon)
+    return np.minimum(expected, MINUTES_PER_DAY)
@@ -0,0 +1,347 @@
+"""Free-slot search across courts and dates from one range query.
+
+Active bookings and slot holds of every requested court over the whole horizon
+are loaded in a single query ordered by court and start, as minutes since the
+epoch. Each court's free time is the complement of its busy intervals inside
+the daily time windows clipped to its opening hours, found by one merge walk
+over both sorted lists; the per-court streams are merged lazily by start time
+so that only the first ``limit`` free intervals are ever materialised.
+
+:func:`conflict_report` runs the same scan around a rejected booking: one
+query over the requested court and its neighbours, a few hours either side,
+yields both the bookings in the way and the closest free alternatives. When
+many requests for one court-day are rejected together, :func:`load_day` reads
+the day once and every report is built from that :class:`DaySnapshot`.
+"""
+import heapq
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import groupby, islice
+
+from sqlalchemy import literal_column, union_all
+from sqlmodel import Session, select
+
+from app.db.partitions import start_time_window
+from app.models import Booking, BookingStatus, Court, SlotHold
+from app.services import schedules
+from app.services.schedules import CourtSchedule
+from app.services.stats import EPOCH, epoch_minutes
+
+SLOT_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+# Statuses that make a slot unavailable, as in check_court_availability
+ACTIVE = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+ALTERNATIVE_RADIUS = timedelta(hours=3)
+NEIGHBOUR_COURTS = 2  # on each side, by court id
+MAX_ALTERNATIVES = 5
+
+Window = tuple[int, int]  # [start, end) in epoch minutes
+
+
+@dataclass(frozen=True)
+class FreeInterval:
+    """A free stretch of one court from a slot-aligned ``start`` until ``end``."""
+
+    court_id: int
+    start: datetime
+    end: datetime
+
+
+@dataclass(frozen=True)
+class ConflictReport:
+    """Bookings overlapping a rejected request and bookable alternatives, closest first."""
+
+    conflicts: list[tuple[datetime, datetime]]
+    alternatives: list[FreeInterval]
+
+
+@dataclass(frozen=True)
+class DaySnapshot:
+    """Active bookings and unexpired holds of a court and its neighbours over one day.
+
+    Holds keep their holder, so each rejected request can leave its own out.
+    """
+
+    courts: list[int]
+    bookings: dict[int, list[Window]]
+    holds: list[tuple[int, int, Window]]  # court id, holder id, interval
+
+    def busy(self, holder_id: int | None) -> dict[int, list[Window]]:
+        """Busy intervals per court, sorted by start, without the holds of ``holder_id``."""
+        busy = {court: list(intervals) for court, intervals in self.bookings.items()}
+        for court, user_id, interval in self.holds:
+            if user_id != holder_id:
+                busy.setdefault(court, []).append(interval)
+        for intervals in busy.values():
+            intervals.sort()
+        return busy
+
+
+def parse_time_window(value: str) -> Window:
+    """Parse ``"HH:MM-HH:MM"`` into minutes from midnight; the end may be ``24:00``."""
+    try:
+        first, last = value.split("-")
+        bounds = []
+        for part in (first, last):
+            hours, minutes = (int(field) for field in part.split(":"))
+            if not (0 <= minutes < 60 and 0 <= hours * 60 + minutes <= MINUTES_PER_DAY):
+                raise ValueError
+            bounds.append(hours * 60 + minutes)
+    except ValueError:
+        raise ValueError("time_window must look like 18:00-22:00") from None
+    if bounds[1] <= bounds[0]:
+        raise ValueError("time_window must end after it starts")
+    return bounds[0], bounds[1]
+
+
+def _minutes(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(minutes=1)
+
+
+def daily_windows(
+    earliest: datetime, latest: datetime, time_window: Window, duration: int
+) -> list[Window]:
+    """The time window of every day in ``[earliest, latest)``, clipped and long enough."""
+    lower, upper = _minutes(earliest), _minutes(latest)
+    windows = []
+    day = datetime.combine(earliest.date(), time.min)
+    while day < latest:
+        midnight = _minutes(day)
+        start = max(midnight + time_window[0], lower)
+        end = min(midnight + time_window[1], upper)
+        if end - start >= duration:
+            windows.append((start, end))
+        day += timedelta(days=1)
+    return windows
+
+
+def free_gaps(
+    busy: Sequence[Window], windows: Sequence[Window], duration: int
+) -> Iterator[Window]:
+    """Free ``[start, end)`` stretches of at least ``duration`` minutes, in time order.
+
+    ``busy`` must be sorted by start; overlapping entries are fine. Starts are
+    rounded up to the slot grid.
+    """
+    first = 0
+    for window_start, window_end in windows:
+        while first < len(busy) and busy[first][1] <= window_start:
+            first += 1
+        cursor = window_start
+        index = first
+        while index < len(busy) and busy[index][0] < window_end:
+            booking_start, booking_end = busy[index]
+            if booking_start > cursor:
+                yield from _fitting(cursor, booking_start, duration)
+            cursor = max(cursor, booking_end)
+            index += 1
+        if cursor < window_end:
+            yield from _fitting(cursor, window_end, duration)
+
+
+def open_windows(windows: Sequence[Window], schedule: CourtSchedule) -> list[Window]:
+    """``windows`` (none crossing midnight) clipped to the court's opening hours."""
+    if schedule.always_open:
+        return list(windows)
+    clipped = []
+    for start, end in windows:
+        midnight = start - start % MINUTES_PER_DAY
+        weekday = (EPOCH.weekday() + midnight // MINUTES_PER_DAY) % 7
+        for open_start, open_end in schedule.open_windows[weekday]:
+            lower, upper = max(start, midnight + open_start), min(end, midnight + open_end)
+            if lower < upper:
+                clipped.append((lower, upper))
+    return clipped
+
+
+def _fitting(start: int, end: int, duration: int) -> Iterator[Window]:
+    start = -(-start // SLOT_MINUTES) * SLOT_MINUTES
+    if end - start >= duration:
+        yield start, end
+
+
+def _datetime(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def load_busy(
+    session: Session,
+    court_ids: Sequence[int],
+    earliest: datetime,
+    latest: datetime,
+    exclude_booking_id: int | None = None,
+    holder_id: int | None = None,
+) -> dict[int, list[Window]]:
+    """Active bookings and unexpired holds overlapping ``[earliest, latest)`` per court.
+
+    Intervals are sorted by start; holds of ``holder_id`` are left out.
+    """
+    booked = select(Booking.court_id, Booking.start_time, Booking.end_time).where(
+        Booking.court_id.in_(court_ids),
+        Booking.status.in_(ACTIVE),
+        start_time_window(earliest, latest),
+        Booking.end_time > earliest,
+    )
+    if exclude_booking_id is not None:
+        booked = booked.where(Booking.id != exclude_booking_id)
+    held = select(SlotHold.court_id, SlotHold.start_time, SlotHold.end_time).where(
+        SlotHold.court_id.in_(court_ids),
+        SlotHold.start_time < latest,
+        SlotHold.end_time > earliest,
+        SlotHold.expires_at > datetime.utcnow(),
+    )
+    if holder_id is not None:
+        held = held.where(SlotHold.user_id != holder_id)
+    statement = union_all(booked, held).order_by(
+        literal_column("court_id"), literal_column("start_time")
+    )
+    rows = session.connection().execute(statement).all()
+    if not rows:
+        return {}
+    courts, starts, ends = zip(*rows, strict=True)
+    intervals = zip(
+        courts, epoch_minutes(starts).tolist(), epoch_minutes(ends).tolist(), strict=True
+    )
+    return {
+        court_id: [(start, end) for _, start, end in group]
+        for court_id, group in groupby(intervals, key=lambda row: row[0])
+    }
+
+
+def search(
+    session: Session,
+    duration: int,
+    earliest: datetime,
+    latest: datetime,
+    time_window: Window = (0, MINUTES_PER_DAY),
+    court_ids: Sequence[int] | None = None,
+    limit: int = 10,
+) -> list[FreeInterval]:
+    """The ``limit`` earliest free intervals of active courts, by start then court id."""
+    statement = select(Court.id).where(Court.is_active.is_(True)).order_by(Court.id)
+    if court_ids is not None:
+        statement = statement.where(Court.id.in_(court_ids))
+    courts = list(session.exec(statement).all())
+    windows = daily_windows(earliest, latest, time_window, duration)
+    if not courts or not windows:
+        return []
+
+    busy = load_busy(session, courts, earliest, latest)
+
+    def stream(court_id: int) -> Iterator[tuple[int, int, int]]:
+        court_windows = open_windows(windows, schedules.get_schedule(session, court_id))
+        for start, end in free_gaps(busy.get(court_id, []), court_windows, duration):
+            yield start, court_id, end
+
+    streams = [stream(court_id) for court_id in courts]
+    return [
+        FreeInterval(court_id=court_id, start=_datetime(start), end=_datetime(end))
+        for start, court_id, end in islice(heapq.merge(*streams), limit)
+    ]
+
+
+def _report_courts(session: Session, court_id: int) -> list[int]:
+    """``court_id`` followed by its nearest active neighbours by id."""
+    active = session.exec(select(Court.id).where(Court.is_active.is_(True))).all()
+    nearby = sorted(set(active) - {court_id}, key=lambda other: (abs(other - court_id), other))
+    return [court_id, *nearby[: 2 * NEIGHBOUR_COURTS]]
+
+
+def load_day(session: Session, court_id: int, day: date) -> DaySnapshot:
+    """Everything :func:`conflict_report` reads for creations on ``court_id`` on ``day``."""
+    courts = _report_courts(session, court_id)
+    earliest = datetime.combine(day, time.min)
+    latest = earliest + timedelta(days=1)
+    booked = session.exec(
+        select(Booking.court_id, Booking.start_time, Booking.end_time)
+        .where(
+            Booking.court_id.in_(courts),
+            Booking.status.in_(ACTIVE),
+            start_time_window(earliest, latest),
+            Booking.end_time > earliest,
+        )
+        .order_by(Booking.court_id, Booking.start_time)
+    ).all()
+    held = session.exec(
+        select(SlotHold.court_id, SlotHold.user_id, SlotHold.start_time, SlotHold.end_time).where(
+            SlotHold.court_id.in_(courts),
+            SlotHold.start_time < latest,
+            SlotHold.end_time > earliest,
+            SlotHold.expires_at > datetime.utcnow(),
+        )
+    ).all()
+    bookings: dict[int, list[Window]] = {}
+    for court, start, end in booked:
+        bookings.setdefault(court, []).append((_minutes(start), _minutes(end)))
+    return DaySnapshot(
+        courts=courts,
+        bookings=bookings,
+        holds=[
+            (court, user_id, (_minutes(start), _minutes(end)))
+            for court, user_id, start, end in held
+        ],
+    )
+
+
+def conflict_report(
+    session: Session,
+    court_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_booking_id: int | None = None,
+    holder_id: int | None = None,
+    now: datetime | None = None,
+    snapshot: DaySnapshot | None = None,
+) -> ConflictReport:
+    """What blocks ``[start_time, end_time)`` on ``court_id`` and the closest free slots.
+
+    Alternatives keep the requested duration and day, start within
+    ``ALTERNATIVE_RADIUS`` of the requested start on the same court or one of its
+    neighbours, and are ordered by distance from the request, same court first.
+    A ``snapshot`` of the court's day from :func:`load_day` replaces the
+    bookings query; it holds no booking to exclude, so it only suits creations.
+    """
+    day_start = datetime.combine(start_time.date(), time.min)
+    lower = max(start_time - ALTERNATIVE_RADIUS, day_start, now or datetime.utcnow())
+    upper = min(end_time + ALTERNATIVE_RADIUS, day_start + timedelta(days=1))
+    if snapshot is not None:
+        courts = snapshot.courts
+        busy = snapshot.busy(holder_id)
+    else:
+        courts = _report_courts(session, court_id)
+        busy = load_busy(
+            session,
+            courts,
+            min(lower, start_time),
+            max(upper, end_time),
+            exclude_booking_id,
+            holder_id,
+        )
+
+    start, end = _minutes(start_time), _minutes(end_time)
+    conflicts = [
+        (_datetime(busy_start), _datetime(busy_end))
+        for busy_start, busy_end in busy.get(court_id, [])
+        if busy_start < end and busy_end > start
+    ]
+
+    duration = end - start
+    candidates = []
+    windows = [(_minutes(lower), _minutes(upper))]
+    for rank, court in enumerate(courts):
+        court_windows = open_windows(windows, schedules.get_schedule(session, court))
+        for gap_start, gap_end in free_gaps(busy.get(court, []), court_windows, duration):
+            # The slot-aligned start inside the gap that is closest to the request
+            latest_start = (gap_end - duration) // SLOT_MINUTES * SLOT_MINUTES
+            closest = min(max(start, gap_start), latest_start)
+            closest = min(-(-closest // SLOT_MINUTES) * SLOT_MINUTES, latest_start)
+            candidates.append((abs(closest - start), rank, closest, court, gap_end))
+    candidates.sort()
+    return ConflictReport(
+        conflicts=conflicts,
+        alternatives=[
+            FreeInterval(court_id=court, start=_datetime(slot), end=_datetime(gap_end))
+            for _, _, slot, court, gap_end in candidates[:MAX_ALTERNATIVES]
+        ],
+    )
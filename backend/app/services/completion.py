@@ -0,0 +1,130 @@
+"""Mark ended CONFIRMED bookings as COMPLETED in small, independent batches.
+
+Each batch is one short transaction: select up to ``batch_size`` ended
+CONFIRMED bookings after the last ``(end_time, id)`` seen, then flip them with
+an UPDATE that re-checks ``status = CONFIRMED``. Keyset pagination keeps every
+select on the ``end_time`` index however large the backlog, and no lock is held
+between batches.
+
+Several replicas may run the job at once: on PostgreSQL the select uses
+``FOR UPDATE SKIP LOCKED`` so concurrent runs claim disjoint rows, and on every
+database the status predicate in the UPDATE makes a row flip at most once.
+COMPLETED still counts as occupied in ``booking_daily_stats``, so the rollup
+needs no adjustment.
+"""
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import tuple_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.logging import get_logger
+from app.core.metrics import BOOKINGS_AUTO_COMPLETED, COMPLETION_BATCH_DURATION, COMPLETION_LAST_RUN
+from app.models import Booking, BookingStatus
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 1_000
+
+
+@dataclass
+class CompletionReport:
+    cutoff: datetime
+    dry_run: bool
+    scanned: int = 0
+    completed: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def complete_ended_bookings(
+    engine: Engine,
+    cutoff: datetime | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    max_batches: int | None = None,
+    pause: float = 0.0,
+    on_batch: Callable[[CompletionReport], None] | None = None,
+) -> CompletionReport:
+    """Complete CONFIRMED bookings that ended at or before ``cutoff`` (default: now).
+
+    With ``dry_run`` the same batches are walked and ``completed`` counts what
+    would change, but nothing is written. ``pause`` sleeps between batches to
+    bound the load on the primary.
+    """
+    report = CompletionReport(cutoff=cutoff or datetime.utcnow(), dry_run=dry_run)
+    started = time.perf_counter()
+    last: tuple[datetime, int] | None = None
+
+    while max_batches is None or report.batches < max_batches:
+        batch_started = time.perf_counter()
+        with Session(engine) as session:
+            statement = (
+                select(Booking.end_time, Booking.id)
+                .where(
+                    Booking.status == BookingStatus.CONFIRMED,
+                    Booking.end_time <= report.cutoff,
+                    # Redundant, but lets PostgreSQL skip future partitions
+                    Booking.start_time < report.cutoff,
+                )
+                .order_by(Booking.end_time, Booking.id)
+                .limit(batch_size)
+            )
+            if last is not None:
+                statement = statement.where(tuple_(Booking.end_time, Booking.id) > tuple_(*last))
+            if not dry_run:
+                statement = statement.with_for_update(skip_locked=True)
+            rows = session.connection().execute(statement).all()
+            if not rows:
+                break
+
+            completed = len(rows)  # what a dry run would complete
+            if not dry_run:
+                result = session.exec(  # type: ignore[call-overload]
+                    update(Booking)
+                    .where(
+                        Booking.id.in_([row.id for row in rows]),
+                        Booking.status == BookingStatus.CONFIRMED,
+                    )
+                    .values(
+                        status=BookingStatus.COMPLETED,
+                        version=Booking.version + 1,
+                        updated_at=datetime.utcnow(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                completed = result.rowcount
+                session.commit()
+
+        last = (rows[-1].end_time, rows[-1].id)
+        report.batches += 1
+        report.scanned += len(rows)
+        report.completed += completed
+        if not dry_run:
+            BOOKINGS_AUTO_COMPLETED.inc(completed)
+        COMPLETION_BATCH_DURATION.observe(time.perf_counter() - batch_started)
+        if on_batch is not None:
+            on_batch(report)
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    report.elapsed = time.perf_counter() - started
+    if not dry_run:
+        COMPLETION_LAST_RUN.set(time.time())
+    logger.info(
+        "Booking completion finished",
+        extra={
+            "cutoff": report.cutoff.isoformat(),
+            "dry_run": dry_run,
+            "scanned": report.scanned,
+            "completed": report.completed,
+            "batches": report.batches,
+            "elapsed_s": round(report.elapsed, 3),
+        },
+    )
+    return report
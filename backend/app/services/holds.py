@@ -0,0 +1,215 @@
+"""Slot holds: short leases that keep a slot free while its holder checks out.
+
+The ``slot_holds`` table is shared by every replica and is what makes holds
+binding: availability checks look for unexpired holds of other users in the
+same query as conflicting bookings. Each process also keeps the holds it
+granted in :data:`index`, per court a list of tuples sorted by start, so that a
+slot held through this replica is rejected with a bisect and no database round
+trip.
+
+Holds are granted under a row lock on the court (PostgreSQL), so concurrent
+holds of one court are serialised, and a user has at most one active hold: a
+new one replaces the previous. Every writer that can put a booking on a court
+takes the same lock before its conflict check, so a hold is only granted on a
+slot that no committed or in-flight booking covers, and no booking lands on it
+while the hold lives. The holder converts a hold into a booking by deleting it
+in the booking's transaction, under the court lock; when that delete matches,
+the conflict query is skipped.
+
+A hold released through another replica stays in this replica's index until it
+expires, so the index can only make a slot look taken, for at most the hold
+lifetime, never free.
+"""
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.sql import Select
+from sqlmodel import Session, select
+
+from app.core.metrics import HOLDS_CONVERTED, HOLDS_CREATED, HOLDS_EXPIRED
+from app.db.partitions import MAX_BOOKING_SPAN
+from app.models import Court, SlotHold
+from app.services.reminders import HOLD_NOTICE_GRACE
+
+# start, end, expires_at, user_id, hold id
+Entry = tuple[datetime, datetime, datetime, int, int]
+
+
+class HoldIndex:
+    """Unexpired holds granted by this process, per court sorted by start."""
+
+    def __init__(self) -> None:
+        self._courts: dict[int, list[Entry]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, hold: SlotHold) -> None:
+        entry = (hold.start_time, hold.end_time, hold.expires_at, hold.user_id, hold.id)
+        with self._lock:
+            insort(self._courts.setdefault(hold.court_id, []), entry)
+
+    def discard(self, court_id: int, hold_ids: set[int]) -> None:
+        with self._lock:
+            entries = self._courts.get(court_id, [])
+            entries[:] = [entry for entry in entries if entry[4] not in hold_ids]
+
+    def blocks(
+        self,
+        court_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        holder_id: int | None,
+        now: datetime,
+    ) -> bool:
+        """Whether an unexpired hold of someone other than ``holder_id`` overlaps the slot."""
+        with self._lock:
+            entries = self._courts.get(court_id)
+            if not entries:
+                return False
+            if any(entry[2] <= now for entry in entries):
+                entries[:] = [entry for entry in entries if entry[2] > now]
+            index = bisect_left(entries, (end_time,))
+            while index > 0 and entries[index - 1][0] > start_time - MAX_BOOKING_SPAN:
+                index -= 1
+                start, end, _, user_id, _ = entries[index]
+                if end > start_time and user_id != holder_id:
+                    return True
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._courts.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._courts.values())
+
+
+index = HoldIndex()
+
+
+def overlapping(
+    court_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    holder_id: int | None,
+    now: datetime,
+) -> Select:
+    """Ids of unexpired holds overlapping the slot, except those of ``holder_id``."""
+    statement = select(SlotHold.id).where(
+        SlotHold.court_id == court_id,
+        SlotHold.start_time < end_time,
+        SlotHold.end_time > start_time,
+        SlotHold.expires_at > now,
+    )
+    if holder_id is not None:
+        statement = statement.where(SlotHold.user_id != holder_id)
+    return statement
+
+
+def lock_court(session: Session, court_id: int) -> None:
+    """Serialise hold grants and booking writes of one court until the transaction ends."""
+    session.exec(select(Court.id).where(Court.id == court_id).with_for_update()).one()
+
+
+def release_user_holds(session: Session, user_id: int) -> dict[int, set[int]]:
+    """Delete the user's holds in the current transaction; return their ids by court."""
+    held = session.exec(select(SlotHold.court_id, SlotHold.id).where(SlotHold.user_id == user_id))
+    released: dict[int, set[int]] = {}
+    for court_id, hold_id in held.all():
+        released.setdefault(court_id, set()).add(hold_id)
+    if released:
+        session.exec(delete(SlotHold).where(SlotHold.user_id == user_id))  # type: ignore[call-overload]
+    return released
+
+
+def grant(
+    session: Session,
+    court_id: int,
+    user_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    ttl_seconds: int,
+    released: dict[int, set[int]],
+) -> SlotHold:
+    """Store a hold on a slot the caller found free and commit.
+
+    Holds of the court that expired more than ``HOLD_NOTICE_GRACE`` ago are
+    purged in the same transaction; younger ones wait for their expiry notice.
+    """
+    now = datetime.utcnow()
+    expired = session.exec(  # type: ignore[call-overload]
+        delete(SlotHold).where(
+            SlotHold.court_id == court_id, SlotHold.expires_at <= now - HOLD_NOTICE_GRACE
+        )
+    )
+    hold = SlotHold(
+        court_id=court_id,
+        user_id=user_id,
+        start_time=start_time,
+        end_time=end_time,
+        expires_at=now + timedelta(seconds=ttl_seconds),
+    )
+    session.add(hold)
+    session.commit()
+    session.refresh(hold)
+
+    for released_court, hold_ids in released.items():
+        index.discard(released_court, hold_ids)
+    index.add(hold)
+    HOLDS_CREATED.inc()
+    HOLDS_EXPIRED.inc(expired.rowcount)
+    return hold
+
+
+def convert(
+    session: Session,
+    hold_id: int,
+    user_id: int,
+    court_id: int,
+    start_time: datetime,
+    end_time: datetime,
+) -> bool:
+    """Consume the user's unexpired hold on exactly this slot, in the caller's transaction.
+
+    The caller holds :func:`lock_court`. Other bookings take that lock before
+    their conflict check and see the hold, so a matching delete means the slot
+    is still free.
+    """
+    result = session.exec(  # type: ignore[call-overload]
+        delete(SlotHold).where(
+            SlotHold.id == hold_id,
+            SlotHold.user_id == user_id,
+            SlotHold.court_id == court_id,
+            SlotHold.start_time == start_time,
+            SlotHold.end_time == end_time,
+            SlotHold.expires_at > datetime.utcnow(),
+        )
+    )
+    if result.rowcount != 1:
+        return False
+    index.discard(court_id, {hold_id})
+    HOLDS_CONVERTED.inc()
+    return True
+
+
+def release(session: Session, hold_id: int, user_id: int, court_id: int) -> bool:
+    """Delete one of the user's holds and commit; False when there is no such hold."""
+    result = session.exec(  # type: ignore[call-overload]
+        delete(SlotHold).where(
+            SlotHold.id == hold_id, SlotHold.user_id == user_id, SlotHold.court_id == court_id
+        )
+    )
+    session.commit()
+    index.discard(court_id, {hold_id})
+    return result.rowcount == 1
+
+
+def purge_expired(session: Session, before: datetime) -> int:
+    """Delete holds that expired before ``before`` and commit; returns how many went."""
+    result = session.exec(  # type: ignore[call-overload]
+        delete(SlotHold).where(SlotHold.expires_at < before)
+    )
+    session.commit()
+    HOLDS_EXPIRED.inc(result.rowcount)
+    return result.rowcount
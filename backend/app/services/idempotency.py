@@ -0,0 +1,276 @@
+"""``Idempotency-Key`` handling for non-idempotent POST endpoints.
+
+The first request with a key claims it by inserting an in-progress row in its
+own short transaction and runs the endpoint. The endpoint stores the encoded
+response (with its SHA-256) through :func:`record` in the same transaction that
+commits its effect, so a crash can never leave a committed booking behind a
+claim that is still in progress. Retries with the same key and payload get the stored bytes back
+without running the endpoint again; retries that arrive while the first
+request is still running poll the row until it completes. Reusing a key for a
+different payload is rejected.
+
+Error responses are not stored: the claim is released so that the client can
+retry after fixing the request. A claim left in progress by a crashed worker
+has no committed effect and is taken over once it is older than ``STALE_AFTER``.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+STALE_AFTER = timedelta(minutes=2)
+POLL_INTERVAL = 0.05
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+@dataclass
+class Claim:
+    """A key owned by the running request, and how to encode its response."""
+
+    user_id: int
+    scope: str
+    key: str
+    response_model: type[BaseModel]
+    status_code: int
+    response: JSONResponse | None = None
+
+
+_current: ContextVar[Claim | None] = ContextVar("idempotency_claim", default=None)
+
+
+def current() -> Claim | None:
+    """The claim of the request whose handler is running, None without a key."""
+    return _current.get()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_hash(payload: BaseModel) -> str:
+    canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return _digest(canonical.encode())
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+def _try_claim(session: Session, user_id: int, scope: str, key: str, digest: str) -> bool:
+    now = datetime.utcnow()
+    dialect = session.get_bind().dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = (
+        insert_fn(IdempotencyKey)
+        .values(
+            key=key,
+            user_id=user_id,
+            scope=scope,
+            request_hash=digest,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours),
+        )
+        .on_conflict_do_nothing()
+    )
+    claimed = session.exec(statement).rowcount == 1  # type: ignore[call-overload]
+    session.commit()
+    return claimed
+
+
+def _take_over(session: Session, record: IdempotencyKey, digest: str) -> bool:
+    """Restart an expired or abandoned claim; only one contender can win."""
+    now = datetime.utcnow()
+    result = session.exec(  # type: ignore[call-overload]
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == record.key,
+            IdempotencyKey.user_id == record.user_id,
+            IdempotencyKey.scope == record.scope,
+            IdempotencyKey.created_at == record.created_at,
+        )
+        .values(
+            request_hash=digest,
+            status_code=None,
+            response_body=None,
+            response_hash=None,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours),
+        )
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+async def claim(
+    session: Session, user_id: int, scope: str, key: str, digest: str
+) -> Response | None:
+    """Claim ``key`` for this request, or return the stored response of an earlier one.
+
+    Returns None when the caller owns the key and must run the endpoint.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    # Every attempt commits, which expires the session, so each poll re-reads the row
+    while True:
+        if _try_claim(session, user_id, scope, key, digest):
+            return None
+
+        record = session.exec(
+            select(IdempotencyKey).where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.scope == scope,
+            )
+        ).first()
+        if record is None:
+            continue  # released between our insert and select
+        now = datetime.utcnow()
+        if record.expires_at < now:
+            if _take_over(session, record, digest):
+                return None
+            continue
+        if record.request_hash != digest:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if record.status_code is not None:
+            return _replay(record)
+        if record.created_at < now - STALE_AFTER and _take_over(session, record, digest):
+            return None
+        if time.monotonic() > deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def _store(session: Session, user_id: int, scope: str, key: str, response: Response) -> None:
+    session.exec(  # type: ignore[call-overload]
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+        )
+        .values(
+            status_code=response.status_code,
+            response_body=response.body.decode(),
+            response_hash=_digest(response.body),
+        )
+    )
+
+
+def _encode(claim: Claim, result: Any) -> JSONResponse:
+    content = jsonable_encoder(claim.response_model.model_validate(result, from_attributes=True))
+    return JSONResponse(content=content, status_code=claim.status_code)
+
+
+def record(session: Session, claim: Claim | None, result: Any) -> None:
+    """Store ``result`` as the response of ``claim`` in the session's open transaction.
+
+    Call it right before the commit that makes the request's effect durable;
+    a no-op for requests sent without a key.
+    """
+    if claim is None:
+        return
+    session.flush()
+    claim.response = _encode(claim, result)
+    _store(session, claim.user_id, claim.scope, claim.key, claim.response)
+
+
+def complete(
+    session: Session, user_id: int, scope: str, key: str, response: Response
+) -> None:
+    """Store the response of the request that owns ``key``."""
+    _store(session, user_id, scope, key, response)
+    session.commit()
+
+
+def release(session: Session, user_id: int, scope: str, key: str) -> None:
+    """Forget an in-progress claim so that the request can be retried."""
+    session.rollback()
+    session.exec(  # type: ignore[call-overload]
+        delete(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    session.commit()
+
+
+async def run(
+    session: Session,
+    user_id: int,
+    scope: str,
+    key: str | None,
+    payload: BaseModel,
+    handler: Callable[[], Awaitable[Any]],
+    response_model: type[BaseModel],
+    status_code: int = status.HTTP_200_OK,
+) -> Any:
+    """Run ``handler`` at most once per ``key``; without a key just run it.
+
+    Handlers that :func:`record` their result have it stored atomically with
+    their effect; otherwise it is stored afterwards, in its own transaction.
+    """
+    if key is None:
+        return await handler()
+
+    replay = await claim(session, user_id, scope, key, request_hash(payload))
+    if replay is not None:
+        return replay
+    owned = Claim(user_id, scope, key, response_model, status_code)
+    token = _current.set(owned)
+    try:
+        result = await handler()
+    except BaseException:
+        release(session, user_id, scope, key)
+        raise
+    finally:
+        _current.reset(token)
+
+    if owned.response is not None:
+        return owned.response
+    response = _encode(owned, result)
+    complete(session, user_id, scope, key, response)
+    return response
+
+
+def purge_expired(session: Session, now: datetime | None = None) -> int:
+    """Delete expired keys and return how many were removed."""
+    result = session.exec(  # type: ignore[call-overload]
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < (now or datetime.utcnow()))
+    )
+    session.commit()
+    return result.rowcount
@@ -0,0 +1,400 @@
+"""Database-backed background jobs.
+
+A job is a row of ``jobs`` in a named queue, added with :func:`enqueue` in the
+caller's transaction, so it exists if and only if the work that asked for it
+committed. Workers claim due jobs in batches with one ``UPDATE ... RETURNING``
+whose subquery selects them ``FOR UPDATE SKIP LOCKED``: concurrent workers
+take disjoint jobs without waiting on each other. SQLite has no row locks and
+runs the same statement under its database write lock.
+
+A claim leases the job to its worker for ``job_lease_seconds`` and the worker
+renews the lease while the job runs. A job whose lease lapsed because its
+worker died is claimable again, so a job can run more than once and tasks
+should be idempotent. A failing job is retried with exponential backoff until
+``max_attempts``, then left FAILED with its last error.
+
+Queues listed in ``job_queue_concurrency`` run at most that many jobs at once
+across every worker. Claims on those queues first take a per-queue advisory
+lock (PostgreSQL) and count the live leases.
+
+Periodic jobs are declared with :func:`every`. Their next run time lives in
+``job_schedules`` and is advanced with a compare-and-swap, so each run is
+enqueued once however many workers are up.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+import orjson
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import JOB_DURATION, JOB_START_DELAY, JOBS_FINISHED
+from app.models import Job, JobSchedule, JobStatus
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE = "default"
+MAX_BACKOFF = timedelta(hours=1)
+
+TaskFunction = Callable[[Engine, dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    fn: TaskFunction
+    queue: str
+    max_attempts: int
+    backoff: timedelta  # delay before the first retry, doubled on each one
+
+
+@dataclass(frozen=True)
+class Schedule:
+    name: str
+    task: str
+    interval: timedelta
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+registry: dict[str, Task] = {}
+schedules: dict[str, Schedule] = {}
+
+
+def task(
+    name: str,
+    queue: str = DEFAULT_QUEUE,
+    max_attempts: int = 5,
+    backoff: timedelta = timedelta(seconds=30),
+) -> Callable[[TaskFunction], TaskFunction]:
+    """Register the decorated ``fn(engine, payload)`` as the task ``name``."""
+
+    def register(fn: TaskFunction) -> TaskFunction:
+        registry[name] = Task(name, fn, queue, max_attempts, backoff)
+        return fn
+
+    return register
+
+
+def every(interval: timedelta, task_name: str, name: str | None = None, **payload: Any) -> None:
+    """Run ``task_name`` every ``interval``, first as soon as a worker serving its queue starts."""
+    schedules[name or task_name] = Schedule(name or task_name, task_name, interval, payload)
+
+
+def parse_concurrency(spec: str) -> dict[str, int]:
+    """``"maintenance=1,payments=2"`` -> ``{"maintenance": 1, "payments": 2}``."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        queue, _, value = item.partition("=")
+        limits[queue.strip()] = max(int(value), 0)
+    return limits
+
+
+def enqueue(
+    session: Session,
+    task_name: str,
+    payload: dict[str, Any] | None = None,
+    run_at: datetime | None = None,
+) -> Job:
+    """Add a job to the caller's transaction; the caller commits."""
+    if task_name not in registry:
+        raise ValueError(f"Unknown job task {task_name!r}")
+    definition = registry[task_name]
+    job = Job(
+        queue=definition.queue,
+        task=task_name,
+        payload=orjson.dumps(payload or {}).decode(),
+        max_attempts=definition.max_attempts,
+        run_at=run_at or datetime.utcnow(),
+    )
+    session.add(job)
+    return job
+
+
+def enqueue_due_schedules(
+    session: Session, now: datetime | None = None, queues: Iterable[str] | None = None
+) -> int:
+    """Enqueue the periodic jobs that are due (of ``queues`` only, if given) and commit."""
+    now = now or datetime.utcnow()
+    wanted = set(queues) if queues is not None else None
+    due = {
+        name: schedule
+        for name, schedule in schedules.items()
+        if schedule.task in registry and (wanted is None or registry[schedule.task].queue in wanted)
+    }
+    if not due:
+        return 0
+
+    dialect = session.get_bind().dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    session.exec(  # type: ignore[call-overload]
+        insert_fn(JobSchedule)
+        .values([{"name": name, "next_run_at": now} for name in due])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    rows = session.exec(
+        select(JobSchedule.name, JobSchedule.next_run_at).where(
+            JobSchedule.name.in_(due), JobSchedule.next_run_at <= now
+        )
+    ).all()
+    enqueued = 0
+    for name, seen in rows:
+        schedule = due[name]
+        # Only the worker whose update matches enqueues this run; missed runs are skipped
+        advanced = session.exec(  # type: ignore[call-overload]
+            update(JobSchedule)
+            .where(JobSchedule.name == name, JobSchedule.next_run_at == seen)
+            .values(next_run_at=now + schedule.interval)
+        )
+        if advanced.rowcount == 1:
+            enqueue(session, schedule.task, schedule.payload, run_at=now)
+            enqueued += 1
+    session.commit()
+    return enqueued
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    task: str
+    payload: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+
+
+def _lock_queue(session: Session, queue: str) -> None:
+    if session.get_bind().dialect.name == "postgresql":
+        session.exec(select(func.pg_advisory_xact_lock(zlib.crc32(f"jobs:{queue}".encode()))))
+
+
+def claim(
+    session: Session, queue: str, limit: int, worker_id: str, now: datetime | None = None
+) -> list[ClaimedJob]:
+    """Lease up to ``limit`` due jobs of ``queue`` to ``worker_id``; the caller commits."""
+    now = now or datetime.utcnow()
+    queue_limit = parse_concurrency(settings.job_queue_concurrency).get(queue)
+    if queue_limit is not None:
+        _lock_queue(session, queue)
+        running = session.exec(
+            select(func.count())
+            .select_from(Job)
+            .where(Job.queue == queue, Job.status == JobStatus.RUNNING, Job.locked_until >= now)
+        ).one()
+        limit = min(limit, queue_limit - running)
+    if limit <= 0:
+        return []
+
+    candidates = (
+        select(Job.id)
+        .where(
+            Job.queue == queue,
+            Job.status.in_((JobStatus.QUEUED, JobStatus.RUNNING)),
+            or_(
+                and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+                # Lease lapsed: the worker running it is gone
+                and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),
+            ),
+        )
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(Job)
+        .where(Job.id.in_(candidates))
+        .values(
+            status=JobStatus.RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=settings.job_lease_seconds),
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job.id, Job.task, Job.payload, Job.attempts, Job.max_attempts, Job.run_at)
+    )
+    rows = session.connection().execute(statement).all()
+    return sorted((ClaimedJob(*row) for row in rows), key=lambda job: (job.run_at, job.id))
+
+
+def _backoff(definition: Task | None, attempts: int) -> timedelta:
+    base = definition.backoff if definition else timedelta(seconds=30)
+    return min(base * 2 ** min(attempts - 1, 16), MAX_BACKOFF)
+
+
+def finish(
+    session: Session, job: ClaimedJob, worker_id: str, error: BaseException | None = None
+) -> str:
+    """Record the outcome of a run and commit; returns ``done``, ``retry`` or ``failed``.
+
+    Nothing is written when the lease passed to another worker meanwhile.
+    """
+    now = datetime.utcnow()
+    values: dict[str, Any] = {"locked_by": None, "locked_until": None}
+    if error is None:
+        outcome = "done"
+        values.update(status=JobStatus.DONE, finished_at=now)
+    elif job.attempts >= job.max_attempts:
+        outcome = "failed"
+        values.update(status=JobStatus.FAILED, finished_at=now, last_error=repr(error)[:500])
+    else:
+        outcome = "retry"
+        values.update(
+            status=JobStatus.QUEUED,
+            run_at=now + _backoff(registry.get(job.task), job.attempts),
+            last_error=repr(error)[:500],
+        )
+    session.exec(  # type: ignore[call-overload]
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(**values)
+    )
+    session.commit()
+    return outcome
+
+
+def purge_finished(session: Session, before: datetime | None = None) -> int:
+    """Delete DONE and FAILED jobs finished before ``before`` (default: the retention window)."""
+    cutoff = before or datetime.utcnow() - timedelta(hours=settings.job_retention_hours)
+    result = session.exec(  # type: ignore[call-overload]
+        delete(Job).where(Job.finished_at < cutoff)
+    )
+    session.commit()
+    return result.rowcount
+
+
+class Worker:
+    """Claims jobs of ``queues`` for a pool of ``threads`` and runs them."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        queues: Iterable[str] | None = None,
+        threads: int | None = None,
+        worker_id: str | None = None,
+    ) -> None:
+        self.engine = engine
+        self.queues = list(queues) if queues else sorted({t.queue for t in registry.values()})
+        self.threads = threads or settings.job_worker_threads
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="job")
+        self._running: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._renewed = time.monotonic()
+
+    @property
+    def busy(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """Enqueue due schedules, renew leases and fill the free threads; returns jobs started."""
+        now = now or datetime.utcnow()
+        with Session(self.engine) as session:
+            enqueue_due_schedules(session, now, self.queues)
+        self._renew_leases()
+
+        started = 0
+        for queue in self.queues:
+            free = self.threads - self.busy
+            if free <= 0:
+                break
+            with Session(self.engine) as session:
+                claimed = claim(session, queue, free, self.worker_id, now)
+                session.commit()
+            for job in claimed:
+                JOB_START_DELAY.observe(max((now - job.run_at).total_seconds(), 0.0))
+                with self._lock:
+                    self._running[job.id] = self._pool.submit(self._execute, job)
+            started += len(claimed)
+        return started
+
+    def _execute(self, job: ClaimedJob) -> None:
+        started = time.perf_counter()
+        error: BaseException | None = None
+        try:
+            definition = registry.get(job.task)
+            if definition is None:
+                raise LookupError(f"Unknown job task {job.task!r}")
+            definition.fn(self.engine, orjson.loads(job.payload))
+        except Exception as exc:
+            logger.exception(f"Job {job.id} ({job.task}) failed on attempt {job.attempts}")
+            error = exc
+        finally:
+            JOB_DURATION.labels(task=job.task).observe(time.perf_counter() - started)
+            try:
+                with Session(self.engine) as session:
+                    outcome = finish(session, job, self.worker_id, error)
+                JOBS_FINISHED.labels(task=job.task, outcome=outcome).inc()
+            except Exception:
+                # The lease lapses and another worker runs the job again
+                logger.exception(f"Recording the outcome of job {job.id} failed")
+            with self._lock:
+                self._running.pop(job.id, None)
+
+    def _renew_leases(self) -> None:
+        if time.monotonic() - self._renewed < settings.job_lease_seconds / 3:
+            return
+        self._renewed = time.monotonic()
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+        with Session(self.engine) as session:
+            session.exec(  # type: ignore[call-overload]
+                update(Job)
+                .where(Job.id.in_(running), Job.locked_by == self.worker_id)
+                .values(
+                    locked_until=datetime.utcnow() + timedelta(seconds=settings.job_lease_seconds)
+                )
+            )
+            session.commit()
+
+    def run(self, stop: threading.Event, burst: bool = False) -> None:
+        """Work until ``stop`` is set, or with ``burst`` until nothing is left to claim."""
+        try:
+            while not stop.is_set():
+                try:
+                    started = self.run_once()
+                except Exception:
+                    logger.exception("Job worker iteration failed")
+                    started = 0
+                if burst and not started and not self.busy:
+                    return
+                if not started or self.busy >= self.threads:
+                    stop.wait(settings.job_poll_interval_seconds)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Wait for the running jobs to finish."""
+        self._pool.shutdown(wait=True)
+
+
+async def run_worker(engine: Engine, stop: asyncio.Event) -> None:
+    """In-process worker for the API lifespan; claims run in a thread, jobs in the pool."""
+    worker = Worker(engine)
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.to_thread(worker.run_once)
+            except Exception:
+                logger.exception("Job worker iteration failed")
+            try:
+                await asyncio.wait_for(stop.wait(), settings.job_poll_interval_seconds)
+            except TimeoutError:
+                pass
+    finally:
+        await asyncio.to_thread(worker.shutdown)
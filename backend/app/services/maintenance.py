@@ -0,0 +1,56 @@
+"""Built-in background jobs and their schedules.
+
+Importing this module registers the tasks with :mod:`app.services.jobs`; the
+worker does so on startup. Each task wraps a service that was already safe to
+run from several replicas at once.
+"""
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.services import completion, holds, idempotency, jobs, outbox, payments, reminders, stats
+
+MAINTENANCE = "maintenance"
+PAYMENTS = "payments"
+
+
+@jobs.task("holds.expire", queue=MAINTENANCE)
+def expire_holds(engine: Engine, payload: dict[str, Any]) -> None:
+    # Expired holds stay long enough for their expiry notice to check them
+    with Session(engine) as session:
+        holds.purge_expired(session, datetime.utcnow() - reminders.HOLD_NOTICE_GRACE)
+
+
+@jobs.task("bookings.complete", queue=MAINTENANCE)
+def complete_bookings(engine: Engine, payload: dict[str, Any]) -> None:
+    completion.complete_ended_bookings(engine)
+
+
+@jobs.task("payments.reconcile", queue=PAYMENTS)
+def reconcile_payments(engine: Engine, payload: dict[str, Any]) -> None:
+    payments.reconcile(engine)
+
+
+@jobs.task("stats.rebuild", queue=MAINTENANCE, max_attempts=3)
+def rebuild_stats(engine: Engine, payload: dict[str, Any]) -> None:
+    """Recompute the rollup of the last ``days`` full days (default 1)."""
+    today = datetime.utcnow().date()
+    stats.rebuild(engine, today - timedelta(days=payload.get("days", 1)), today)
+
+
+@jobs.task("cleanup.purge", queue=MAINTENANCE)
+def purge(engine: Engine, payload: dict[str, Any]) -> None:
+    """Drop expired idempotency keys, delivered outbox events and finished jobs."""
+    with Session(engine) as session:
+        idempotency.purge_expired(session)
+        outbox.purge_dispatched(session)
+        jobs.purge_finished(session)
+
+
+jobs.every(timedelta(minutes=1), "holds.expire")
+jobs.every(timedelta(minutes=15), "bookings.complete")
+jobs.every(timedelta(minutes=15), "payments.reconcile")
+jobs.every(timedelta(days=1), "stats.rebuild")
+jobs.every(timedelta(hours=1), "cleanup.purge")
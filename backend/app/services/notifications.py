@@ -0,0 +1,70 @@
+"""Notification senders: how reminders and notices leave the application.
+
+``settings.notification_sender`` picks the sender: ``log`` writes one log
+record per notification, and ``file`` appends them as JSON lines to
+``settings.notification_file``, which tests and local development read back.
+Other channels (e-mail, push) implement :class:`NotificationSender` and are
+passed to the scheduler.
+"""
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+import orjson
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Message:
+    key: str
+    kind: str
+    user_id: int
+    email: str
+    full_name: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+class NotificationSender(Protocol):
+    def send(self, messages: Sequence[Message]) -> None:
+        """Deliver a batch; raising leaves the whole batch to be retried."""
+
+
+class LogSender:
+    def send(self, messages: Sequence[Message]) -> None:
+        for message in messages:
+            logger.info(f"Notification {message.kind} to user {message.user_id}: {message.data}")
+
+
+class FileSender:
+    """Appends each notification to ``path`` as one JSON line."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def send(self, messages: Sequence[Message]) -> None:
+        lines = b"".join(
+            orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE) for message in messages
+        )
+        with self._lock, self.path.open("ab") as output:
+            output.write(lines)
+
+    def read(self) -> list[dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        return [orjson.loads(line) for line in self.path.read_bytes().splitlines()]
+
+
+def get_sender(name: str | None = None) -> NotificationSender:
+    name = name or settings.notification_sender
+    if name == "log":
+        return LogSender()
+    if name == "file":
+        return FileSender(settings.notification_file)
+    raise ValueError(f"Unknown notification sender {name!r}")
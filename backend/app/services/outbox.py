@@ -0,0 +1,191 @@
+"""Transactional outbox for booking events.
+
+Every booking change adds an ``outbox_events`` row in the transaction that
+makes the change, so an event exists if and only if the change committed.
+A relay task in each API process then claims pending rows in id order with
+``SELECT ... FOR UPDATE SKIP LOCKED``. Several processes can run the relay
+at the same time: each one skips the rows another has already claimed.
+The relay hands every claimed event to the in-process subscribers of its
+topic and marks it dispatched in the same transaction.
+
+Delivery is at-least-once. A crash between a subscriber running and the
+commit leaves the row pending, so the event is delivered again. When a
+subscriber raises, the event is retried with exponential backoff and every
+subscriber sees it again. Subscribers should therefore be idempotent, keyed
+on ``Event.id``. Retries can overtake later events, so consumers that care
+about order compare ``Event.id`` for the same aggregate.
+
+SQLite has no row locks: the relay works there, but only one process may run it.
+"""
+import asyncio
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+import orjson
+from sqlalchemy import delete, func, insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import (
+    OUTBOX_DELIVERY_LAG,
+    OUTBOX_DISPATCH_FAILURES,
+    OUTBOX_EVENTS_DISPATCHED,
+    OUTBOX_PENDING_AGE,
+)
+from app.models import Booking, OutboxEvent
+from app.services import stats
+
+logger = get_logger(__name__)
+
+BOOKING_CREATED = "booking.created"
+BOOKING_UPDATED = "booking.updated"
+BOOKING_CANCELLED = "booking.cancelled"
+BOOKING_BLOCKED = "booking.blocked"
+BOOKING_PAID = "booking.paid"
+BOOKING_RELOCATED = "booking.relocated"
+ALL_TOPICS = "*"
+
+MAX_BACKOFF = timedelta(minutes=5)
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    topic: str
+    aggregate_id: int
+    payload: dict[str, Any]
+    created_at: datetime
+    attempts: int
+
+
+Handler = Callable[[Event], None]
+
+_subscribers: dict[str, list[Handler]] = {}
+
+
+def subscribe(topic: str, handler: Handler) -> None:
+    """Deliver events of ``topic`` (or of every topic, with ``"*"``) to ``handler``."""
+    _subscribers.setdefault(topic, []).append(handler)
+
+
+def unsubscribe(topic: str, handler: Handler) -> None:
+    handlers = _subscribers.get(topic, [])
+    if handler in handlers:
+        handlers.remove(handler)
+
+
+def booking_payload(booking_id: int, state: stats.BookingState, **extra: Any) -> dict[str, Any]:
+    return {"booking_id": booking_id, **state._asdict(), **extra}
+
+
+def publish(session: Session, events: Iterable[tuple[str, int, dict[str, Any]]]) -> None:
+    """Add ``(topic, aggregate_id, payload)`` events to the caller's transaction."""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "topic": topic,
+            "aggregate_id": aggregate_id,
+            "payload": orjson.dumps(payload).decode(),
+            "created_at": now,
+            "available_at": now,
+            "attempts": 0,
+        }
+        for topic, aggregate_id, payload in events
+    ]
+    if rows:
+        session.connection().execute(insert(OutboxEvent.__table__), rows)
+
+
+def emit(session: Session, topic: str, bookings: Iterable[Booking], **extra: Any) -> None:
+    """Record ``topic`` for each booking; flushes first so new bookings have an id."""
+    session.flush()
+    publish(
+        session,
+        (
+            (topic, booking.id, booking_payload(booking.id, stats.snapshot(booking), **extra))
+            for booking in bookings
+        ),
+    )
+
+
+def _dispatch(event: Event) -> None:
+    for handler in (*_subscribers.get(event.topic, ()), *_subscribers.get(ALL_TOPICS, ())):
+        handler(event)
+
+
+def _backoff(attempts: int) -> timedelta:
+    return min(timedelta(seconds=2 ** min(attempts, 16)), MAX_BACKOFF)
+
+
+def relay_batch(engine: Engine, batch_size: int | None = None) -> int:
+    """Deliver one batch of pending events in one transaction; returns how many were claimed."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        rows = session.exec(
+            select(OutboxEvent)
+            .where(OutboxEvent.dispatched_at.is_(None), OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(batch_size or settings.outbox_batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        for row in rows:
+            event = Event(
+                id=row.id,
+                topic=row.topic,
+                aggregate_id=row.aggregate_id,
+                payload=orjson.loads(row.payload),
+                created_at=row.created_at,
+                attempts=row.attempts,
+            )
+            try:
+                _dispatch(event)
+            except Exception as exc:
+                logger.warning(f"Outbox event {row.id} ({row.topic}) failed: {exc!r}")
+                OUTBOX_DISPATCH_FAILURES.labels(topic=row.topic).inc()
+                row.attempts += 1
+                row.last_error = repr(exc)[:500]
+                row.available_at = datetime.utcnow() + _backoff(row.attempts)
+            else:
+                row.dispatched_at = datetime.utcnow()
+                OUTBOX_EVENTS_DISPATCHED.labels(topic=row.topic).inc()
+                OUTBOX_DELIVERY_LAG.observe((row.dispatched_at - row.created_at).total_seconds())
+            session.add(row)
+        session.commit()
+
+        oldest = session.exec(
+            select(func.min(OutboxEvent.created_at)).where(OutboxEvent.dispatched_at.is_(None))
+        ).one()
+        OUTBOX_PENDING_AGE.set((datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+    return len(rows)
+
+
+async def run_relay(engine: Engine, stop: asyncio.Event) -> None:
+    """Relay until ``stop`` is set, polling when the outbox is drained.
+
+    Batches run in a worker thread, and so do the subscribers.
+    """
+    while not stop.is_set():
+        try:
+            claimed = await asyncio.to_thread(relay_batch, engine)
+        except Exception:
+            logger.exception("Outbox relay batch failed")
+            claimed = 0
+        if claimed < settings.outbox_batch_size:
+            try:
+                await asyncio.wait_for(stop.wait(), settings.outbox_poll_interval_seconds)
+            except TimeoutError:
+                pass
+
+
+def purge_dispatched(session: Session, before: datetime | None = None) -> int:
+    """Delete events delivered before ``before`` (default: the retention window) and count them."""
+    cutoff = before or datetime.utcnow() - timedelta(hours=settings.outbox_retention_hours)
+    result = session.exec(  # type: ignore[call-overload]
+        delete(OutboxEvent).where(OutboxEvent.dispatched_at < cutoff)
+    )
+    session.commit()
+    return result.rowcount
@@ -0,0 +1,121 @@
+"""Payment state changes shared by the Stripe webhook and the reconciliation job."""
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+import stripe
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models import Booking, BookingStatus, PaymentStatus
+from app.services import outbox, stats
+
+logger = get_logger(__name__)
+
+# Checkouts younger than this may still get their webhook
+RECONCILE_AFTER = timedelta(minutes=15)
+# Stripe retries webhooks for three days; older checkouts are no longer polled
+RECONCILE_WINDOW = timedelta(days=3)
+
+
+def mark_paid(session: Session, booking: Booking) -> None:
+    """Confirm a paid booking in the caller's transaction."""
+    before = stats.snapshot(booking)
+    booking.payment_status = PaymentStatus.PAID
+    booking.status = BookingStatus.CONFIRMED
+    session.add(booking)
+    stats.record_change(session, before, stats.snapshot(booking))
+    outbox.emit(session, outbox.BOOKING_PAID, [booking])
+
+
+def _cancel_unpaid(session: Session, booking: Booking) -> None:
+    before = stats.snapshot(booking)
+    booking.status = BookingStatus.CANCELLED
+    session.add(booking)
+    stats.record_change(session, before, stats.snapshot(booking))
+    outbox.emit(session, outbox.BOOKING_CANCELLED, [booking])
+
+
+def _settle(session: Session, change: Callable[[Session, Booking], None], booking: Booking) -> bool:
+    """Apply ``change`` and commit; a lost compare-and-swap counts as already handled."""
+    try:
+        change(session, booking)
+        session.commit()
+    except StaleDataError:
+        session.rollback()
+        return False
+    return True
+
+
+def confirm(session: Session, booking: Booking) -> bool:
+    """Mark ``booking`` paid and commit; False when a concurrent writer got there first.
+
+    Bookings are versioned, so the write is a compare-and-swap. A lost one is
+    treated as already processed: a booking still unpaid after the concurrent
+    change is picked up again by :func:`reconcile`.
+    """
+    return _settle(session, mark_paid, booking)
+
+
+def abandon(session: Session, booking: Booking) -> bool:
+    """Cancel a booking whose checkout expired unpaid and commit, freeing its slot."""
+    return _settle(session, _cancel_unpaid, booking)
+
+
+def reconcile(engine: Engine, limit: int = 100) -> int:
+    """Settle pending checkouts whose webhook never arrived.
+
+    Paid checkouts confirm their booking and expired ones cancel it; either way
+    the booking leaves PENDING, so later runs move on to newer checkouts.
+    Checkouts older than ``RECONCILE_WINDOW`` are left alone. Each booking is
+    checked and committed on its own, and a Stripe error only skips that one.
+    Returns how many bookings were confirmed; does nothing when payments are
+    disabled.
+    """
+    if not settings.payments_enabled or not settings.stripe_secret_key:
+        return 0
+    stripe.api_key = settings.stripe_secret_key
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        pending = session.exec(
+            select(Booking.id, Booking.stripe_session_id)
+            .where(
+                Booking.status == BookingStatus.PENDING,
+                Booking.payment_status == PaymentStatus.PENDING,
+                Booking.stripe_session_id.is_not(None),
+                Booking.updated_at < now - RECONCILE_AFTER,
+                Booking.updated_at >= now - RECONCILE_WINDOW,
+            )
+            .order_by(Booking.updated_at, Booking.id)
+            .limit(limit)
+        ).all()
+
+    confirmed = cancelled = 0
+    for booking_id, checkout_id in pending:
+        try:
+            checkout = stripe.checkout.Session.retrieve(checkout_id)
+        except Exception as exc:
+            logger.warning(f"Reconciling booking {booking_id} failed: {exc!r}")
+            continue
+        paid = checkout.payment_status == "paid"
+        if not paid and checkout.status != "expired":
+            continue  # still open
+        with Session(engine) as session:
+            booking = session.get(Booking, booking_id)
+            # Settled, cancelled or sent to a new checkout since it was listed
+            if (
+                booking is None
+                or booking.status != BookingStatus.PENDING
+                or booking.payment_status != PaymentStatus.PENDING
+                or booking.stripe_session_id != checkout_id
+            ):
+                continue
+            if paid:
+                confirmed += confirm(session, booking)
+            else:
+                cancelled += abandon(session, booking)
+    if confirmed or cancelled:
+        logger.info(f"Reconciled {confirmed} paid and {cancelled} expired checkouts")
+    return confirmed
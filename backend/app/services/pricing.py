@@ -0,0 +1,197 @@
+"""Court pricing: member tariffs, peak/off-peak windows and duration packages.
+
+Rules are compiled once per court into a dense weekly table of half-hour slot
+prices for each tariff, stored as prefix sums over two consecutive weeks. A
+quote is then two lookups and a subtraction whatever the booking length, with
+partial slots charged pro rata; bookings that run past Sunday midnight read
+into the second week.
+
+Quotes outside the court's opening hours are refused with one mask check on
+its compiled schedule (see :mod:`app.services.schedules`).
+
+Compiled tables live in a TTL cache keyed by court. Court and rule writes call
+:func:`invalidate`, which reaches the other worker processes through the
+invalidation bus (:mod:`app.core.invalidation`); the TTL is the fallback.
+
+Tariffs and duration packages mirror the Node ``pricing.service.ts``: members
+pay ``Court.member_hourly_rate`` while their membership is valid, and 90- and
+120-minute bookings are discounted to the package multipliers.
+"""
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlmodel import Session, or_, select
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Court, MembershipStatus, PricingRule, User
+from app.services import schedules
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+
+class Tariff(str, Enum):
+    STANDARD = "standard"
+    MEMBER = "member"
+
+
+TARIFF_LABELS = {Tariff.STANDARD: "Tariffa standard", Tariff.MEMBER: "Tariffa tesserati"}
+
+# Package price in hours of the hourly rate, by booking length in minutes
+DURATION_PACKAGES = {
+    Tariff.STANDARD: {60: 1.0, 90: 1.3, 120: 2.0},
+    Tariff.MEMBER: {60: 1.0, 90: 1.25, 120: 1.875},
+}
+
+price_tables = TTLCache("pricing", ttl=settings.pricing_cache_ttl_seconds, maxsize=1024)
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    """Compiled prices of one court: per tariff, prefix sums of slot prices over two weeks."""
+
+    court_id: int
+    hourly_rates: dict[Tariff, float]
+    slot_prices: dict[Tariff, np.ndarray]
+    prefix: dict[Tariff, np.ndarray]
+
+    def _cost_until(self, tariff: Tariff, minute: int) -> float:
+        slot, offset = divmod(minute, SLOT_MINUTES)
+        cost = self.prefix[tariff][slot]
+        if offset:
+            cost += self.slot_prices[tariff][slot] * offset / SLOT_MINUTES
+        return float(cost)
+
+    def price(self, tariff: Tariff, start: datetime, end: datetime) -> float:
+        """Sum of the slot prices covered by ``[start, end)`` (at most one week)."""
+        first = start.weekday() * 24 * 60 + start.hour * 60 + start.minute
+        last = first + int((end - start).total_seconds() // 60)
+        return self._cost_until(tariff, last) - self._cost_until(tariff, first)
+
+
+@dataclass(frozen=True)
+class Quote:
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_hours: float
+    hourly_rate: float
+    total_price: float
+    tariff: Tariff
+
+    @property
+    def tariff_label(self) -> str:
+        return TARIFF_LABELS[self.tariff]
+
+
+def weekdays_to_mask(weekdays: Sequence[int]) -> int:
+    return sum(1 << day for day in set(weekdays))
+
+
+def mask_to_weekdays(mask: int) -> list[int]:
+    return [day for day in range(7) if mask >> day & 1]
+
+
+def _rule_order(rule: PricingRule) -> tuple[int, bool, int]:
+    # Applied in this order, so later rules overwrite earlier ones
+    return (rule.priority, rule.court_id is not None, rule.id or 0)
+
+
+def compile_table(court: Court, rules: Sequence[PricingRule]) -> PriceTable:
+    """Build the weekly price table of ``court`` from its active rules."""
+    multipliers = np.ones((7, SLOTS_PER_DAY))
+    for rule in sorted(rules, key=_rule_order):
+        days = mask_to_weekdays(rule.weekday_mask)
+        first, last = rule.start_minute // SLOT_MINUTES, -(-rule.end_minute // SLOT_MINUTES)
+        multipliers[np.ix_(days, range(first, last))] = rule.multiplier
+
+    hourly_rates = {Tariff.STANDARD: court.hourly_rate}
+    if court.member_hourly_rate and court.member_hourly_rate > 0:
+        hourly_rates[Tariff.MEMBER] = court.member_hourly_rate
+
+    slot_prices: dict[Tariff, np.ndarray] = {}
+    prefix: dict[Tariff, np.ndarray] = {}
+    for tariff, rate in hourly_rates.items():
+        week = (multipliers * rate * SLOT_MINUTES / 60).ravel()
+        slot_prices[tariff] = np.tile(week, 2)
+        prefix[tariff] = np.concatenate(([0.0], np.cumsum(slot_prices[tariff])))
+    return PriceTable(court.id, hourly_rates, slot_prices, prefix)
+
+
+def get_price_table(session: Session, court: Court) -> PriceTable:
+    """Return the cached price table of ``court``, compiling it on a miss."""
+
+    def compute() -> PriceTable:
+        rules = session.exec(
+            select(PricingRule).where(
+                PricingRule.is_active.is_(True),
+                or_(PricingRule.court_id == court.id, PricingRule.court_id.is_(None)),
+            )
+        ).all()
+        return compile_table(court, rules)
+
+    return price_tables.get_or_compute(court.id, compute)
+
+
+def invalidate(court_id: int | None = None) -> None:
+    """Drop the compiled table of one court (every court when None) on every worker."""
+    invalidation.publish(price_tables.name, court_id)
+
+
+def tariff_for(user: User | None, now: datetime | None = None) -> Tariff:
+    """Member tariff while the user's membership is valid, standard otherwise."""
+    if user is None or user.membership_status != MembershipStatus.MEMBER:
+        return Tariff.STANDARD
+    expires = user.membership_expires_at
+    if expires is not None and expires < (now or datetime.utcnow()):
+        return Tariff.STANDARD
+    return Tariff.MEMBER
+
+
+def quote(
+    session: Session, court: Court, start_time: datetime, end_time: datetime, user: User | None
+) -> Quote:
+    """Price a booking of ``court`` for ``user`` (None for anonymous visitors)."""
+    minutes = int((end_time - start_time).total_seconds() // 60)
+    if minutes <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid time range")
+    if minutes > MINUTES_PER_WEEK:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid booking duration"
+        )
+
+    # Opening hours are per day; longer quotes (never booked as such) are only priced
+    if minutes <= 24 * 60 and not schedules.get_schedule(session, court.id).is_open(
+        start_time, end_time
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Court is closed at the selected time"
+        )
+
+    table = get_price_table(session, court)
+    tariff = tariff_for(user)
+    if tariff not in table.hourly_rates:
+        tariff = Tariff.STANDARD
+
+    total = table.price(tariff, start_time, end_time)
+    package = DURATION_PACKAGES[tariff].get(minutes)
+    if package is not None:
+        # Packages discount the slot prices by the same ratio as the flat rate
+        total *= package * 60 / minutes
+
+    return Quote(
+        court_id=court.id,
+        start_time=start_time,
+        end_time=end_time,
+        duration_hours=minutes / 60,
+        hourly_rate=table.hourly_rates[tariff],
+        total_price=round(total, 2),
+        tariff=tariff,
+    )
@@ -0,0 +1,209 @@
+"""Court deactivation: move or cancel its future bookings in one transaction.
+
+Future active bookings of the court are read once. Player bookings are
+relocated to an equivalent court: an active court with the same rates, so the
+price paid still holds, that is open at that time. Admin blocks, and bookings
+for which no equivalent court is free over the whole slot, are cancelled.
+Each move and cancellation is published to the outbox, so players can be told.
+
+The assignment is one greedy pass over the bookings in start order against
+the busy intervals of every candidate court, loaded with a single query and
+kept merged and sorted. Each booking goes to the free court whose previous
+busy interval ends latest before it (best fit), which keeps long gaps open
+for the bookings still to place. Relocations are written with one
+executemany UPDATE and the rest are cancelled with a single UPDATE ...
+RETURNING; the rollup deltas of every change go in one upsert.
+"""
+from bisect import bisect_left, insort
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, update
+from sqlmodel import Session, select
+
+from app.models import Booking, BookingStatus, Court, SlotHold
+from app.services import availability, holds, outbox, schedules, stats
+from app.services.availability import ACTIVE, Window
+
+STATE_COLUMNS = (
+    Booking.id,
+    Booking.court_id,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.status,
+    Booking.payment_status,
+    Booking.is_blocked,
+    Booking.total_price,
+)
+
+
+@dataclass(frozen=True)
+class Relocation:
+    booking_id: int
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+@dataclass
+class DeactivationReport:
+    court_id: int
+    relocated: list[Relocation] = field(default_factory=list)
+    cancelled: list[int] = field(default_factory=list)
+
+
+def equivalent_courts(session: Session, court: Court) -> list[int]:
+    """Other active courts a player could be moved to at the same price."""
+    statement = (
+        select(Court.id)
+        .where(
+            Court.id != court.id,
+            Court.is_active.is_(True),
+            Court.hourly_rate == court.hourly_rate,
+        )
+        .order_by(Court.id)
+    )
+    if court.member_hourly_rate is None:
+        statement = statement.where(Court.member_hourly_rate.is_(None))
+    else:
+        statement = statement.where(Court.member_hourly_rate == court.member_hourly_rate)
+    return list(session.exec(statement).all())
+
+
+def _minutes(value: datetime) -> int:
+    return (value - stats.EPOCH) // timedelta(minutes=1)
+
+
+def _merged(busy: list[Window]) -> list[Window]:
+    merged: list[Window] = []
+    for start, end in busy:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def assign(
+    slots: list[tuple[int, int]],
+    busy: dict[int, list[Window]],
+    courts: list[int],
+    is_open: Callable[[int, int], bool] | None = None,
+) -> list[int | None]:
+    """Pick a court for each ``(start, end)`` slot, in start order; None when none is free.
+
+    ``busy`` holds each court's intervals sorted by start. ``is_open(court, index)``
+    tells whether a court is open for slot ``index``.
+    """
+    timelines = {court: _merged(busy.get(court, [])) for court in courts}
+    chosen: list[int | None] = [None] * len(slots)
+    for index in sorted(range(len(slots)), key=lambda i: slots[i]):
+        start, end = slots[index]
+        fits = []
+        for court in courts:
+            if is_open is not None and not is_open(court, index):
+                continue
+            timeline = timelines[court]
+            position = bisect_left(timeline, (end,))
+            if not position:
+                fits.append((True, 0, court))
+            elif timeline[position - 1][1] <= start:
+                # Intervals are disjoint, so only the one just before the slot can overlap
+                fits.append((False, start - timeline[position - 1][1], court))
+        if fits:
+            _, _, court = min(fits)
+            chosen[index] = court
+            insort(timelines[court], (start, end))
+    return chosen
+
+
+def deactivate(
+    session: Session, court: Court, relocate: bool = True, now: datetime | None = None
+) -> DeactivationReport:
+    """Relocate or cancel the court's future bookings; the caller commits.
+
+    The court itself is left for the caller to mark inactive.
+    """
+    now = now or datetime.utcnow()
+    report = DeactivationReport(court_id=court.id)
+    # Bookings queued for the court and hold grants on it wait for this transaction
+    holds.lock_court(session, court.id)
+    rows = session.exec(
+        select(*STATE_COLUMNS)
+        .where(
+            Booking.court_id == court.id,
+            Booking.status.in_(ACTIVE),
+            Booking.start_time > now,
+        )
+        .order_by(Booking.start_time, Booking.id)
+        .with_for_update()
+    ).all()
+    movable = [row for row in rows if not row.is_blocked]
+
+    candidates = equivalent_courts(session, court) if relocate and movable else []
+    if candidates:
+        # Hold grants and queued batches on the targets wait for this transaction
+        session.exec(select(Court.id).where(Court.id.in_(candidates)).with_for_update()).all()
+        latest = max(row.end_time for row in movable)
+        busy = availability.load_busy(session, candidates, now, latest)
+        slots = [(_minutes(row.start_time), _minutes(row.end_time)) for row in movable]
+        court_schedules = {court: schedules.get_schedule(session, court) for court in candidates}
+
+        def is_open(court: int, index: int) -> bool:
+            row = movable[index]
+            return court_schedules[court].is_open(row.start_time, row.end_time)
+
+        chosen = assign(slots, busy, candidates, is_open)
+        for row, target in zip(movable, chosen, strict=True):
+            if target is not None:
+                report.relocated.append(Relocation(row.id, target, row.start_time, row.end_time))
+
+    changes = []
+    events = []
+    if report.relocated:
+        table = Booking.__table__
+        session.connection().execute(
+            # start_time lets PostgreSQL go straight to the booking's partition
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.start_time == bindparam("b_start"))
+            .values(court_id=bindparam("b_court"), version=table.c.version + 1, updated_at=now),
+            [
+                {"b_id": moved.booking_id, "b_start": moved.start_time, "b_court": moved.court_id}
+                for moved in report.relocated
+            ],
+        )
+        targets = {moved.booking_id: moved.court_id for moved in report.relocated}
+        for row in movable:
+            if row.id in targets:
+                before = stats.BookingState(*row[1:])
+                after = before._replace(court_id=targets[row.id])
+                changes.append((before, after))
+                payload = outbox.booking_payload(row.id, after, previous_court_id=court.id)
+                events.append((outbox.BOOKING_RELOCATED, row.id, payload))
+
+    cancel = (
+        update(Booking)
+        .where(
+            Booking.court_id == court.id,
+            Booking.status.in_(ACTIVE),
+            Booking.start_time > now,
+        )
+        .values(status=BookingStatus.CANCELLED, version=Booking.version + 1, updated_at=now)
+        .returning(*STATE_COLUMNS)
+    )
+    cancelled = session.connection().execute(cancel).all()
+    for row in cancelled:
+        after = stats.BookingState(*row[1:])
+        # PENDING and CONFIRMED contribute alike, so either stands for the old status
+        changes.append((after._replace(status=BookingStatus.CONFIRMED), after))
+        events.append((outbox.BOOKING_CANCELLED, row.id, outbox.booking_payload(row.id, after)))
+    report.cancelled = sorted(row.id for row in cancelled)
+    stats.record_changes(session, changes)
+    outbox.publish(session, events)
+
+    released = session.exec(select(SlotHold.id).where(SlotHold.court_id == court.id)).all()
+    if released:
+        session.exec(delete(SlotHold).where(SlotHold.court_id == court.id))  # type: ignore[call-overload]
+        holds.index.discard(court.id, set(released))
+    return report
@@ -0,0 +1,383 @@
+"""Match reminders and hold-expiry notices, dispatched from an in-memory timer heap.
+
+Rather than polling ``bookings`` every minute, each worker keeps the
+notifications falling due in the next ``reminder_horizon_hours`` in a min-heap
+ordered by due time. The window is loaded with one query per source at startup
+and reloaded hourly. In between, booking events from the outbox and newly
+granted holds keep it current. Rescheduling or cancelling never searches the
+heap: the live entry of each booking or hold is kept in a dict, heap entries
+that no longer match it are dropped when they reach the top, and the heap is
+rebuilt once stale entries outnumber live ones. Scheduling and popping are
+O(log n) and a tick with nothing due is a look at the top, so hundreds of
+thousands of pending reminders cost memory, not time.
+
+Due entries are dispatched in batches. One query per kind re-reads the
+bookings and holds, dropping reminders for bookings that were cancelled or
+moved and notices for holds that were converted, released or replaced. The
+batch is then claimed by inserting its keys into ``notifications`` with
+``ON CONFLICT DO NOTHING``. Only the claimed notifications go to the sender,
+so neither another worker nor this one after a restart sends them again. A
+batch the sender rejects is unclaimed and retried a minute later. A crash
+between claim and send loses that batch: delivery is at most once.
+
+The heap is per worker. Every worker with ``reminders_enabled`` loads the whole
+window, so memory grows with the number of such workers; enabling reminders on
+one or two of them is enough. An outbox event reaches only the worker whose
+relay dispatched it, and a new hold only the worker that granted it. The other
+workers pick those up at their next reload, and the claim keeps the copies from
+sending twice. Expired holds are kept for ``HOLD_NOTICE_GRACE`` (by hold grants
+and by the ``holds.expire`` job), so a notice can still read its hold when it
+falls due; one not dispatched within that grace is dropped.
+"""
+import asyncio
+import heapq
+import threading
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import (
+    NOTIFICATION_DISPATCH_LAG,
+    NOTIFICATION_SEND_FAILURES,
+    NOTIFICATIONS_SENT,
+    REMINDERS_PENDING,
+)
+from app.models import Booking, Notification, SlotHold, User
+from app.services import outbox
+from app.services.availability import ACTIVE
+from app.services.notifications import Message, NotificationSender, get_sender
+
+logger = get_logger(__name__)
+
+BOOKING_REMINDER = "booking_reminder"
+HOLD_EXPIRED = "hold_expired"
+
+RETRY_DELAY = timedelta(minutes=1)
+RELOAD_EVERY = timedelta(hours=1)
+# Expired holds are kept this long for their notice; older ones get none
+HOLD_NOTICE_GRACE = timedelta(minutes=10)
+
+
+class Reminder(NamedTuple):
+    kind: str
+    ref_id: int  # booking or hold id
+    event_at: datetime  # the booking's start or the hold's expiry
+    due_at: datetime
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.ref_id}:{self.event_at:%Y%m%dT%H%M%S}"
+
+
+def booking_reminder(booking_id: int, start_time: datetime) -> Reminder:
+    lead = timedelta(minutes=settings.reminder_lead_minutes)
+    return Reminder(BOOKING_REMINDER, booking_id, start_time, start_time - lead)
+
+
+def hold_notice(hold_id: int, expires_at: datetime) -> Reminder:
+    return Reminder(HOLD_EXPIRED, hold_id, expires_at, expires_at)
+
+
+class ReminderScheduler:
+    """Reminders pending in this process: a min-heap by due time plus the live entry of each."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, str, int]] = []
+        self._live: dict[tuple[str, int], Reminder] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, reminder: Reminder) -> None:
+        self.schedule_many([reminder])
+
+    def schedule_many(self, reminders: Iterable[Reminder]) -> int:
+        """Add or move reminders, replacing any earlier one of the same booking or hold."""
+        with self._lock:
+            entries = []
+            for reminder in reminders:
+                ident = (reminder.kind, reminder.ref_id)
+                if self._live.get(ident) == reminder:
+                    continue
+                self._live[ident] = reminder
+                entries.append((reminder.due_at, reminder.kind, reminder.ref_id))
+            if len(entries) > len(self._heap):
+                # Bulk load: heapify is linear
+                self._heap.extend(entries)
+                heapq.heapify(self._heap)
+            else:
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+            self._compact()
+        return len(entries)
+
+    def cancel(self, kind: str, ref_id: int) -> bool:
+        with self._lock:
+            cancelled = self._live.pop((kind, ref_id), None) is not None
+            self._compact()
+        return cancelled
+
+    def pop_due(self, now: datetime, limit: int) -> list[Reminder]:
+        """Remove and return up to ``limit`` reminders due at ``now``, earliest first."""
+        due: list[Reminder] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < limit:
+                due_at, kind, ref_id = heapq.heappop(self._heap)
+                reminder = self._live.get((kind, ref_id))
+                if reminder is not None and reminder.due_at == due_at:
+                    del self._live[kind, ref_id]
+                    due.append(reminder)
+            REMINDERS_PENDING.set(len(self._live))
+        return due
+
+    def _compact(self) -> None:
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._heap = [
+                (reminder.due_at, kind, ref_id) for (kind, ref_id), reminder in self._live.items()
+            ]
+            heapq.heapify(self._heap)
+        REMINDERS_PENDING.set(len(self._live))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._live.clear()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+
+scheduler = ReminderScheduler()
+
+
+def load(session: Session, into: ReminderScheduler, now: datetime | None = None) -> int:
+    """Schedule what falls due within the horizon; returns how many reminders were new."""
+    now = now or datetime.utcnow()
+    lead = timedelta(minutes=settings.reminder_lead_minutes)
+    until = now + timedelta(hours=settings.reminder_horizon_hours)
+    bookings = session.exec(
+        select(Booking.id, Booking.start_time).where(
+            Booking.status.in_(ACTIVE),
+            Booking.is_blocked.is_(False),
+            Booking.start_time > now,
+            Booking.start_time <= until + lead,
+        )
+    ).all()
+    held = session.exec(
+        select(SlotHold.id, SlotHold.expires_at).where(
+            SlotHold.expires_at > now - HOLD_NOTICE_GRACE, SlotHold.expires_at <= until
+        )
+    ).all()
+    reminders = [booking_reminder(*row) for row in bookings] + [hold_notice(*row) for row in held]
+
+    # Those already due may have gone out before a restart
+    overdue = [reminder.key for reminder in reminders if reminder.due_at <= now]
+    if overdue:
+        sent = set(
+            session.exec(select(Notification.key).where(Notification.key.in_(overdue))).all()
+        )
+        reminders = [reminder for reminder in reminders if reminder.key not in sent]
+    return into.schedule_many(reminders)
+
+
+def _messages(session: Session, due: list[Reminder]) -> list[Message]:
+    """Build the messages of the reminders whose booking or hold is still as scheduled."""
+    messages = []
+    bookings = {reminder.ref_id: reminder for reminder in due if reminder.kind == BOOKING_REMINDER}
+    if bookings:
+        rows = session.exec(
+            select(
+                Booking.id,
+                Booking.court_id,
+                Booking.start_time,
+                Booking.end_time,
+                User.id,
+                User.email,
+                User.full_name,
+            )
+            .join(User, User.id == Booking.user_id)
+            .where(
+                Booking.id.in_(bookings),
+                Booking.start_time.in_({reminder.event_at for reminder in bookings.values()}),
+                Booking.status.in_(ACTIVE),
+                Booking.is_blocked.is_(False),
+            )
+        ).all()
+        for booking_id, court_id, start_time, end_time, user_id, email, full_name in rows:
+            reminder = bookings[booking_id]
+            if start_time == reminder.event_at:
+                data = {
+                    "booking_id": booking_id,
+                    "court_id": court_id,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+                messages.append(
+                    Message(reminder.key, reminder.kind, user_id, email, full_name, data)
+                )
+
+    notices = {reminder.ref_id: reminder for reminder in due if reminder.kind == HOLD_EXPIRED}
+    if notices:
+        rows = session.exec(
+            select(
+                SlotHold.id,
+                SlotHold.court_id,
+                SlotHold.start_time,
+                SlotHold.end_time,
+                SlotHold.expires_at,
+                User.id,
+                User.email,
+                User.full_name,
+            )
+            .join(User, User.id == SlotHold.user_id)
+            .where(SlotHold.id.in_(notices))
+        ).all()
+        # Replaced holds may have left their id to a newer one
+        rows = [row for row in rows if row[4] == notices[row[0]].event_at]
+        booked = set()
+        if rows:
+            # The holder may have booked the slot without converting the hold
+            slots = [(row[5], row[1], row[2]) for row in rows]
+            booked = set(
+                session.exec(
+                    select(Booking.user_id, Booking.court_id, Booking.start_time).where(
+                        tuple_(Booking.user_id, Booking.court_id, Booking.start_time).in_(slots),
+                        Booking.status.in_(ACTIVE),
+                    )
+                ).all()
+            )
+        for hold_id, court_id, start_time, end_time, _, user_id, email, full_name in rows:
+            if (user_id, court_id, start_time) in booked:
+                continue
+            reminder = notices[hold_id]
+            data = {
+                "hold_id": hold_id,
+                "court_id": court_id,
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+            messages.append(Message(reminder.key, reminder.kind, user_id, email, full_name, data))
+    return messages
+
+
+def _claim(session: Session, messages: list[Message], now: datetime) -> list[Message]:
+    """Record the messages as claimed; returns those no one had claimed before."""
+    if not messages:
+        return []
+    dialect = session.get_bind().dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = (
+        insert_fn(Notification)
+        .values(
+            [
+                {
+                    "key": message.key,
+                    "kind": message.kind,
+                    "user_id": message.user_id,
+                    "claimed_at": now,
+                }
+                for message in messages
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["key"])
+        .returning(Notification.key)
+    )
+    claimed = set(session.connection().execute(statement).scalars().all())
+    return [message for message in messages if message.key in claimed]
+
+
+def dispatch_due(
+    engine: Engine,
+    into: ReminderScheduler,
+    sender: NotificationSender,
+    now: datetime | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """Send one batch of due notifications; returns how many reminders were taken off the heap."""
+    now = now or datetime.utcnow()
+    due = into.pop_due(now, batch_size or settings.reminder_batch_size)
+    if not due:
+        return 0
+
+    with Session(engine) as session:
+        claimed = _claim(session, _messages(session, due), now)
+        session.commit()
+        if not claimed:
+            return len(due)
+        keys = [message.key for message in claimed]
+        try:
+            sender.send(claimed)
+        except Exception:
+            logger.exception(f"Sending {len(claimed)} notifications failed; retrying later")
+            NOTIFICATION_SEND_FAILURES.inc()
+            session.exec(delete(Notification).where(Notification.key.in_(keys)))  # type: ignore[call-overload]
+            session.commit()
+            retry = set(keys)
+            into.schedule_many(
+                reminder._replace(due_at=now + RETRY_DELAY)
+                for reminder in due
+                if reminder.key in retry
+            )
+            return len(due)
+        session.exec(  # type: ignore[call-overload]
+            update(Notification).where(Notification.key.in_(keys)).values(sent_at=datetime.utcnow())
+        )
+        session.commit()
+
+    due_at = {reminder.key: reminder.due_at for reminder in due}
+    for message in claimed:
+        NOTIFICATIONS_SENT.labels(kind=message.kind).inc()
+        NOTIFICATION_DISPATCH_LAG.observe((now - due_at[message.key]).total_seconds())
+    return len(due)
+
+
+def on_booking_event(event: outbox.Event) -> None:
+    """Keep a booking's reminder in step with its outbox events."""
+    payload = event.payload
+    start_time = datetime.fromisoformat(payload["start_time"])
+    now = datetime.utcnow()
+    until = now + timedelta(
+        hours=settings.reminder_horizon_hours, minutes=settings.reminder_lead_minutes
+    )
+    if payload["status"] in ACTIVE and not payload["is_blocked"] and now < start_time <= until:
+        scheduler.schedule(booking_reminder(event.aggregate_id, start_time))
+    else:
+        scheduler.cancel(BOOKING_REMINDER, event.aggregate_id)
+
+
+def _reload(engine: Engine) -> int:
+    with Session(engine) as session:
+        return load(session, scheduler)
+
+
+async def run_scheduler(
+    engine: Engine, stop: asyncio.Event, sender: NotificationSender | None = None
+) -> None:
+    """Dispatch due notifications until ``stop`` is set; database work runs in a worker thread."""
+    sender = sender or get_sender()
+    outbox.subscribe(outbox.ALL_TOPICS, on_booking_event)
+    reloaded: datetime | None = None
+    try:
+        while not stop.is_set():
+            try:
+                if reloaded is None or datetime.utcnow() - reloaded >= RELOAD_EVERY:
+                    reloaded = datetime.utcnow()
+                    await asyncio.to_thread(_reload, engine)
+                while (
+                    await asyncio.to_thread(dispatch_due, engine, scheduler, sender)
+                    >= settings.reminder_batch_size
+                ):
+                    pass
+            except Exception:
+                logger.exception("Reminder dispatch failed")
+            try:
+                await asyncio.wait_for(stop.wait(), settings.reminder_tick_seconds)
+            except TimeoutError:
+                pass
+    finally:
+        outbox.unsubscribe(outbox.ALL_TOPICS, on_booking_event)
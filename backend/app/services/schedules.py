@@ -0,0 +1,132 @@
+"""Court opening hours and slot templates, compiled into weekly slot masks.
+
+A court's opening-hours rows are compiled once into one integer per weekday
+whose bit ``i`` is set when the half-hour slot ``i`` is open. Checking that a
+booking falls inside opening hours is then a shift and a mask whatever the
+number of rows, and the open windows of a day are the runs of set bits. The
+slot templates are expanded at the same time into the availability slots of
+each weekday, keeping only those inside opening hours.
+
+Compiled schedules live in a TTL cache keyed by court, like price tables:
+writers call :func:`invalidate`, which the invalidation bus relays to the other
+workers, and the TTL bounds staleness should a message be lost.
+"""
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from sqlmodel import Session, select
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import CourtOpeningHours, CourtSlotTemplate
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+ALL_DAY = (1 << SLOTS_PER_DAY) - 1
+MINUTE = timedelta(minutes=1)
+
+Window = tuple[int, int]  # [start, end) in minutes from midnight
+
+schedules = TTLCache("schedules", ttl=settings.schedule_cache_ttl_seconds, maxsize=1024)
+
+
+def _bits(first: int, last: int) -> int:
+    """Mask of the half-hour slots ``[first, last)``."""
+    return ((1 << (last - first)) - 1) << first
+
+
+def _covers(mask: int, start_minute: int, end_minute: int) -> bool:
+    """Whether every half-hour slot touched by ``[start_minute, end_minute)`` is set in ``mask``."""
+    bits = _bits(start_minute // SLOT_MINUTES, -(-end_minute // SLOT_MINUTES))
+    return mask & bits == bits
+
+
+def _runs(mask: int) -> tuple[Window, ...]:
+    runs = []
+    slot = 0
+    while slot < SLOTS_PER_DAY:
+        if mask >> slot & 1:
+            first = slot
+            while slot < SLOTS_PER_DAY and mask >> slot & 1:
+                slot += 1
+            runs.append((first * SLOT_MINUTES, slot * SLOT_MINUTES))
+        slot += 1
+    return tuple(runs)
+
+
+@dataclass(frozen=True)
+class CourtSchedule:
+    """Compiled opening hours and availability slots of one court, per weekday (Monday 0)."""
+
+    court_id: int
+    open_masks: tuple[int, ...]
+    open_windows: tuple[tuple[Window, ...], ...]
+    slots: tuple[tuple[Window, ...], ...]
+
+    @property
+    def always_open(self) -> bool:
+        return all(mask == ALL_DAY for mask in self.open_masks)
+
+    def is_open(self, start: datetime, end: datetime) -> bool:
+        """Whether the court is open over the whole of ``[start, end)``, which may end at midnight."""
+        midnight = datetime.combine(start.date(), time.min)
+        first = (start - midnight) // MINUTE
+        last = -(-(end - midnight) // MINUTE)
+        if last > 24 * 60 or last <= first:
+            return False
+        return _covers(self.open_masks[start.weekday()], first, last)
+
+
+def compile_schedule(
+    court_id: int,
+    hours: Sequence[CourtOpeningHours],
+    templates: Sequence[CourtSlotTemplate],
+) -> CourtSchedule:
+    """Build the weekly masks and slots of a court; no opening hours means always open."""
+    masks = [0 if hours else ALL_DAY] * 7
+    for row in hours:
+        bits = _bits(row.start_minute // SLOT_MINUTES, -(-row.end_minute // SLOT_MINUTES))
+        for day in range(7):
+            if row.weekday_mask >> day & 1:
+                masks[day] |= bits
+
+    slots = []
+    for day, mask in enumerate(masks):
+        candidates: set[Window] = set()
+        day_templates = [row for row in templates if row.weekday_mask >> day & 1]
+        for row in day_templates:
+            start = row.start_minute
+            while start + row.slot_minutes <= row.end_minute:
+                candidates.add((start, start + row.slot_minutes))
+                start += row.slot_minutes
+        if not day_templates:
+            candidates = {(hour * 60, hour * 60 + 60) for hour in range(24)}
+        slots.append(tuple(sorted(slot for slot in candidates if _covers(mask, *slot))))
+    return CourtSchedule(
+        court_id=court_id,
+        open_masks=tuple(masks),
+        open_windows=tuple(_runs(mask) for mask in masks),
+        slots=tuple(slots),
+    )
+
+
+def get_schedule(session: Session, court_id: int) -> CourtSchedule:
+    """Return the cached schedule of a court, compiling it on a miss."""
+
+    def compute() -> CourtSchedule:
+        hours = session.exec(
+            select(CourtOpeningHours).where(CourtOpeningHours.court_id == court_id)
+        ).all()
+        templates = session.exec(
+            select(CourtSlotTemplate).where(CourtSlotTemplate.court_id == court_id)
+        ).all()
+        return compile_schedule(court_id, hours, templates)
+
+    return schedules.get_or_compute(court_id, compute)
+
+
+def invalidate(court_id: int | None = None) -> None:
+    """Drop the compiled schedule of one court (every court when None) on every worker."""
+    invalidation.publish(schedules.name, court_id)
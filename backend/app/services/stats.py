@@ -0,0 +1,281 @@
+"""Hourly utilization and revenue rollups in ``booking_daily_stats``.
+
+Every booking contributes to the ``(court_id, day, hour)`` buckets it covers:
+minutes of active bookings go to ``booked_minutes`` (or ``blocked_minutes`` for
+admin blocks), paid revenue is spread over those buckets pro rata by minutes,
+and a cancellation counts once in the bucket where the booking started.
+
+Booking writes call :func:`record_change` with the booking state before and
+after the change; the difference is upserted in the same transaction, so the
+rollup never drifts from the rows it summarises. :func:`rebuild` recomputes a
+date range from scratch with vectorized NumPy aggregation. It reads the
+bookings and replaces the range in one transaction that shuts out those
+upserts (a table lock on PostgreSQL, the database write lock on SQLite), so
+every booking write lands either in what it reads or after it commits.
+"""
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import delete, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.db.partitions import start_time_window
+from app.models import Booking, BookingDailyStats, BookingStatus, PaymentStatus
+
+# Statuses that occupy the court (COMPLETED bookings keep their history).
+OCCUPYING = (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.COMPLETED)
+REBUILD_BATCH = 100_000
+UPSERT_BATCH = 1_000
+EPOCH = datetime(1970, 1, 1)
+
+Bucket = tuple[int, date, int]
+Delta = list[float]  # booked, blocked, revenue, cancellations
+
+
+class BookingState(NamedTuple):
+    """The fields of a booking that the rollup depends on."""
+
+    court_id: int
+    start_time: datetime
+    end_time: datetime
+    status: BookingStatus
+    payment_status: PaymentStatus
+    is_blocked: bool
+    total_price: float
+
+
+def snapshot(booking: Booking) -> BookingState:
+    return BookingState(
+        booking.court_id,
+        booking.start_time,
+        booking.end_time,
+        booking.status,
+        booking.payment_status,
+        booking.is_blocked,
+        booking.total_price,
+    )
+
+
+def _contribution(state: BookingState, sign: int, into: dict[Bucket, Delta]) -> None:
+    if state.status == BookingStatus.CANCELLED:
+        start = state.start_time
+        into[(state.court_id, start.date(), start.hour)][3] += sign
+        return
+    if state.status not in OCCUPYING or state.end_time <= state.start_time:
+        return
+
+    duration = (state.end_time - state.start_time).total_seconds() / 60
+    paid = state.payment_status == PaymentStatus.PAID
+    cursor = state.start_time
+    while cursor < state.end_time:
+        bucket_end = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        minutes = (min(bucket_end, state.end_time) - cursor).total_seconds() / 60
+        delta = into[(state.court_id, cursor.date(), cursor.hour)]
+        delta[1 if state.is_blocked else 0] += sign * minutes
+        if paid:
+            delta[2] += sign * state.total_price * minutes / duration
+        cursor = bucket_end
+
+
+def _upsert(session: Session, deltas: dict[Bucket, Delta]) -> None:
+    rows = [
+        {
+            "court_id": court_id,
+            "day": day,
+            "hour": hour,
+            "booked_minutes": round(delta[0]),
+            "blocked_minutes": round(delta[1]),
+            "paid_revenue": delta[2],
+            "cancellations": round(delta[3]),
+        }
+        for (court_id, day, hour), delta in deltas.items()
+        if any(delta)
+    ]
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    table = BookingDailyStats.__table__
+    # Multi-row VALUES, chunked to stay under the bound-parameter limit
+    for start in range(0, len(rows), UPSERT_BATCH):
+        statement = insert_fn(BookingDailyStats).values(rows[start : start + UPSERT_BATCH])
+        statement = statement.on_conflict_do_update(
+            index_elements=["court_id", "day", "hour"],
+            set_={
+                column: table.c[column] + statement.excluded[column]
+                for column in ("booked_minutes", "blocked_minutes", "paid_revenue", "cancellations")
+            },
+        )
+        session.exec(statement)  # type: ignore[call-overload]
+
+
+def record_change(
+    session: Session, before: BookingState | None, after: BookingState | None
+) -> None:
+    """Apply the rollup delta of one booking write inside the caller's transaction."""
+    record_changes(session, [(before, after)])
+
+
+def record_changes(
+    session: Session, changes: Iterable[tuple[BookingState | None, BookingState | None]]
+) -> None:
+    """Apply the summed rollup delta of many booking writes with a single upsert."""
+    deltas: dict[Bucket, Delta] = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            _contribution(before, -1, deltas)
+        if after is not None:
+            _contribution(after, 1, deltas)
+    _upsert(session, deltas)
+
+
+def _aggregate(
+    court_id: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    occupying: np.ndarray,
+    blocked: np.ndarray,
+    paid: np.ndarray,
+    cancelled: np.ndarray,
+    price: np.ndarray,
+    window: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Explode bookings (minutes since epoch) into hour buckets and sum them.
+
+    Returns ``(keys, values)`` where ``keys`` is ``court_id << 32 | epoch_hour``
+    and ``values`` has columns booked, blocked, revenue, cancellations.
+    """
+    duration = np.maximum(end - start, 1)
+    first_hour = start // 60
+    last_hour = np.where(occupying, (end - 1) // 60, first_hour)
+    spans = last_hour - first_hour + 1
+
+    owner = np.repeat(np.arange(len(start)), spans)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(spans) - spans, spans)
+    hour = first_hour[owner] + offsets
+
+    overlap = np.minimum(end[owner], (hour + 1) * 60) - np.maximum(start[owner], hour * 60)
+    overlap = np.where(occupying[owner], np.maximum(overlap, 0), 0)
+    values = np.column_stack(
+        [
+            np.where(blocked[owner], 0, overlap),
+            np.where(blocked[owner], overlap, 0),
+            np.where(paid[owner], price[owner] * overlap / duration[owner], 0.0),
+            (cancelled[owner] & (offsets == 0)).astype(np.float64),
+        ]
+    ).astype(np.float64)
+
+    in_window = (hour >= window[0]) & (hour < window[1])
+    keys = (court_id[owner][in_window] << 32) | hour[in_window]
+    values = values[in_window]
+
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.zeros((len(unique_keys), 4))
+    np.add.at(sums, inverse, values)
+    return unique_keys, sums
+
+
+def epoch_minutes(values: Sequence[datetime]) -> np.ndarray:
+    """Convert naive UTC datetimes to int64 minutes since 1970-01-01."""
+    # Plain timedelta arithmetic is ~3x faster than NumPy's datetime64 object parsing
+    minute = timedelta(minutes=1)
+    return np.fromiter(((v - EPOCH) // minute for v in values), np.int64, count=len(values))
+
+
+def rebuild(engine: Engine, date_from: date, date_to: date) -> int:
+    """Recompute the rollup for ``[date_from, date_to)`` and return the bucket count."""
+    window_start = datetime.combine(date_from, time.min)
+    window_end = datetime.combine(date_to, time.min)
+    window = (
+        int((window_start - EPOCH).total_seconds()) // 3600,
+        int((window_end - EPOCH).total_seconds()) // 3600,
+    )
+    statement = select(
+        Booking.court_id,
+        Booking.start_time,
+        Booking.end_time,
+        Booking.status,
+        Booking.payment_status,
+        Booking.is_blocked,
+        Booking.total_price,
+    ).where(start_time_window(window_start, window_end), Booking.end_time > window_start)
+
+    with engine.begin() as conn:
+        # Upserts take ROW EXCLUSIVE, which this mode conflicts with; plain reads go on
+        if conn.dialect.name == "postgresql":
+            table = BookingDailyStats.__tablename__
+            conn.execute(text(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+        # First, so that on SQLite the transaction holds the write lock before it reads
+        conn.execute(
+            delete(BookingDailyStats).where(
+                BookingDailyStats.day >= date_from, BookingDailyStats.day < date_to
+            )
+        )
+
+        partial_keys: list[np.ndarray] = []
+        partial_sums: list[np.ndarray] = []
+        result = conn.execute(
+            statement.execution_options(stream_results=True, yield_per=REBUILD_BATCH)
+        )
+        for rows in result.partitions():
+            columns = list(zip(*rows, strict=True))
+            status = np.array([s.value for s in columns[3]])
+            keys, sums = _aggregate(
+                court_id=np.array(columns[0], dtype=np.int64),
+                start=epoch_minutes(columns[1]),
+                end=epoch_minutes(columns[2]),
+                occupying=np.isin(status, [s.value for s in OCCUPYING]),
+                blocked=np.array(columns[5], dtype=bool),
+                paid=np.array([p == PaymentStatus.PAID for p in columns[4]], dtype=bool),
+                cancelled=status == BookingStatus.CANCELLED.value,
+                price=np.array(columns[6], dtype=np.float64),
+                window=window,
+            )
+            partial_keys.append(keys)
+            partial_sums.append(sums)
+
+        rows = _bucket_rows(partial_keys, partial_sums)
+        for start in range(0, len(rows), REBUILD_BATCH):
+            conn.execute(insert(BookingDailyStats), rows[start : start + REBUILD_BATCH])
+    return len(rows)
+
+
+def _bucket_rows(partial_keys: list[np.ndarray], partial_sums: list[np.ndarray]) -> list[dict]:
+    """Merge per-batch aggregates into ``booking_daily_stats`` rows."""
+    if partial_keys:
+        keys, inverse = np.unique(np.concatenate(partial_keys), return_inverse=True)
+        sums = np.zeros((len(keys), 4))
+        np.add.at(sums, inverse, np.concatenate(partial_sums))
+    else:
+        keys, sums = np.empty(0, dtype=np.int64), np.empty((0, 4))
+
+    epoch_hours = keys & 0xFFFFFFFF
+    days = (np.datetime64(EPOCH.date(), "D") + epoch_hours // 24).astype(object)
+    counts = np.rint(sums[:, [0, 1, 3]]).astype(np.int64)
+    return [
+        {
+            "court_id": court_id,
+            "day": day,
+            "hour": hour,
+            "booked_minutes": booked,
+            "blocked_minutes": blocked,
+            "paid_revenue": revenue,
+            "cancellations": cancellations,
+        }
+        for court_id, day, hour, (booked, blocked, cancellations), revenue in zip(
+            (keys >> 32).tolist(),
+            days.tolist(),
+            (epoch_hours % 24).tolist(),
+            counts.tolist(),
+            sums[:, 2].tolist(),
+            strict=True,
+        )
+    ]
@@ -0,0 +1,219 @@
+"""Per-(court, day) write queue for booking rushes.
+
+When a new week of slots opens, thousands of ``POST /api/bookings`` calls
+target the same few court-days. Each one runs its own conflict query and
+transaction, and most of them lose. With ``settings.booking_write_queue``
+enabled, a request that passes validation is queued under its court and day
+instead. The first request of a key becomes the leader: it waits
+``booking_write_queue_window_ms`` for contenders to join. It then resolves
+the whole batch in arrival order against one snapshot of the day's bookings
+and holds, and inserts the winners in one transaction. Losers get the usual
+409 from their own request, with conflicts and alternatives computed from one
+read of the day (:func:`availability.load_day`) shared by the whole batch.
+
+Queues are per process. A batch takes the row lock on its court
+(:func:`holds.lock_court`) before the snapshot is read. Hold grants, direct
+creations, blocks and booking moves take the same lock whether or not the
+queue is enabled, so a batch never sees a court another replica or another
+writer is still changing, and replicas may run with different settings.
+
+The batches of a key are drained by a task of their own rather than by the
+request that opened the key, so a client disconnecting does not strand the
+requests queued behind it. The batch itself runs in a worker thread, off the
+event loop.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.metrics import (
+    BOOKINGS_CREATED,
+    HOLDS_CONVERTED,
+    WRITE_QUEUE_BATCH_DURATION,
+    WRITE_QUEUE_BATCH_SIZE,
+)
+from app.db.partitions import start_time_window
+from app.models import Booking, SlotHold
+from app.services import availability, holds, idempotency, outbox, stats
+from app.services.availability import ACTIVE, ConflictReport
+
+Key = tuple[int, date]  # court id, day of the booking start
+
+
+@dataclass
+class _Request:
+    booking: Booking
+    hold_id: int | None
+    claim: idempotency.Claim | None
+    future: asyncio.Future
+
+
+def _fail(requests: list[_Request], exc: BaseException) -> None:
+    """Fail the requests still waiting; those whose client went away are skipped."""
+    for request in requests:
+        if not request.future.done():
+            request.future.set_exception(exc)
+
+
+def _overlaps(start: datetime, end: datetime, intervals: list[tuple[datetime, datetime]]) -> bool:
+    return any(other_start < end and other_end > start for other_start, other_end in intervals)
+
+
+def resolve(
+    engine: Engine, court_id: int, day: date, batch: list[_Request]
+) -> list[ConflictReport | None]:
+    """Insert the bookings of ``batch`` that fit, in order, in one transaction.
+
+    Returns ``None`` for each request that won and the conflict report of each
+    one that lost. Winning bookings are left loaded and detached, ready to be
+    serialised.
+    """
+    lower = min(request.booking.start_time for request in batch)
+    upper = max(request.booking.end_time for request in batch)
+    now = datetime.utcnow()
+    with Session(engine, expire_on_commit=False) as session:
+        holds.lock_court(session, court_id)
+        taken = list(
+            session.exec(
+                select(Booking.start_time, Booking.end_time).where(
+                    Booking.court_id == court_id,
+                    Booking.status.in_(ACTIVE),
+                    start_time_window(lower, upper),
+                    Booking.end_time > lower,
+                )
+            ).all()
+        )
+        held = session.exec(
+            select(SlotHold.id, SlotHold.user_id, SlotHold.start_time, SlotHold.end_time).where(
+                SlotHold.court_id == court_id,
+                SlotHold.start_time < upper,
+                SlotHold.end_time > lower,
+                SlotHold.expires_at > now,
+            )
+        ).all()
+
+        won = []
+        winners = []
+        converted = []
+        for request in batch:
+            booking = request.booking
+            start, end = booking.start_time, booking.end_time
+            others = [(s, e) for _, user_id, s, e in held if user_id != booking.user_id]
+            if _overlaps(start, end, taken) or _overlaps(start, end, others):
+                won.append(False)
+                continue
+            won.append(True)
+            taken.append((start, end))
+            converted.extend(
+                hold_id
+                for hold_id, user_id, s, e in held
+                if hold_id == request.hold_id
+                and user_id == booking.user_id
+                and (s, e) == (start, end)
+            )
+            session.add(booking)
+            winners.append(booking)
+            stats.record_change(session, None, stats.snapshot(booking))
+
+        if converted:
+            session.exec(delete(SlotHold).where(SlotHold.id.in_(converted)))  # type: ignore[call-overload]
+        outbox.emit(session, outbox.BOOKING_CREATED, winners)
+        for request, result in zip(batch, won, strict=True):
+            if result:
+                idempotency.record(session, request.claim, request.booking)
+        session.commit()
+
+        # After the commit, so the court lock is not held while the reports are built
+        reports: list[ConflictReport | None] = [None] * len(batch)
+        if not all(won):
+            snapshot = availability.load_day(session, court_id, day)
+            for position, (request, result) in enumerate(zip(batch, won, strict=True)):
+                if not result:
+                    booking = request.booking
+                    reports[position] = availability.conflict_report(
+                        session,
+                        court_id,
+                        booking.start_time,
+                        booking.end_time,
+                        holder_id=booking.user_id,
+                        now=now,
+                        snapshot=snapshot,
+                    )
+
+    if converted:
+        holds.index.discard(court_id, set(converted))
+        HOLDS_CONVERTED.inc(len(converted))
+    BOOKINGS_CREATED.labels(kind="booking").inc(sum(won))
+    return reports
+
+
+class BookingWriteQueue:
+    """Batches of pending bookings per (court, day), each key drained by one task."""
+
+    def __init__(self) -> None:
+        self._pending: dict[Key, list[_Request]] = {}
+        self._drainers: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        engine: Engine,
+        booking: Booking,
+        hold_id: int | None = None,
+        claim: idempotency.Claim | None = None,
+    ) -> ConflictReport | None:
+        """Queue ``booking`` behind its court-day and wait; ``None`` once it is inserted.
+
+        A booking that lost to an earlier one gets its conflict report instead.
+
+        The response of ``claim`` is recorded in the transaction that inserts the booking.
+        """
+        key = (booking.court_id, booking.start_time.date())
+        request = _Request(booking, hold_id, claim, asyncio.get_running_loop().create_future())
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            waiting.append(request)
+        else:
+            self._pending[key] = [request]
+            drainer = asyncio.create_task(self._drain_key(engine, key))
+            self._drainers.add(drainer)
+            drainer.add_done_callback(self._drainers.discard)
+        return await request.future
+
+    async def _drain_key(self, engine: Engine, key: Key) -> None:
+        try:
+            await asyncio.sleep(settings.booking_write_queue_window_ms / 1000)
+            while self._pending[key]:
+                batch = self._pending[key][: settings.booking_write_queue_max_batch]
+                del self._pending[key][: len(batch)]
+                await self._drain(engine, key, batch)
+        finally:
+            _fail(self._pending.pop(key), RuntimeError("booking write queue stopped"))
+
+    async def _drain(self, engine: Engine, key: Key, batch: list[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            reports = await asyncio.to_thread(resolve, engine, key[0], key[1], batch)
+        except Exception as exc:
+            _fail(batch, exc)
+            return
+        except BaseException:
+            _fail(batch, RuntimeError("booking write queue stopped"))
+            raise
+        finally:
+            WRITE_QUEUE_BATCH_SIZE.observe(len(batch))
+            WRITE_QUEUE_BATCH_DURATION.observe(time.perf_counter() - started)
+        for request, report in zip(batch, reports, strict=True):
+            if not request.future.done():
+                request.future.set_result(report)
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in self._pending.values())
+
+
+queue = BookingWriteQueue()
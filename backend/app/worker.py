@@ -0,0 +1,52 @@
+"""Background job worker: ``python -m app.worker [--queues maintenance,payments]``.
+
+Runs the jobs of :mod:`app.services.jobs` until SIGINT or SIGTERM, letting the
+running ones finish. Start as many as needed; they share the work through the
+database.
+"""
+import argparse
+import signal
+import threading
+
+from sqlmodel import create_engine
+
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description=__doc__)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    parser.add_argument(
+        "--queues", help="Comma-separated queues to serve (default: every registered queue)"
+    )
+    parser.add_argument(
+        "--threads", type=int, help="Jobs run at once (default: JOB_WORKER_THREADS)"
+    )
+    parser.add_argument("--burst", action="store_true", help="Exit once no job is left to claim")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    setup_logging()
+
+    from app.services import maintenance  # noqa: F401  (registers the built-in tasks)
+    from app.services.jobs import Worker
+
+    engine = create_engine(args.database_url or settings.database_url)
+    queues = [queue.strip() for queue in args.queues.split(",")] if args.queues else None
+    worker = Worker(engine, queues=queues, threads=args.threads)
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    logger.info(f"Job worker {worker.worker_id} serving {', '.join(worker.queues)}")
+    worker.run(stop, burst=args.burst)
+    logger.info(f"Job worker {worker.worker_id} stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Performance benchmarks for the booking hot paths (``python -m benchmarks.run``)."""
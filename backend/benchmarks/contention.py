@@ -0,0 +1,248 @@
+"""Slot-release rush harness: many players racing for the same court-hours.
+
+Drives ``POST /api/bookings`` (players) and ``POST /api/bookings/block``
+(admin) with a fixed concurrency against a running app, reports throughput,
+latency percentiles and the status-code mix, then checks the one invariant
+that matters: no two active bookings on a court overlap.
+
+Usage (against a database filled by ``python -m app.cli generate-data``)::
+
+    python -m benchmarks.contention --base-url http://localhost:8000 \\
+        --requests 2000 --concurrency 200 --slots 4 --block-ratio 0.05
+
+With ``--in-process`` the app runs inside the harness (ASGI transport, the
+database of ``DATABASE_URL``) and ``--write-queue off|on|both`` picks the
+booking write path; ``both`` rushes a fresh day with each and prints the two
+reports side by side::
+
+    python -m benchmarks.contention --in-process --write-queue both \\
+        --requests 2000 --concurrency 200 --slots 4
+
+Exits with status 1 when a double booking is found.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import create_engine, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.synthetic import SYNTHETIC_DOMAIN, SYNTHETIC_PASSWORD
+from app.models import Booking, BookingStatus
+
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+
+@dataclass
+class RushConfig:
+    court_id: int
+    first_slot: datetime
+    requests: int = 1_000
+    concurrency: int = 100
+    slots: int = 1
+    slot_minutes: int = 60
+    block_ratio: float = 0.0
+
+
+@dataclass
+class RushReport:
+    elapsed: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+    latencies_ms: list[float] = field(default_factory=list)
+    overlaps: list[tuple[int, int]] = field(default_factory=list)
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+    def as_dict(self) -> dict[str, Any]:
+        total = sum(self.statuses.values())
+        return {
+            "requests": total,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(self.percentile(50), 2),
+                "p90": round(self.percentile(90), 2),
+                "p99": round(self.percentile(99), 2),
+                "max": round(max(self.latencies_ms, default=0.0), 2),
+            },
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "double_bookings": len(self.overlaps),
+        }
+
+
+def find_double_bookings(session: Session, court_id: int | None = None) -> list[tuple[int, int]]:
+    """Return ``(id, id)`` pairs of active bookings that overlap on the same court."""
+    other = aliased(Booking)
+    statement = (
+        select(Booking.id, other.id)
+        .join(
+            other,
+            (other.court_id == Booking.court_id)
+            & (other.id > Booking.id)
+            & (other.start_time < Booking.end_time)
+            & (Booking.start_time < other.end_time),
+        )
+        .where(Booking.status.in_(ACTIVE_STATUSES), other.status.in_(ACTIVE_STATUSES))
+    )
+    if court_id is not None:
+        statement = statement.where(Booking.court_id == court_id)
+    return [tuple(row) for row in session.exec(statement).all()]
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        "/api/auth/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_rush(
+    client: httpx.AsyncClient,
+    config: RushConfig,
+    player_credentials: list[tuple[str, str]],
+    admin_credentials: tuple[str, str] | None = None,
+) -> RushReport:
+    """Fire ``config.requests`` booking attempts with bounded concurrency."""
+    players = await asyncio.gather(
+        *(_login(client, email, password) for email, password in player_credentials)
+    )
+    admin = await _login(client, *admin_credentials) if admin_credentials else None
+
+    report = RushReport()
+    semaphore = asyncio.Semaphore(config.concurrency)
+    block_every = round(1 / config.block_ratio) if config.block_ratio > 0 and admin else 0
+
+    async def attempt(index: int) -> None:
+        start = config.first_slot + timedelta(minutes=config.slot_minutes * (index % config.slots))
+        body = {
+            "court_id": config.court_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=config.slot_minutes)).isoformat(),
+        }
+        if block_every and index % block_every == 0:
+            path, token = "/api/bookings/block", admin
+        else:
+            path, token = "/api/bookings/", players[index % len(players)]
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                response = await client.post(
+                    path, json=body, headers={"Authorization": f"Bearer {token}"}
+                )
+                status_code: int | str = response.status_code
+            except httpx.HTTPError as exc:
+                status_code = type(exc).__name__
+            report.latencies_ms.append((time.perf_counter() - sent) * 1000)
+            report.statuses[status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(attempt(i) for i in range(config.requests)))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _next_free_day(engine: Engine, court_id: int) -> datetime:
+    """Pick a future evening after the court's last booking so the rush starts clean."""
+    with Session(engine) as session:
+        last = session.exec(
+            select(func.max(Booking.end_time)).where(Booking.court_id == court_id)
+        ).one()
+    day = max(last or datetime.utcnow(), datetime.utcnow()) + timedelta(days=1)
+    return day.replace(hour=19, minute=0, second=0, microsecond=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", help="Used for the double-booking check")
+    parser.add_argument("--court-id", type=int, default=1)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First contended slot")
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=1, help="Distinct slots being fought over")
+    parser.add_argument("--slot-minutes", type=int, default=60)
+    parser.add_argument("--block-ratio", type=float, default=0.0)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--admin-email", default=f"admin@{SYNTHETIC_DOMAIN}")
+    parser.add_argument("--password", default=SYNTHETIC_PASSWORD)
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON")
+    parser.add_argument(
+        "--in-process", action="store_true", help="Serve the app from this process (ASGI)"
+    )
+    parser.add_argument(
+        "--write-queue",
+        choices=("off", "on", "both"),
+        help="Booking write path to rush (requires --in-process)",
+    )
+    args = parser.parse_args()
+    if args.write_queue and not args.in_process:
+        parser.error("--write-queue requires --in-process")
+
+    engine = create_engine(
+        settings.database_url if args.in_process else args.database_url or settings.database_url
+    )
+    players = [(f"player{i}@{SYNTHETIC_DOMAIN}", args.password) for i in range(args.players)]
+    admin = (args.admin_email, args.password) if args.block_ratio > 0 else None
+    modes = ["off", "on"] if args.write_queue == "both" else [args.write_queue]
+    first_slot = args.start or _next_free_day(engine, args.court_id)
+
+    async def _run(config: RushConfig) -> RushReport:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        transport = None
+        if args.in_process:
+            from app.main import app
+
+            transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            base_url=args.base_url, limits=limits, timeout=30.0, transport=transport
+        ) as client:
+            return await run_rush(client, config, players, admin)
+
+    summaries = {}
+    overlaps = []
+    for day, mode in enumerate(modes):
+        if mode is not None:
+            settings.booking_write_queue = mode == "on"
+        config = RushConfig(
+            court_id=args.court_id,
+            first_slot=first_slot + timedelta(days=day),
+            requests=args.requests,
+            concurrency=args.concurrency,
+            slots=args.slots,
+            slot_minutes=args.slot_minutes,
+            block_ratio=args.block_ratio,
+        )
+        report = asyncio.run(_run(config))
+        with Session(engine) as session:
+            report.overlaps = find_double_bookings(session, args.court_id)
+        summaries[mode or "server"] = report.as_dict()
+        overlaps = report.overlaps
+
+    summary = summaries if len(summaries) > 1 else next(iter(summaries.values()))
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2) + "\n")
+    if overlaps:
+        print(f"✗ {len(overlaps)} overlapping booking pairs: {overlaps[:10]}")
+        sys.exit(1)
+    print("✓ No overlapping active bookings")
+
+
+if __name__ == "__main__":
+    main()
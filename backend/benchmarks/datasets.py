@@ -0,0 +1,53 @@
+"""Seeded booking datasets for the benchmarks, built with ``app.db.synthetic``."""
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+
+from app.db.synthetic import GeneratorConfig, generate
+
+
+@dataclass
+class Dataset:
+    engine: Engine
+    bookings: int
+    courts: int
+    first_day: date
+    last_day: date
+
+    @property
+    def middle_day(self) -> datetime:
+        middle = self.first_day + (self.last_day - self.first_day) / 2
+        return datetime.combine(middle, datetime.min.time())
+
+
+def build_dataset(
+    bookings: int,
+    *,
+    courts: int = 20,
+    users: int = 1_000,
+    seed: int = 42,
+    database_url: str | None = None,
+) -> Dataset:
+    """Create a fresh database holding ``bookings`` rows (SQLite temp file by default)."""
+    if database_url is None:
+        path = Path(tempfile.mkdtemp(prefix="padel-bench-")) / f"bookings_{bookings}.db"
+        database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    result = generate(
+        engine,
+        GeneratorConfig(courts=courts, users=users, bookings=bookings, seed=seed),
+    )
+    return Dataset(
+        engine=engine,
+        bookings=result.bookings,
+        courts=result.courts,
+        first_day=result.first_day,
+        last_day=result.last_day,
+    )
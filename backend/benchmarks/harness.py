@@ -0,0 +1,28 @@
+"""Minimal timing harness: repeat a callable and summarise per-call latency."""
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def measure(func: Callable[[], Any], *, repeat: int = 20, number: int = 50) -> dict[str, float]:
+    """Time ``repeat`` rounds of ``number`` calls and return per-call statistics (µs)."""
+    func()  # warm caches, compiled statements and lazy imports
+    per_call: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter_ns() - start) / number / 1000)
+
+    per_call.sort()
+    p95_index = min(len(per_call) - 1, round(0.95 * (len(per_call) - 1)))
+    median = statistics.median(per_call)
+    return {
+        "min_us": round(per_call[0], 3),
+        "median_us": round(median, 3),
+        "p95_us": round(per_call[p95_index], 3),
+        "mean_us": round(statistics.fmean(per_call), 3),
+        "ops_per_sec": round(1_000_000 / median, 1) if median else 0.0,
+        "calls": repeat * number,
+    }
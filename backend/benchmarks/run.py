@@ -0,0 +1,194 @@
+"""Run the booking hot-path benchmarks and store the results as JSON.
+
+Usage::
+
+    python -m benchmarks.run --sizes 1000,10000,100000,1000000
+    python -m benchmarks.run --compare benchmarks/results/a1b2c3d.json benchmarks/results/e4f5a6b.json
+
+Each run writes ``benchmarks/results/<git sha>.json``; ``--compare`` prints the
+median ratio per case so regressions between two commits stand out.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from collections.abc import Callable
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Any
+
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+
+from app.api.bookings import check_court_availability, validate_booking_window
+from app.api.courts import get_court_availability
+from app.core.security import create_access_token, decode_access_token
+from app.core.serialization import projected_rows, rows_response
+from app.models import Booking, BookingStatus, Court
+from app.schemas import BookingCreate, BookingResponse
+from app.services import analytics, availability
+from benchmarks.datasets import Dataset, build_dataset
+from benchmarks.harness import measure
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Case = Callable[[], Any]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_cases(dataset: Dataset, session: Session) -> dict[str, Case]:
+    """Return the benchmark callables for one seeded dataset."""
+    day = dataset.middle_day
+    # Probe the first confirmed booking after the middle of the generated history
+    busy = session.exec(
+        select(Booking)
+        .where(Booking.start_time >= day, Booking.status == BookingStatus.CONFIRMED)
+        .order_by(Booking.start_time)
+        .limit(1)
+    ).one()
+    court_id = busy.court_id
+    busy_start = busy.start_time
+    free_start = datetime.combine(day.date(), time(3, 0))  # before opening hours
+    loop = asyncio.new_event_loop()
+
+    token = create_access_token({"sub": "1", "email": "bench1@example.com", "role": "user"})
+    page_statement = select(Booking).order_by(Booking.start_time.desc()).limit(100)
+    page = session.exec(page_statement).all()
+    page_adapter = TypeAdapter(list[BookingResponse])
+    payload = {
+        "court_id": court_id,
+        "start_time": busy_start.isoformat(),
+        "end_time": (busy_start + timedelta(minutes=90)).isoformat(),
+        "notes": "Benchmark booking",
+    }
+
+    def serialize_page(rows: list[Booking] = page) -> bytes:
+        # Mirrors FastAPI's response_model path: validate from attributes, dump, encode
+        models = page_adapter.validate_python(rows, from_attributes=True)
+        content = page_adapter.dump_python(models, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def list_page_orm() -> bytes:
+        session.expunge_all()  # every request starts with an empty identity map
+        return serialize_page(list(session.exec(page_statement).all()))
+
+    # Analytics work on preloaded arrays; loading is a single range query
+    courts = list(session.exec(select(Court.id).order_by(Court.id)).all())
+    history_from, history_to = dataset.first_day, dataset.last_day
+    intervals = analytics.load_intervals(session, history_from, history_to, courts)
+
+    def list_page_fast() -> bytes:
+        rows = projected_rows(session, page_statement, Booking, BookingResponse)
+        return rows_response(rows, BookingResponse).body
+
+    return {
+        "check_court_availability.conflict": lambda: check_court_availability(
+            session, court_id, busy_start, busy_start + timedelta(hours=1)
+        ),
+        "check_court_availability.free": lambda: check_court_availability(
+            session, court_id, free_start, free_start + timedelta(hours=1)
+        ),
+        "validate_booking_window": lambda: validate_booking_window(
+            busy_start, busy_start + timedelta(minutes=90)
+        ),
+        "get_court_availability": lambda: loop.run_until_complete(
+            get_court_availability(court_id, busy_start.date(), session)
+        ),
+        "create_access_token": lambda: create_access_token(
+            {"sub": "1", "email": "bench1@example.com", "role": "user"}
+        ),
+        "decode_access_token": lambda: decode_access_token(token),
+        "BookingResponse.page_100": serialize_page,
+        "list_bookings.page_100.orm": list_page_orm,
+        "list_bookings.page_100.fast": list_page_fast,
+        "BookingCreate.validate": lambda: BookingCreate.model_validate(payload),
+        "analytics.heatmap": lambda: analytics.occupancy_heatmap(
+            intervals, courts, history_from, history_to
+        ),
+        "analytics.forecast": lambda: analytics.forecast_demand(
+            analytics.daily_minutes(intervals, courts, history_from, history_to), 28
+        ),
+        "slot_search.30_days": lambda: availability.search(
+            session, 90, day, day + timedelta(days=30), (18 * 60, 22 * 60)
+        ),
+    }
+
+
+def run(sizes: list[int], repeat: int, number: int, database_url: str | None) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "revision": _git_revision(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "number": number,
+        "results": {},
+    }
+    for size in sizes:
+        print(f"Seeding {size:,} bookings...", file=sys.stderr)
+        dataset = build_dataset(size, database_url=database_url)
+        size_results: dict[str, Any] = {}
+        with Session(dataset.engine) as session:
+            for name, case in build_cases(dataset, session).items():
+                size_results[name] = measure(case, repeat=repeat, number=number)
+                print(
+                    f"  {name:<38} median {size_results[name]['median_us']:>10.1f} µs",
+                    file=sys.stderr,
+                )
+        dataset.engine.dispose()
+        report["results"][str(size)] = size_results
+    return report
+
+
+def compare(baseline_path: Path, candidate_path: Path) -> None:
+    """Print candidate/baseline median ratios for every shared case."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    candidate = json.loads(candidate_path.read_text())["results"]
+    print(f"{'size':>9}  {'case':<38} {'base µs':>10} {'new µs':>10} {'ratio':>7}")
+    for size, cases in candidate.items():
+        for name, stats in cases.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = stats["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+            flag = "  <-- slower" if ratio > 1.1 else ""
+            print(
+                f"{size:>9}  {name:<38} {base['median_us']:>10.1f} "
+                f"{stats['median_us']:>10.1f} {ratio:>7.2f}{flag}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--database-url", help="Benchmark against this database (it is wiped)")
+    parser.add_argument("--output", type=Path, help="Defaults to benchmarks/results/<sha>.json")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASELINE", "CANDIDATE"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.repeat, args.number, args.database_url)
+    output = args.output or RESULTS_DIR / f"{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
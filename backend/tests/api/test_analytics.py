@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.analytics import analytics_cache
+from app.models import Booking, BookingStatus, PaymentStatus
+
+
+def test_heatmap_and_forecast_are_manager_only_and_cached(
+    client: TestClient,
+    session: Session,
+    test_user,
+    player_token: str,
+    admin_token: str,
+    sample_court,
+):
+    analytics_cache.invalidate()
+    last_monday = date.today() - timedelta(days=date.today().weekday() + 7)
+    start = datetime.combine(last_monday, datetime.min.time()).replace(hour=18)
+    session.add(
+        Booking(
+            user_id=test_user.id,
+            court_id=sample_court.id,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            status=BookingStatus.CONFIRMED,
+            payment_status=PaymentStatus.PAID,
+            total_price=25.0,
+        )
+    )
+    session.commit()
+    params = {"from": last_monday.isoformat(), "to": (last_monday + timedelta(days=7)).isoformat()}
+
+    forbidden = client.get(
+        "/api/analytics/heatmap", params=params, headers={"Authorization": f"Bearer {player_token}"}
+    )
+    assert forbidden.status_code == 403
+
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    heatmap = client.get("/api/analytics/heatmap", params=params, headers=admin).json()
+    assert heatmap["slot_minutes"] == 30
+    occupancy = heatmap["courts"][0]["occupancy"]
+    assert occupancy[0][36] == occupancy[0][37] == 1.0
+    assert sum(map(sum, occupancy)) == 2.0
+
+    # Served from the cache until it expires or is invalidated
+    session.add(
+        Booking(
+            user_id=test_user.id,
+            court_id=sample_court.id,
+            start_time=start + timedelta(days=1),
+            end_time=start + timedelta(days=1, hours=1),
+            status=BookingStatus.CONFIRMED,
+            total_price=25.0,
+        )
+    )
+    session.commit()
+    assert client.get("/api/analytics/heatmap", params=params, headers=admin).json() == heatmap
+    analytics_cache.invalidate()
+    refreshed = client.get("/api/analytics/heatmap", params=params, headers=admin).json()
+    assert sum(map(sum, refreshed["courts"][0]["occupancy"])) == 4.0
+
+    forecast = client.get("/api/analytics/forecast", params={"weeks": 2}, headers=admin).json()
+    days = forecast["courts"][0]["days"]
+    assert len(days) == 14
+    assert days[0]["day"] == date.today().isoformat()
+    assert any(day["expected_minutes"] > 0 for day in days)
+
+    missing = client.get("/api/analytics/forecast", params={"court_id": 999}, headers=admin)
+    assert missing.status_code == 404
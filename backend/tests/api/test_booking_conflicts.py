@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Booking, BookingStatus, Court, SlotHold, User
+from app.services import availability
+
+DAY = datetime(2030, 1, 10)
+
+
+def _at(hour: float) -> datetime:
+    return DAY + timedelta(hours=hour)
+
+
+def _book(session: Session, court_id: int, start: float, end: float) -> Booking:
+    booking = Booking(user_id=1, court_id=court_id, start_time=_at(start), end_time=_at(end),
+                      status=BookingStatus.CONFIRMED)  # fmt: skip
+    session.add(booking)
+    session.commit()
+    return booking
+
+
+def _slots(body: dict) -> list[tuple[int, str, str]]:
+    return [
+        (slot["court_id"], slot["start_time"][11:16], slot["end_time"][11:16])
+        for slot in body["alternatives"]
+    ]
+
+
+def test_create_conflict_lists_intervals_and_closest_alternatives(
+    client: TestClient, session: Session, player_token: str, sample_court
+):
+    second = Court(name="Campo 2", hourly_rate=25.0)
+    third = Court(name="Campo 3", hourly_rate=25.0)
+    session.add_all([second, third])
+    session.commit()
+    _book(session, sample_court.id, 18, 19)
+    _book(session, second.id, 18, 20)
+
+    response = client.post(
+        "/api/bookings",
+        json={"court_id": sample_court.id, "start_time": _at(18).isoformat(),
+              "end_time": _at(19).isoformat()},
+        headers={"Authorization": f"Bearer {player_token}"},
+    )  # fmt: skip
+
+    assert response.status_code == 409
+    body = response.json()
+    assert body["detail"] == "Court is not available for the selected time slot"
+    assert body["conflicts"] == [
+        {"start_time": _at(18).isoformat(), "end_time": _at(19).isoformat()}
+    ]
+    assert _slots(body) == [
+        (third.id, "18:00", "19:00"),
+        (sample_court.id, "17:00", "18:00"),
+        (sample_court.id, "19:00", "20:00"),
+        (second.id, "17:00", "18:00"),
+        (second.id, "20:00", "21:00"),
+    ]
+
+
+def test_update_conflict_ignores_the_booking_being_moved(
+    client: TestClient, session: Session, admin_token: str, sample_court
+):
+    moved = _book(session, sample_court.id, 10, 11)
+    _book(session, sample_court.id, 12, 13)
+
+    response = client.patch(
+        f"/api/bookings/{moved.id}",
+        json={"start_time": _at(12.5).isoformat(), "end_time": _at(13.5).isoformat()},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.status_code == 409
+    body = response.json()
+    assert [c["start_time"][11:16] for c in body["conflicts"]] == ["12:00"]
+    # The moved booking's own 10:00-11:00 slot is free for it
+    assert (sample_court.id, "11:00", "12:00") in _slots(body)
+    assert (sample_court.id, "13:00", "14:00") == _slots(body)[0]
+
+
+def test_block_conflict_has_the_same_body(client: TestClient, session: Session, admin_token: str, sample_court):
+    _book(session, sample_court.id, 8, 9)
+
+    response = client.post(
+        "/api/bookings/block",
+        json={"court_id": sample_court.id, "start_time": _at(8).isoformat(),
+              "end_time": _at(10).isoformat()},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )  # fmt: skip
+
+    assert response.status_code == 409
+    assert _slots(response.json())[0] == (sample_court.id, "09:00", "11:00")
+
+
+def test_queued_create_conflict_has_the_same_body_from_one_read_of_the_day(
+    client: TestClient, session: Session, player_token: str, sample_court, monkeypatch
+):
+    second = Court(name="Campo 2", hourly_rate=25.0)
+    other = User(email="other@example.com", full_name="Other", hashed_password="x")
+    session.add_all([second, other])
+    session.commit()
+    player = session.exec(select(User).where(User.email == "player@example.com")).one()
+    _book(session, sample_court.id, 18, 19)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    # Another player's hold is in the way; the requester's own hold is not
+    for user_id, start in ((other.id, 17), (player.id, 19)):
+        session.add(SlotHold(court_id=sample_court.id, user_id=user_id, start_time=_at(start),
+                             end_time=_at(start + 1), expires_at=expires_at))  # fmt: skip
+    session.commit()
+
+    def post():
+        return client.post(
+            "/api/bookings",
+            json={"court_id": sample_court.id, "start_time": _at(18).isoformat(),
+                  "end_time": _at(19).isoformat()},
+            headers={"Authorization": f"Bearer {player_token}"},
+        )  # fmt: skip
+
+    direct = post()
+    monkeypatch.setattr(settings, "booking_write_queue", True)
+    monkeypatch.setattr(settings, "booking_write_queue_window_ms", 1.0)
+    load_day = availability.load_day
+    days = []
+
+    def counting_load_day(db, court_id, day):
+        days.append((court_id, day))
+        return load_day(db, court_id, day)
+
+    def no_per_request_query(*args, **kwargs):
+        raise AssertionError("the queued conflict report must reuse the batch's read")
+
+    monkeypatch.setattr(availability, "load_day", counting_load_day)
+    monkeypatch.setattr(availability, "load_busy", no_per_request_query)
+    queued = post()
+
+    assert direct.status_code == queued.status_code == 409
+    assert queued.json() == direct.json()
+    assert (sample_court.id, "19:00", "20:00") in _slots(direct.json())
+    assert (sample_court.id, "17:00", "18:00") not in _slots(direct.json())
+    assert days == [(sample_court.id, DAY.date())]
@@ -0,0 +1,75 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Booking, BookingStatus, Court
+
+
+@pytest.fixture(name="history")
+def history_fixture(session: Session, admin_user, sample_court):
+    other = Court(name="Other Court", hourly_rate=10.0)
+    session.add(other)
+    session.commit()
+    start = datetime(2030, 3, 1, 9, 0)
+    session.add_all(
+        [
+            Booking(
+                user_id=admin_user.id,
+                court_id=sample_court.id if i % 2 == 0 else other.id,
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=1),
+                status=BookingStatus.CONFIRMED,
+                total_price=25.0,
+                notes='Quoted "note", with comma' if i == 0 else None,
+            )
+            for i in range(6)
+        ]
+    )
+    session.commit()
+    return other
+
+
+def test_export_csv_filters_by_range_and_court(
+    client: TestClient, admin_token: str, sample_court, history
+):
+    response = client.get(
+        "/api/bookings/export",
+        params={"format": "csv", "from": "2030-03-01T00:00:00", "to": "2030-03-05T00:00:00",
+                "court_id": sample_court.id},
+        headers={"Authorization": f"Bearer {admin_token}", "Accept-Encoding": "identity"},
+    )  # fmt: skip
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "content-encoding" not in response.headers
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["start_time"] for row in rows] == ["2030-03-01T09:00:00", "2030-03-03T09:00:00"]
+    assert rows[0]["notes"] == 'Quoted "note", with comma'
+    assert rows[0]["status"] == "confirmed"
+
+
+def test_export_ndjson_gzip(client: TestClient, admin_token: str, history):
+    headers = {"Authorization": f"Bearer {admin_token}", "Accept-Encoding": "gzip"}
+    with client.stream("GET", "/api/bookings/export?format=ndjson", headers=headers) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    lines = gzip.decompress(raw).decode().strip().split("\n")
+    assert len(lines) == 6
+    first = json.loads(lines[0])
+    assert first["start_time"] == "2030-03-01T09:00:00"
+    assert first["status"] == "confirmed"
+
+
+def test_player_cannot_export(client: TestClient, player_token: str):
+    response = client.get(
+        "/api/bookings/export", headers={"Authorization": f"Bearer {player_token}"}
+    )
+    assert response.status_code == 403
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Court
+
+
+def _create_booking(client: TestClient, token: str, court_id: int) -> dict:
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = start.replace(hour=10)
+    response = client.post(
+        "/api/bookings",
+        json={
+            "court_id": court_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return response.json()
+
+
+def test_booking_patch_with_stale_if_match_is_rejected(
+    client: TestClient, player_token: str, sample_court
+):
+    headers = {"Authorization": f"Bearer {player_token}"}
+    booking = _create_booking(client, player_token, sample_court.id)
+
+    fetched = client.get(f"/api/bookings/{booking['id']}", headers=headers)
+    etag = fetched.headers["ETag"]
+    assert etag == '"1"'
+
+    first = client.patch(
+        f"/api/bookings/{booking['id']}",
+        json={"notes": "First editor"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"2"'
+    assert first.json()["version"] == 2
+
+    second = client.patch(
+        f"/api/bookings/{booking['id']}",
+        json={"notes": "Second editor"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert second.status_code == 412
+    assert client.get(f"/api/bookings/{booking['id']}", headers=headers).json()["notes"] == (
+        "First editor"
+    )
+
+
+def test_court_patch_loses_compare_and_swap_to_concurrent_writer(
+    client: TestClient, session: Session, admin_token: str, sample_court, monkeypatch
+):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = client.get(f"/api/courts/{sample_court.id}").headers["ETag"]
+    assert (
+        client.patch(
+            f"/api/courts/{sample_court.id}",
+            json={"hourly_rate": 30.0},
+            headers={**headers, "If-Match": etag},
+        ).headers["ETag"]
+        == '"2"'
+    )
+    assert (
+        client.patch(
+            f"/api/courts/{sample_court.id}",
+            json={"hourly_rate": 35.0},
+            headers={**headers, "If-Match": "*"},
+        ).status_code
+        == 200
+    )
+
+    # Another writer commits between the handler's read and its UPDATE
+    from app.api import courts
+
+    original = courts.check_if_match
+
+    def interleave(if_match, version):
+        original(if_match, version)
+        with Session(session.get_bind()) as other:
+            court = other.get(Court, sample_court.id)
+            court.description = "Concurrent edit"
+            other.add(court)
+            other.commit()
+
+    monkeypatch.setattr(courts, "check_if_match", interleave)
+    lost = client.patch(
+        f"/api/courts/{sample_court.id}", json={"hourly_rate": 40.0}, headers=headers
+    )
+    assert lost.status_code == 412
+    monkeypatch.undo()
+
+    court = client.get(f"/api/courts/{sample_court.id}").json()
+    assert court["hourly_rate"] == 35.0
+    assert court["description"] == "Concurrent edit"
+    assert court["version"] == 4
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models import Booking, BookingDailyStats, BookingStatus, Court
+from app.services import stats
+from app.services.relocation import assign
+
+DAY = datetime(2030, 1, 10)
+
+
+def _book(session: Session, court_id: int, start: float, end: float, **fields) -> Booking:
+    booking = Booking(
+        user_id=1,
+        court_id=court_id,
+        start_time=DAY + timedelta(hours=start),
+        end_time=DAY + timedelta(hours=end),
+        status=fields.pop("status", BookingStatus.CONFIRMED),
+        **fields,
+    )
+    session.add(booking)
+    stats.record_change(session, None, stats.snapshot(booking))
+    session.commit()
+    return booking
+
+
+def test_assign_prefers_the_tightest_free_court():
+    busy = {1: [(0, 60)], 2: [(0, 90)], 3: []}
+    # In start order each slot takes the court it leaves no gap on; court 3 stays empty
+    assert assign([(120, 180), (60, 120), (90, 150)], busy, [1, 2, 3]) == [1, 1, 2]
+    assert assign([(0, 30)], {1: [(0, 30), (20, 40)]}, [1]) == [None]
+
+
+def test_delete_court_relocates_future_bookings_and_cancels_the_rest(
+    client: TestClient, session: Session, admin_token: str, sample_court
+):
+    twin = Court(name="Gemello", hourly_rate=25.0)
+    pricier = Court(name="Centrale", hourly_rate=40.0)
+    session.add_all([twin, pricier])
+    session.commit()
+    _book(session, twin.id, 18, 19)
+    movable = _book(session, sample_court.id, 10, 11)
+    stuck = _book(session, sample_court.id, 18, 19)
+    block = _book(session, sample_court.id, 20, 22, is_blocked=True)
+    past = _book(session, sample_court.id, -24 * 365 * 10, -24 * 365 * 10 + 1)
+    cancelled = _book(session, sample_court.id, 12, 13, status=BookingStatus.CANCELLED)
+
+    response = client.delete(
+        f"/api/courts/{sample_court.id}", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(moved["booking_id"], moved["court_id"]) for moved in body["relocated"]] == [
+        (movable.id, twin.id)
+    ]
+    assert body["cancelled"] == sorted([stuck.id, block.id])
+
+    session.expire_all()
+    assert session.get(Court, sample_court.id).is_active is False
+    assert session.get(Booking, movable.id).court_id == twin.id
+    assert session.get(Booking, movable.id).version == 2
+    assert session.get(Booking, stuck.id).status == BookingStatus.CANCELLED
+    assert session.get(Booking, past.id).status == BookingStatus.CONFIRMED
+    assert session.get(Booking, cancelled.id).version == 1
+
+    # The rollup moved the relocated hour and counted the cancellations
+    rows = session.exec(select(BookingDailyStats).where(BookingDailyStats.day == DAY.date())).all()
+    by_bucket = {(row.court_id, row.hour): row for row in rows}
+    assert by_bucket[(twin.id, 10)].booked_minutes == 60
+    assert by_bucket[(sample_court.id, 10)].booked_minutes == 0
+    assert by_bucket[(sample_court.id, 18)].cancellations == 1
+
+
+def test_delete_court_without_relocation_cancels_everything(
+    client: TestClient, session: Session, admin_token: str, sample_court
+):
+    session.add(Court(name="Gemello", hourly_rate=25.0))
+    session.commit()
+    booking = _book(session, sample_court.id, 10, 11)
+
+    response = client.delete(
+        f"/api/courts/{sample_court.id}",
+        params={"relocate": False},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.json() == {
+        "court_id": sample_court.id,
+        "relocated": [],
+        "cancelled": [booking.id],
+    }
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Court
+from app.services import schedules
+
+MONDAY = datetime(2030, 1, 7)
+# Open 08:00-12:00 and 13:00-23:00 (maintenance at lunch); 90-minute slots on Mondays
+SCHEDULE = {
+    "opening_hours": [
+        {"start_minute": 8 * 60, "end_minute": 12 * 60},
+        {"start_minute": 13 * 60, "end_minute": 23 * 60},
+    ],
+    "slot_templates": [
+        {"weekdays": [0], "start_minute": 8 * 60, "end_minute": 23 * 60, "slot_minutes": 90}
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_schedule_cache():
+    schedules.invalidate()
+    yield
+    schedules.invalidate()
+
+
+def _at(hour: float) -> str:
+    return (MONDAY + timedelta(hours=hour)).isoformat()
+
+
+def _set_schedule(client: TestClient, court_id: int, admin_token: str) -> dict:
+    response = client.put(
+        f"/api/courts/{court_id}/schedule",
+        json=SCHEDULE,
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_schedule_round_trip_and_availability_grid(
+    client: TestClient, admin_token: str, sample_court
+):
+    body = _set_schedule(client, sample_court.id, admin_token)
+    assert body["opening_hours"][0] == {
+        "weekdays": [0, 1, 2, 3, 4, 5, 6], "start_minute": 480, "end_minute": 720
+    }  # fmt: skip
+    assert client.get(f"/api/courts/{sample_court.id}/schedule").json() == body
+
+    monday = client.get(
+        f"/api/courts/{sample_court.id}/availability", params={"date": "2030-01-07"}
+    ).json()
+    # 11:00-12:30 would cross the lunch gap and is left out
+    assert monday["free_hours"][:3] == ["08:00-09:30", "09:30-11:00", "14:00-15:30"]
+    assert monday["free_hours"][-1] == "21:30-23:00"
+    tuesday = client.get(
+        f"/api/courts/{sample_court.id}/availability", params={"date": "2030-01-08"}
+    ).json()
+    assert tuesday["free_hours"][0] == "08:00-09:00" and len(tuesday["free_hours"]) == 14
+
+
+def test_bookings_and_quotes_outside_opening_hours_are_rejected(
+    client: TestClient, session: Session, admin_token: str, player_token: str, sample_court
+):
+    _set_schedule(client, sample_court.id, admin_token)
+    player = {"Authorization": f"Bearer {player_token}"}
+
+    def book(start: float, end: float) -> int:
+        json = {"court_id": sample_court.id, "start_time": _at(start), "end_time": _at(end)}
+        return client.post("/api/bookings", json=json, headers=player).status_code
+
+    assert book(7, 8) == 400
+    assert book(11.5, 12.5) == 400
+    assert book(22.5, 24) == 400
+    assert book(13, 14) == 201
+
+    quote = client.get(
+        "/api/pricing/quote",
+        params={"court_id": sample_court.id, "start": _at(12), "end": _at(13)},
+    )
+    assert quote.status_code == 400
+    assert quote.json()["detail"] == "Court is closed at the selected time"
+
+
+def test_search_only_returns_open_time(
+    client: TestClient, session: Session, admin_token: str, sample_court
+):
+    other = Court(name="Sempre aperto", hourly_rate=25.0)
+    session.add(other)
+    session.commit()
+    _set_schedule(client, sample_court.id, admin_token)
+
+    response = client.get(
+        "/api/courts/search",
+        params={"duration": 60, "earliest": _at(6), "latest": _at(14), "limit": 5},
+    )
+
+    slots = [
+        (slot["court_id"], slot["start_time"][11:16], slot["free_until"][11:16])
+        for slot in response.json()["slots"]
+    ]
+    assert slots == [
+        (other.id, "06:00", "14:00"),
+        (sample_court.id, "08:00", "12:00"),
+        (sample_court.id, "13:00", "14:00"),
+    ]
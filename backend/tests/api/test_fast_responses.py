@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Booking, BookingStatus, Court, PaymentStatus
+
+
+@pytest.fixture(name="populated")
+def populated_fixture(session: Session, admin_user, sample_court):
+    start = datetime(2030, 5, 4, 18, 0)
+    session.add(Court(name="Campo Città", description="Coperto — “indoor”", hourly_rate=0.1 + 0.2))
+    session.add_all(
+        [
+            Booking(
+                user_id=admin_user.id,
+                court_id=sample_court.id,
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i, minutes=90),
+                status=BookingStatus.CONFIRMED if i % 2 else BookingStatus.PENDING,
+                payment_status=PaymentStatus.PAID if i % 2 else PaymentStatus.PENDING,
+                total_price=37.5 * i,
+                notes=None if i % 3 else f'Nota "{i}" è\nok',
+                stripe_session_id=f"cs_{i}" if i % 2 else None,
+                created_at=datetime(2030, 1, 1, 12, 0, 0, 1000 * i),
+            )
+            for i in range(5)
+        ]
+    )
+    session.commit()
+
+
+@pytest.mark.parametrize("path", ["/api/bookings/", "/api/courts/?active_only=false", "/api/users/"])
+def test_fast_list_responses_are_byte_identical(
+    client: TestClient, admin_token: str, populated, monkeypatch: pytest.MonkeyPatch, path: str
+):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    standard = client.get(path, headers=headers)
+    monkeypatch.setattr(settings, "fast_list_responses", True)
+    fast = client.get(path, headers=headers)
+
+    assert standard.status_code == fast.status_code == 200
+    assert fast.content == standard.content
+    assert fast.headers["content-type"] == standard.headers["content-type"]
+
+
+def test_fast_path_falls_back_for_exponent_floats(
+    client: TestClient, session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    session.add(Court(name="Huge", hourly_rate=1e17))
+    session.commit()
+
+    standard = client.get("/api/courts/")
+    monkeypatch.setattr(settings, "fast_list_responses", True)
+    fast = client.get("/api/courts/")
+
+    assert fast.content == standard.content
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Booking, IdempotencyKey
+from app.services import idempotency
+
+
+def _booking_body(court_id: int, hour: int) -> dict:
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = start.replace(hour=hour)
+    return {
+        "court_id": court_id,
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(hours=1)).isoformat(),
+    }
+
+
+def test_retried_booking_replays_first_response(
+    client: TestClient, session: Session, player_token: str, sample_court
+):
+    headers = {"Authorization": f"Bearer {player_token}", "Idempotency-Key": "retry-1"}
+    body = _booking_body(sample_court.id, 10)
+
+    first = client.post("/api/bookings", json=body, headers=headers)
+    second = client.post("/api/bookings", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.content == first.content
+    assert second.headers[idempotency.REPLAY_HEADER] == "true"
+    assert len(session.exec(select(Booking)).all()) == 1
+
+    reused = client.post("/api/bookings", json=_booking_body(sample_court.id, 12), headers=headers)
+    assert reused.status_code == 422
+
+
+def test_failed_request_releases_key(
+    client: TestClient, session: Session, player_token: str, sample_court
+):
+    headers = {"Authorization": f"Bearer {player_token}", "Idempotency-Key": "retry-2"}
+    missing = client.post("/api/bookings", json=_booking_body(999, 10), headers=headers)
+    assert missing.status_code == 404
+    assert session.exec(select(IdempotencyKey)).all() == []
+
+    body = _booking_body(sample_court.id, 10)
+    retried = client.post("/api/bookings", json=body, headers=headers)
+    assert retried.status_code == 201
+
+
+@patch("app.api.payments.stripe.checkout.Session.create")
+def test_retried_checkout_does_not_call_stripe_again(
+    mocked_create, client: TestClient, player_token: str, sample_court
+):
+    mocked_create.return_value = type(
+        "CheckoutSession", (), {"id": "cs_test_1", "url": "https://stripe.test/checkout"}
+    )()
+    auth = {"Authorization": f"Bearer {player_token}"}
+    booking = client.post("/api/bookings", json=_booking_body(sample_court.id, 15), headers=auth)
+
+    headers = {**auth, "Idempotency-Key": "checkout-1"}
+    payload = {"booking_id": booking.json()["id"]}
+    first = client.post("/api/payments/create-checkout-session", json=payload, headers=headers)
+    second = client.post("/api/payments/create-checkout-session", json=payload, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert mocked_create.call_count == 1
+
+
+def test_concurrent_retry_waits_for_first_request(session: Session, test_user):
+    digest = "a" * 64
+    session.add(
+        IdempotencyKey(
+            key="in-flight",
+            user_id=test_user.id,
+            scope="bookings.create",
+            request_hash=digest,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+        )
+    )
+    session.commit()
+
+    async def scenario():
+        waiter = asyncio.create_task(
+            idempotency.claim(session, test_user.id, "bookings.create", "in-flight", digest)
+        )
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+        response = type("Stored", (), {"status_code": 201, "body": b'{"id":7}'})()
+        idempotency.complete(session, test_user.id, "bookings.create", "in-flight", response)
+        return await asyncio.wait_for(waiter, timeout=2)
+
+    replay = asyncio.run(scenario())
+    assert replay.status_code == 201
+    assert replay.body == b'{"id":7}'
+
+
+def test_purge_expired_keys(session: Session, test_user):
+    now = datetime.utcnow()
+    for key, expires_at in (("old", now - timedelta(minutes=1)), ("fresh", now + timedelta(hours=1))):
+        session.add(
+            IdempotencyKey(
+                key=key,
+                user_id=test_user.id,
+                scope="bookings.create",
+                request_hash="b" * 64,
+                expires_at=expires_at,
+            )
+        )
+    session.commit()
+
+    assert idempotency.purge_expired(session) == 1
+    assert [row.key for row in session.exec(select(IdempotencyKey)).all()] == ["fresh"]
+
+
+def test_response_is_stored_with_the_booking_it_describes(
+    client: TestClient, session: Session, player_token: str, sample_court, monkeypatch
+):
+    class Crash:
+        def labels(self, **labels):
+            raise RuntimeError("worker died after commit")
+
+    headers = {"Authorization": f"Bearer {player_token}", "Idempotency-Key": "crash-1"}
+    body = _booking_body(sample_court.id, 16)
+    monkeypatch.setattr("app.api.bookings.BOOKINGS_CREATED", Crash())
+    with pytest.raises(RuntimeError):
+        client.post("/api/bookings", json=body, headers=headers)
+    monkeypatch.undo()
+
+    # Even a retry that takes the stale claim over must not book again
+    stored = session.exec(select(IdempotencyKey)).one()
+    stored.created_at -= idempotency.STALE_AFTER * 2
+    session.add(stored)
+    session.commit()
+    retried = client.post("/api/bookings", json=body, headers=headers)
+
+    assert retried.status_code == 201
+    assert retried.headers[idempotency.REPLAY_HEADER] == "true"
+    [booking] = session.exec(select(Booking)).all()
+    assert retried.json()["id"] == booking.id
+
+
+def test_write_queue_stores_the_response_in_the_batch_transaction(
+    client: TestClient, session: Session, player_token: str, sample_court, monkeypatch
+):
+    monkeypatch.setattr(settings, "booking_write_queue", True)
+    monkeypatch.setattr(settings, "booking_write_queue_window_ms", 1.0)
+    headers = {"Authorization": f"Bearer {player_token}", "Idempotency-Key": "queued-1"}
+    body = _booking_body(sample_court.id, 17)
+
+    first = client.post("/api/bookings", json=body, headers=headers)
+    second = client.post("/api/bookings", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.content == first.content
+    stored = session.exec(select(IdempotencyKey)).one()
+    assert (stored.status_code, stored.response_body) == (201, first.text)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+
+def _future_time(hours: int) -> datetime:
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return now + timedelta(days=1, hours=hours)
+
+
+def test_metrics_endpoint_exposes_route_templates(client: TestClient):
+    client.get("/api/health")
+    client.get("/api/courts/999")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/api/health",status="200"' in body
+    assert 'route="/api/courts/{court_id}",status="404"' in body
+    assert "http_requests_in_progress" in body
+
+
+def test_metrics_collapse_unknown_methods(client: TestClient):
+    client.request("BREW", "/api/health")
+
+    body = client.get("/metrics").text
+
+    assert 'method="BREW"' not in body
+    assert 'http_requests_in_progress{method="other"}' in body
+    assert 'method="other",route="/api/health",status="405"' in body
+
+
+def test_metrics_count_bookings_and_conflicts(client: TestClient, player_token: str, sample_court):
+    payload = {
+        "court_id": sample_court.id,
+        "start_time": _future_time(1).isoformat(),
+        "end_time": _future_time(2).isoformat(),
+    }
+    headers = {"Authorization": f"Bearer {player_token}"}
+
+    def sample(name: str) -> float:
+        for line in client.get("/metrics").text.splitlines():
+            if line.startswith(name):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    created_before = sample('bookings_created_total{kind="booking"}')
+    conflicts_before = sample('booking_conflicts_total{operation="create"}')
+
+    assert client.post("/api/bookings", json=payload, headers=headers).status_code == 201
+    assert client.post("/api/bookings", json=payload, headers=headers).status_code == 409
+
+    assert sample('bookings_created_total{kind="booking"}') == created_before + 1
+    assert sample('booking_conflicts_total{operation="create"}') == conflicts_before + 1
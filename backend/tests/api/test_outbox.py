@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import OutboxEvent
+from app.services import outbox
+
+DAY = datetime(2030, 1, 10)
+
+
+@pytest.fixture
+def received():
+    events: list[outbox.Event] = []
+    outbox.subscribe(outbox.ALL_TOPICS, events.append)
+    yield events
+    outbox.unsubscribe(outbox.ALL_TOPICS, events.append)
+
+
+def _book(client: TestClient, court_id: int, token: str, start: int, end: int):
+    return client.post(
+        "/api/bookings",
+        json={
+            "court_id": court_id,
+            "start_time": (DAY + timedelta(hours=start)).isoformat(),
+            "end_time": (DAY + timedelta(hours=end)).isoformat(),
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_booking_changes_are_relayed_once_in_order(
+    client: TestClient, session: Session, player_token: str, auth_token: str, sample_court, received
+):
+    booking_id = _book(client, sample_court.id, player_token, 18, 19).json()["id"]
+    # A rejected write rolls back and leaves no event behind
+    assert _book(client, sample_court.id, auth_token, 18, 19).status_code == 409
+    headers = {"Authorization": f"Bearer {player_token}"}
+    assert client.delete(f"/api/bookings/{booking_id}", headers=headers).status_code == 204
+
+    assert outbox.relay_batch(session.get_bind()) == 2
+    assert [(event.topic, event.aggregate_id) for event in received] == [
+        (outbox.BOOKING_CREATED, booking_id),
+        (outbox.BOOKING_CANCELLED, booking_id),
+    ]
+    assert received[0].payload["status"] == "pending"
+    assert received[1].payload["status"] == "cancelled"
+
+    assert outbox.relay_batch(session.get_bind()) == 0
+    assert len(received) == 2
+    session.expire_all()
+    assert all(row.dispatched_at for row in session.exec(select(OutboxEvent)).all())
+
+
+def test_failed_delivery_is_retried_after_backoff(
+    client: TestClient, session: Session, player_token: str, sample_court, received
+):
+    failures = []
+
+    def flaky(event: outbox.Event) -> None:
+        if not failures:
+            failures.append(event.id)
+            raise RuntimeError("mail server down")
+
+    outbox.subscribe(outbox.ALL_TOPICS, flaky)
+    try:
+        assert _book(client, sample_court.id, player_token, 9, 10).status_code == 201
+        assert outbox.relay_batch(session.get_bind()) == 1
+        session.expire_all()
+        row = session.exec(select(OutboxEvent)).one()
+        assert (row.attempts, row.dispatched_at) == (1, None)
+        assert "mail server down" in row.last_error
+        # Still backing off
+        assert outbox.relay_batch(session.get_bind()) == 0
+
+        session.exec(update(OutboxEvent).values(available_at=datetime.utcnow()))
+        session.commit()
+        assert outbox.relay_batch(session.get_bind()) == 1
+    finally:
+        outbox.unsubscribe(outbox.ALL_TOPICS, flaky)
+
+    # The other subscriber saw the event on both attempts: delivery is at-least-once
+    assert [event.id for event in received] == failures * 2
+    assert received[1].attempts == 1
+    session.expire_all()
+    assert session.exec(select(OutboxEvent)).one().dispatched_at is not None
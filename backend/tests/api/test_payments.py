@@ -2,6 +2,12 @@ from datetime import datetime, timedelta
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Booking, BookingStatus, PaymentStatus
+from app.services import payments
 
 
 def _future_time(hours: int) -> datetime:
@@ -53,3 +59,56 @@ def test_admin_cannot_create_checkout_session(
     )
 
     assert response.status_code == 403
+
+
+def test_webhook_treats_a_lost_version_race_as_processed(
+    client: TestClient, session: Session, player_token: str, sample_court, monkeypatch
+):
+    created = client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _future_time(3).isoformat(),
+            "end_time": _future_time(4).isoformat(),
+        },
+        headers={"Authorization": f"Bearer {player_token}"},
+    )
+    booking_id = created.json()["id"]
+    monkeypatch.setattr(settings, "payments_enabled", True)
+    monkeypatch.setattr(settings, "stripe_webhook_secret", "whsec_test")
+    event = {
+        "type": "checkout.session.completed",
+        "data": {"object": {"metadata": {"booking_id": str(booking_id)}}},
+    }
+    monkeypatch.setattr("app.api.payments.stripe.Webhook.construct_event", lambda **_: event)
+
+    mark_paid = payments.mark_paid
+
+    def concurrent_mark_paid(db: Session, booking: Booking) -> None:
+        # Another request updates the booking between the webhook's read and its commit
+        with Session(session.get_bind()) as other:
+            other.exec(  # type: ignore[call-overload]
+                update(Booking)
+                .where(Booking.id == booking_id)
+                .values(notes="edited", version=Booking.version + 1)
+            )
+            other.commit()
+        mark_paid(db, booking)
+
+    monkeypatch.setattr(payments, "mark_paid", concurrent_mark_paid)
+    response = client.post("/api/payments/webhook", content=b"{}")
+    assert response.status_code == 204
+
+    booking = session.get(Booking, booking_id)
+    session.refresh(booking)
+    assert (booking.notes, booking.payment_status) == ("edited", PaymentStatus.PENDING)
+
+    # Redelivered once the race is over, the event confirms the booking exactly once
+    monkeypatch.setattr(payments, "mark_paid", mark_paid)
+    for _ in range(2):
+        assert client.post("/api/payments/webhook", content=b"{}").status_code == 204
+    session.refresh(booking)
+    assert (booking.status, booking.payment_status) == (
+        BookingStatus.CONFIRMED,
+        PaymentStatus.PAID,
+    )
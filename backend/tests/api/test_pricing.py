@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models import MembershipStatus, User
+from app.services import pricing
+
+
+def _next_weekday(weekday: int, hour: int) -> datetime:
+    today = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    days = (weekday - today.weekday()) % 7 or 7
+    return (today + timedelta(days=days)).replace(hour=hour)
+
+
+def _quote(client: TestClient, court_id: int, start: datetime, minutes: int, headers=None):
+    response = client.get(
+        "/api/pricing/quote",
+        params={
+            "court_id": court_id,
+            "start": start.isoformat(),
+            "end": (start + timedelta(minutes=minutes)).isoformat(),
+        },
+        headers=headers or {},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_quote_applies_peak_rules_packages_and_member_tariff(
+    client: TestClient, session: Session, player_token: str, admin_token: str, sample_court
+):
+    pricing.invalidate()
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    player = {"Authorization": f"Bearer {player_token}"}
+    client.patch(f"/api/courts/{sample_court.id}", json={"member_hourly_rate": 20.0}, headers=admin)
+
+    monday_evening = _next_weekday(0, 17)
+    base = _quote(client, sample_court.id, monday_evening, 60)
+    assert base["total_price"] == 25.0
+    assert base["tariff_type"] == "standard"
+
+    # Weekday evenings from 18:00 cost 40% more; the rule invalidates the cached table
+    rule = client.post(
+        "/api/pricing/rules",
+        json={
+            "name": "Peak",
+            "weekdays": [0, 1, 2, 3, 4],
+            "start_minute": 18 * 60,
+            "end_minute": 22 * 60,
+            "multiplier": 1.4,
+        },
+        headers=admin,
+    )
+    assert rule.status_code == 201
+    assert rule.json()["weekdays"] == [0, 1, 2, 3, 4]
+
+    # 17:00-18:30 spans off-peak and peak slots, then gets the 90-minute package
+    quote = _quote(client, sample_court.id, monday_evening, 90)
+    assert quote["total_price"] == round((25.0 + 12.5 * 1.4) * 1.3 / 1.5, 2)
+    # Partial slot charged pro rata: 17:00-18:15
+    assert _quote(client, sample_court.id, monday_evening, 75)["total_price"] == round(
+        25.0 + 25.0 * 1.4 / 4, 2
+    )
+    # Saturday is untouched by the weekday rule
+    assert _quote(client, sample_court.id, _next_weekday(5, 19), 60)["total_price"] == 25.0
+
+    user = session.exec(select(User).where(User.email == "player@example.com")).one()
+    user.membership_status = MembershipStatus.MEMBER
+    session.add(user)
+    session.commit()
+    member = _quote(client, sample_court.id, monday_evening.replace(hour=19), 120, player)
+    assert member["tariff_type"] == "member"
+    assert member["tariff_label"] == "Tariffa tesserati"
+    assert member["total_price"] == round(20.0 * 1.4 * 1.875, 2)
+
+    # Bookings are charged the quoted price
+    booking = client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": monday_evening.replace(hour=19).isoformat(),
+            "end_time": monday_evening.replace(hour=21).isoformat(),
+        },
+        headers=player,
+    )
+    assert booking.status_code == 201
+    assert booking.json()["total_price"] == member["total_price"]
+
+    deleted = client.delete(f"/api/pricing/rules/{rule.json()['id']}", headers=admin)
+    assert deleted.status_code == 204
+    assert _quote(client, sample_court.id, monday_evening, 60)["total_price"] == 25.0
+
+
+def test_pricing_rules_require_manager(client: TestClient, player_token: str):
+    response = client.post(
+        "/api/pricing/rules",
+        json={"name": "Peak", "start_minute": 1080, "end_minute": 1320},
+        headers={"Authorization": f"Bearer {player_token}"},
+    )
+    assert response.status_code == 403
+
+
+def test_quote_rejects_unknown_court_and_empty_window(client: TestClient, sample_court):
+    start = _next_weekday(2, 10)
+    missing = client.get(
+        "/api/pricing/quote",
+        params={"court_id": 999, "start": start.isoformat(), "end": start.isoformat()},
+    )
+    assert missing.status_code == 404
+    empty = client.get(
+        "/api/pricing/quote",
+        params={"court_id": sample_court.id, "start": start.isoformat(), "end": start.isoformat()},
+    )
+    assert empty.status_code == 400
@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.models import UserRole
+
+
+@pytest.fixture(name="profiling_client")
+def profiling_client_fixture(session: Session, monkeypatch: pytest.MonkeyPatch):
+    """Build a separate app with the profiler enabled."""
+    from app.main import get_application
+
+    monkeypatch.setattr(settings, "profiler_enabled", True)
+    profiled_app = get_application()
+    profiled_app.dependency_overrides[get_session] = lambda: session
+    yield TestClient(profiled_app)
+
+
+def _login(client: TestClient, email: str, password: str) -> str:
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    return response.json()["access_token"]
+
+
+def test_profiler_routes_absent_by_default(client: TestClient, admin_token: str):
+    response = client.post(
+        "/api/admin/profiler/?seconds=0.1",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 404
+
+
+def test_admin_can_profile_worker(profiling_client: TestClient, admin_user):
+    token = _login(profiling_client, admin_user.email, "AdminPassword123")
+
+    response = profiling_client.post(
+        "/api/admin/profiler/?seconds=0.2&format=speedscope",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["profiles"][0]["type"] == "sampled"
+    assert body["shared"]["frames"]
+
+
+def test_player_cannot_profile_worker(profiling_client: TestClient, test_user):
+    token = _login(profiling_client, test_user.email, "TestPassword123")
+
+    response = profiling_client.post(
+        "/api/admin/profiler/?seconds=0.1",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 403
+
+
+def test_request_profile_header_is_admin_only(
+    profiling_client: TestClient, admin_user, test_user
+):
+    admin = _login(profiling_client, admin_user.email, "AdminPassword123")
+    player = _login(profiling_client, test_user.email, "TestPassword123")
+
+    profiled = profiling_client.get(
+        "/api/courts", headers={"Authorization": f"Bearer {admin}", "X-Profile": "1"}
+    )
+    ignored = profiling_client.get(
+        "/api/courts", headers={"Authorization": f"Bearer {player}", "X-Profile": "1"}
+    )
+
+    assert "x-profile-id" in profiled.headers
+    assert "x-profile-id" not in ignored.headers
+    download = profiling_client.get(
+        f"/api/admin/profiler/requests/{profiled.headers['x-profile-id']}?format=collapsed",
+        headers={"Authorization": f"Bearer {admin}"},
+    )
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/plain")
+
+
+def test_request_profile_header_rechecks_the_admin_in_the_database(
+    profiling_client: TestClient, session: Session, admin_user
+):
+    token = _login(profiling_client, admin_user.email, "AdminPassword123")
+    headers = {"Authorization": f"Bearer {token}", "X-Profile": "1"}
+    assert "x-profile-id" in profiling_client.get("/api/courts", headers=headers).headers
+
+    # The token still claims the admin role, the database no longer does
+    admin_user.role = UserRole.USER
+    session.add(admin_user)
+    session.commit()
+    assert "x-profile-id" not in profiling_client.get("/api/courts", headers=headers).headers
+
+    admin_user.role = UserRole.ADMIN
+    admin_user.is_active = False
+    session.add(admin_user)
+    session.commit()
+    assert "x-profile-id" not in profiling_client.get("/api/courts", headers=headers).headers
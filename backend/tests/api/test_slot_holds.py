@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Booking, SlotHold, User
+from app.services import holds
+
+DAY = datetime(2030, 1, 10)
+
+
+@pytest.fixture(autouse=True)
+def empty_hold_index():
+    holds.index.clear()
+    yield
+    holds.index.clear()
+
+
+def _slot(start: float, end: float) -> dict:
+    return {
+        "start_time": (DAY + timedelta(hours=start)).isoformat(),
+        "end_time": (DAY + timedelta(hours=end)).isoformat(),
+    }
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _hold(client: TestClient, court_id: int, token: str, start: float, end: float, **fields):
+    return client.post(
+        f"/api/courts/{court_id}/holds", json={**_slot(start, end), **fields}, headers=_auth(token)
+    )
+
+
+def _book(client: TestClient, court_id: int, token: str, start: float, end: float, **fields):
+    return client.post(
+        "/api/bookings",
+        json={"court_id": court_id, **_slot(start, end), **fields},
+        headers=_auth(token),
+    )
+
+
+def test_hold_blocks_other_players_until_the_holder_books(
+    client: TestClient, session: Session, player_token: str, auth_token: str, sample_court
+):
+    response = _hold(client, sample_court.id, player_token, 18, 19)
+    assert response.status_code == 201, response.text
+    hold_id = response.json()["id"]
+
+    assert _book(client, sample_court.id, auth_token, 18.5, 19.5).status_code == 409
+    conflict = _hold(client, sample_court.id, auth_token, 18, 19)
+    assert conflict.status_code == 409
+    assert conflict.json()["conflicts"][0]["start_time"] == _slot(18, 19)["start_time"]
+
+    booked = _book(client, sample_court.id, player_token, 18, 19, hold_id=hold_id)
+    assert booked.status_code == 201, booked.text
+    assert session.exec(select(SlotHold)).all() == []
+    assert len(holds.index) == 0
+    # The booking itself now keeps the slot taken
+    assert _book(client, sample_court.id, auth_token, 18, 19).status_code == 409
+
+
+def test_new_hold_replaces_the_previous_one(
+    client: TestClient, session: Session, player_token: str, auth_token: str, sample_court
+):
+    assert _hold(client, sample_court.id, player_token, 10, 11).status_code == 201
+    assert _hold(client, sample_court.id, player_token, 12, 13).status_code == 201
+
+    assert [hold.start_time.hour for hold in session.exec(select(SlotHold)).all()] == [12]
+    assert _book(client, sample_court.id, auth_token, 10, 11).status_code == 201
+
+
+def test_expired_and_released_holds_do_not_block(
+    client: TestClient, session: Session, player_token: str, auth_token: str, sample_court
+):
+    hold_id = _hold(client, sample_court.id, player_token, 9, 10).json()["id"]
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    session.exec(update(SlotHold).values(expires_at=expired))
+    session.commit()
+    holds.index.clear()
+    # An expired hold can no longer be converted either
+    assert _book(client, sample_court.id, player_token, 9, 10, hold_id=hold_id).status_code == 201
+
+    hold_id = _hold(client, sample_court.id, player_token, 11, 12).json()["id"]
+    url = f"/api/courts/{sample_court.id}/holds/{hold_id}"
+    assert client.delete(url, headers=_auth(auth_token)).status_code == 404
+    assert client.delete(url, headers=_auth(player_token)).status_code == 204
+    assert _book(client, sample_court.id, auth_token, 11, 12).status_code == 201
+
+
+def test_hold_validation(client: TestClient, player_token: str, admin_token: str, sample_court):
+    assert _hold(client, sample_court.id, admin_token, 9, 10).status_code == 403
+    assert _hold(client, sample_court.id, player_token, 9, 10, ttl_seconds=3600).status_code == 400
+    assert _hold(client, sample_court.id, player_token, 9, 9.75).status_code == 422
+    assert _hold(client, 999, player_token, 9, 10).status_code == 404
+
+
+def test_search_skips_slots_held_by_others(client: TestClient, player_token: str, sample_court):
+    assert _hold(client, sample_court.id, player_token, 18, 19).status_code == 201
+
+    response = client.get(
+        "/api/courts/search",
+        params={"duration": 60, "earliest": _slot(18, 19)["start_time"],
+                "latest": _slot(18, 20)["end_time"]},
+    )  # fmt: skip
+
+    assert [slot["start_time"][11:16] for slot in response.json()["slots"]] == ["19:00"]
+
+
+def test_direct_booking_waits_for_the_court_lock_of_a_hold_grant(
+    client: TestClient,
+    session: Session,
+    player_token: str,
+    auth_token: str,
+    sample_court,
+    monkeypatch,
+):
+    holder = session.exec(select(User).where(User.email == "player@example.com")).one()
+    lock_court = holds.lock_court
+    granted = []
+
+    def contended_lock(db: Session, court_id: int) -> None:
+        if not granted:
+            # The player's hold grant owned the court lock and commits first
+            with Session(session.get_bind()) as other:
+                lock_court(other, court_id)
+                start = DAY + timedelta(hours=18)
+                hold = holds.grant(
+                    other, court_id, holder.id, start, start + timedelta(hours=1), 120, {}
+                )
+                granted.append(hold.id)
+        lock_court(db, court_id)
+
+    monkeypatch.setattr(holds, "lock_court", contended_lock)
+
+    # The direct booking checks availability only once it has the lock, and sees the hold
+    assert _book(client, sample_court.id, auth_token, 18, 19).status_code == 409
+
+    booked = _book(client, sample_court.id, player_token, 18, 19, hold_id=granted[0])
+    assert booked.status_code == 201, booked.text
+    assert [booking.user_id for booking in session.exec(select(Booking)).all()] == [holder.id]
+
+
+def test_queued_batch_sees_a_hold_granted_while_it_waited_for_the_court(
+    client: TestClient,
+    session: Session,
+    player_token: str,
+    admin_token: str,
+    test_user,
+    sample_court,
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "booking_write_queue", True)
+    monkeypatch.setattr(settings, "booking_write_queue_window_ms", 1.0)
+    lock_court = holds.lock_court
+    locked = []
+
+    def contended_lock(db: Session, court_id: int) -> None:
+        if not locked:
+            # Another player's hold grant owned the court lock and commits first
+            with Session(session.get_bind()) as other:
+                lock_court(other, court_id)
+                start = DAY + timedelta(hours=18)
+                holds.grant(
+                    other, court_id, test_user.id, start, start + timedelta(hours=1), 120, {}
+                )
+        lock_court(db, court_id)
+        locked.append(court_id)
+
+    monkeypatch.setattr(holds, "lock_court", contended_lock)
+
+    assert _book(client, sample_court.id, player_token, 18, 19).status_code == 409
+    assert session.exec(select(Booking)).all() == []
+
+    # Admin blocks take the same lock
+    blocked = client.post(
+        "/api/bookings/block",
+        json={"court_id": sample_court.id, **_slot(20, 21)},
+        headers=_auth(admin_token),
+    )
+    assert blocked.status_code == 201, blocked.text
+    assert locked == [sample_court.id, sample_court.id]
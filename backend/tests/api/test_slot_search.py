@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Booking, BookingStatus, Court
+from app.services.availability import free_gaps
+
+DAY = datetime(2030, 1, 10)
+
+
+def _book(session: Session, court_id: int, start_hour: float, end_hour: float, **fields) -> None:
+    session.add(
+        Booking(
+            user_id=1,
+            court_id=court_id,
+            start_time=DAY + timedelta(hours=start_hour),
+            end_time=DAY + timedelta(hours=end_hour),
+            status=fields.pop("status", BookingStatus.CONFIRMED),
+            **fields,
+        )
+    )
+
+
+def _search(client: TestClient, **params) -> list[tuple[int, str, str]]:
+    response = client.get("/api/courts/search", params=params)
+    assert response.status_code == 200, response.text
+    return [
+        (slot["court_id"], slot["start_time"][11:16], slot["free_until"][11:16])
+        for slot in response.json()["slots"]
+    ]
+
+
+def test_free_gaps_merges_overlaps_and_rounds_to_the_slot_grid():
+    busy = [(60, 120), (90, 150), (200, 260)]
+    assert list(free_gaps(busy, [(0, 400)], 60)) == [(0, 60), (270, 400)]
+    assert list(free_gaps(busy, [(0, 400)], 30)) == [(0, 60), (150, 200), (270, 400)]
+
+
+def test_search_returns_earliest_slots_across_courts(client: TestClient, session: Session, sample_court):
+    other = Court(name="Campo 2", hourly_rate=20.0)
+    closed = Court(name="Campo chiuso", hourly_rate=20.0, is_active=False)
+    session.add_all([other, closed])
+    session.commit()
+    _book(session, sample_court.id, 18, 19)
+    _book(session, sample_court.id, 19.5, 20.5)
+    _book(session, other.id, 18, 21)
+    _book(session, other.id, 21, 22, status=BookingStatus.CANCELLED)
+    session.commit()
+
+    slots = _search(
+        client,
+        duration=60,
+        earliest=(DAY + timedelta(hours=18)).isoformat(),
+        latest=(DAY + timedelta(days=2)).isoformat(),
+        time_window="18:00-22:00",
+        limit=3,
+    )
+
+    assert slots == [
+        (sample_court.id, "20:30", "22:00"),
+        (other.id, "21:00", "22:00"),
+        (sample_court.id, "18:00", "22:00"),
+    ]
+
+
+def test_search_filters_courts_and_skips_short_gaps(client: TestClient, session: Session, sample_court):
+    _book(session, sample_court.id, 9, 10)
+    _book(session, sample_court.id, 11, 12)
+    session.commit()
+
+    slots = _search(
+        client,
+        duration=90,
+        earliest=(DAY + timedelta(hours=9)).isoformat(),
+        latest=(DAY + timedelta(hours=14)).isoformat(),
+        court_ids=[sample_court.id],
+    )
+
+    assert slots == [(sample_court.id, "12:00", "14:00")]
+
+
+def test_search_rejects_bad_parameters(client: TestClient):
+    earliest = DAY.isoformat()
+    too_far = (DAY + timedelta(days=40)).isoformat()
+    assert client.get("/api/courts/search", params={"time_window": "22-18"}).status_code == 400
+    assert client.get("/api/courts/search", params={"time_window": "20:00-18:00"}).status_code == 400
+    response = client.get("/api/courts/search", params={"earliest": earliest, "latest": too_far})
+    assert response.status_code == 400
+    assert client.get("/api/courts/search", params={"duration": 45}).status_code == 422
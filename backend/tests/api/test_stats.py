@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models import Booking, BookingDailyStats, BookingStatus, PaymentStatus
+from app.services import stats
+
+
+def _slot(hours: float) -> datetime:
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(days=2, hours=hours)
+
+
+def _rollup(session: Session) -> dict:
+    session.expire_all()
+    return {
+        (row.court_id, row.day, row.hour): (
+            row.booked_minutes,
+            row.blocked_minutes,
+            round(row.paid_revenue, 6),
+            row.cancellations,
+        )
+        for row in session.exec(select(BookingDailyStats)).all()
+        if row.booked_minutes or row.blocked_minutes or row.paid_revenue or row.cancellations
+    }
+
+
+def test_rollup_tracks_booking_writes_and_matches_rebuild(
+    client: TestClient, session: Session, player_token: str, admin_token: str, sample_court
+):
+    player = {"Authorization": f"Bearer {player_token}"}
+    admin = {"Authorization": f"Bearer {admin_token}"}
+
+    created = client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _slot(18.5).isoformat(),
+            "end_time": _slot(20).isoformat(),
+        },
+        headers=player,
+    ).json()
+    moved = client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _slot(10).isoformat(),
+            "end_time": _slot(11).isoformat(),
+        },
+        headers=player,
+    ).json()
+    cancelled = client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _slot(12).isoformat(),
+            "end_time": _slot(13).isoformat(),
+        },
+        headers=player,
+    ).json()
+    client.post(
+        "/api/bookings/block",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _slot(7).isoformat(),
+            "end_time": _slot(8).isoformat(),
+        },
+        headers=admin,
+    )
+    client.patch(
+        f"/api/bookings/{moved['id']}",
+        json={"start_time": _slot(14).isoformat(), "end_time": _slot(15.5).isoformat()},
+        headers=player,
+    )
+    client.delete(f"/api/bookings/{cancelled['id']}", headers=player)
+
+    # Payment confirmation, as the Stripe webhook applies it
+    booking = session.get(Booking, created["id"])
+    before = stats.snapshot(booking)
+    booking.payment_status = PaymentStatus.PAID
+    booking.status = BookingStatus.CONFIRMED
+    stats.record_change(session, before, stats.snapshot(booking))
+    session.commit()
+
+    day = _slot(0).date()
+    incremental = _rollup(session)
+    paid = created["total_price"]
+    assert incremental[(sample_court.id, day, 18)] == (30, 0, round(paid / 3, 6), 0)
+    assert incremental[(sample_court.id, day, 19)] == (60, 0, round(paid * 2 / 3, 6), 0)
+    assert incremental[(sample_court.id, day, 7)] == (0, 60, 0.0, 0)
+    assert incremental[(sample_court.id, day, 12)] == (0, 0, 0.0, 1)
+    assert (sample_court.id, day, 10) not in incremental
+    assert incremental[(sample_court.id, day, 15)] == (30, 0, 0.0, 0)
+
+    buckets = stats.rebuild(session.get_bind(), day, day + timedelta(days=1))
+    assert buckets == len(incremental)
+    assert _rollup(session) == incremental
+
+
+def test_utilization_endpoint(
+    client: TestClient, player_token: str, admin_token: str, sample_court
+):
+    client.post(
+        "/api/bookings",
+        json={
+            "court_id": sample_court.id,
+            "start_time": _slot(9).isoformat(),
+            "end_time": _slot(11).isoformat(),
+        },
+        headers={"Authorization": f"Bearer {player_token}"},
+    )
+    day = _slot(0).date()
+    params = {"from": day.isoformat(), "to": (day + timedelta(days=2)).isoformat()}
+
+    forbidden = client.get(
+        "/api/stats/utilization",
+        params=params,
+        headers={"Authorization": f"Bearer {player_token}"},
+    )
+    assert forbidden.status_code == 403
+
+    response = client.get(
+        "/api/stats/utilization",
+        params=params,
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["days"] == [
+        {
+            "court_id": sample_court.id,
+            "day": day.isoformat(),
+            "booked_minutes": 120,
+            "blocked_minutes": 0,
+            "paid_revenue": 0.0,
+            "cancellations": 0,
+            "utilization": round(120 / 1440, 4),
+        }
+    ]
+    assert body["courts"][0]["utilization"] == round(120 / 2880, 4)
+
+    invalid = client.get(
+        "/api/stats/utilization",
+        params={"from": params["to"], "to": params["from"]},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert invalid.status_code == 400
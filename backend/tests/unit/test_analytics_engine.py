@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from app.services import analytics
+from app.services.stats import epoch_minutes
+
+
+def _intervals(rows: list[tuple[int, datetime, datetime]]) -> analytics.Intervals:
+    court_id, start, end = zip(*rows, strict=True)
+    return analytics.Intervals(
+        np.array(court_id, dtype=np.int64), epoch_minutes(start), epoch_minutes(end)
+    )
+
+
+def test_heatmap_splits_partial_slots_and_normalises_by_weekday_count():
+    # 2026-03-02 and 2026-03-09 are Mondays; the range holds two of every weekday
+    intervals = _intervals(
+        [
+            (1, datetime(2026, 3, 2, 18, 15), datetime(2026, 3, 2, 19, 30)),
+            (1, datetime(2026, 3, 9, 18, 0), datetime(2026, 3, 9, 19, 0)),
+            (2, datetime(2026, 3, 7, 9, 0), datetime(2026, 3, 7, 9, 10)),
+            (3, datetime(2026, 3, 7, 9, 0), datetime(2026, 3, 7, 10, 0)),  # not requested
+        ]
+    )
+    heatmap = analytics.occupancy_heatmap(intervals, [1, 2], date(2026, 3, 2), date(2026, 3, 16))
+
+    assert heatmap.shape == (2, 7, 48)
+    assert heatmap[0, 0, 36] == (15 + 30) / 60  # 18:00 slot
+    assert heatmap[0, 0, 37] == (30 + 30) / 60  # 18:30 slot
+    assert heatmap[0, 0, 38] == 30 / 60  # 19:00 slot
+    assert heatmap[1, 5, 18] == 10 / 60
+    assert heatmap.sum() * 60 == 75 + 60 + 10
+
+
+def test_forecast_repeats_weekday_profile_and_applies_last_years_season():
+    days = 2 * 364
+    weekday_profile = np.array([60, 60, 60, 60, 120, 240, 240], dtype=float)
+    daily = np.tile(weekday_profile, days // 7)[np.newaxis, :]
+    # Last year demand doubled in the four weeks following "today"
+    anchor = days - 364
+    daily[0, anchor : anchor + 28] *= 2
+
+    forecast = analytics.forecast_demand(daily, 14)
+
+    assert forecast.shape == (1, 14)
+    # The season factor is a centred weekly mean, so the step shows fully from day 3
+    assert np.allclose(forecast[0, 3:], np.tile(weekday_profile, 2)[3:] * 2)
+    assert (forecast[0, :3] > np.tile(weekday_profile, 2)[:3]).all()
+
+
+def test_forecast_without_history_is_zero():
+    assert not analytics.forecast_demand(np.zeros((2, 0)), 7).any()
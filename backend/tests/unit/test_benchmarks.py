@@ -0,0 +1,19 @@
+from sqlmodel import Session
+
+from benchmarks.datasets import build_dataset
+from benchmarks.harness import measure
+from benchmarks.run import build_cases
+
+
+def test_benchmark_cases_run_on_small_dataset(tmp_path):
+    """Smoke-test the benchmark suite so it does not rot between perf runs."""
+    dataset = build_dataset(200, courts=4, users=10, database_url=f"sqlite:///{tmp_path}/bench.db")
+
+    with Session(dataset.engine) as session:
+        cases = build_cases(dataset, session)
+        assert cases["check_court_availability.conflict"]() is False
+        assert cases["check_court_availability.free"]() is True
+        for case in cases.values():
+            stats = measure(case, repeat=1, number=1)
+            assert stats["calls"] == 1
+    dataset.engine.dispose()
@@ -0,0 +1,152 @@
+import os
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlmodel import create_engine
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+
+cache = TTLCache("invalidation-test", ttl=60)
+
+
+@pytest.fixture(autouse=True)
+def filled_cache():
+    for key in (1, 2, 3):
+        cache.set(key, f"value {key}")
+    yield
+    cache.invalidate()
+
+
+def _samples(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_publish_evicts_locally_without_postgres():
+    latencies = _samples("cache_invalidation_latency_seconds_count")
+
+    invalidation.publish(cache.name, 1)
+    assert [cache.get(key) for key in (1, 2)] == [None, "value 2"]
+
+    invalidation.publish(cache.name)
+    assert len(cache) == 0
+    # Only deliveries from other nodes measure the bus latency
+    assert _samples("cache_invalidation_latency_seconds_count") == latencies
+    # Caches this process never created are ignored
+    invalidation.publish("not-registered", 1)
+
+
+def test_messages_from_other_nodes_are_applied_and_own_echoes_skipped():
+    bus = invalidation.InvalidationBus()
+    remote = _samples("cache_invalidations_total", cache=cache.name, source="remote")
+
+    bus.deliver(invalidation.encode(cache.name, 2, "other-host:1", published=time.time() - 0.05))
+    bus.deliver(invalidation.encode(cache.name, 3, bus.node))
+
+    assert [cache.get(key) for key in (1, 2, 3)] == ["value 1", None, "value 3"]
+    assert _samples("cache_invalidations_total", cache=cache.name, source="remote") == remote + 1
+
+
+class FakeDriver:
+    """A psycopg2-like connection whose ``poll`` runs one scripted step per call."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.notifies = []
+        self.executed = []
+        self.autocommit = False
+        # Always readable, so ``select`` returns at once
+        self._read, self._write = os.pipe()
+        os.write(self._write, b"x")
+
+    def fileno(self):
+        return self._read
+
+    def rollback(self):
+        pass
+
+    @contextmanager
+    def cursor(self):
+        yield SimpleNamespace(execute=self.executed.append)
+
+    def poll(self):
+        payloads = self.steps.pop(0)()
+        self.notifies.extend(SimpleNamespace(payload=payload) for payload in payloads)
+
+    def close(self):
+        os.close(self._read)
+        os.close(self._write)
+
+
+class FakeEngine:
+    def __init__(self, *drivers):
+        self.drivers = list(drivers)
+        self.invalidated = 0
+
+    def raw_connection(self):
+        def invalidate():
+            self.invalidated += 1
+
+        return SimpleNamespace(driver_connection=self.drivers.pop(0), invalidate=invalidate)
+
+
+def test_listener_applies_remote_messages_and_flushes_on_reconnect(monkeypatch):
+    monkeypatch.setattr(invalidation, "RECONNECT_DELAY", 0.0)
+    bus = invalidation.InvalidationBus()
+    seen = []
+
+    def first_batch():
+        seen.append(len(cache))  # flushed when the listener connected
+        for key in (1, 2, 3):
+            cache.set(key, f"value {key}")
+        return [
+            invalidation.encode(cache.name, 2, "other-host:1"),
+            invalidation.encode(cache.name, 3, bus.node),
+        ]
+
+    def connection_lost():
+        seen.append([cache.get(key) for key in (1, 2, 3)])
+        raise OSError("server closed the connection")
+
+    def after_reconnect():
+        seen.append(len(cache))
+        bus._stop.set()
+        return []
+
+    first, second = FakeDriver([first_batch, connection_lost]), FakeDriver([after_reconnect])
+    bus._engine = FakeEngine(first, second)  # type: ignore[assignment]
+    try:
+        bus._listen()
+    finally:
+        first.close()
+        second.close()
+
+    assert seen == [0, ["value 1", None, "value 3"], 0]
+    assert first.executed == second.executed == ["LISTEN cache_invalidation"]
+    assert first.autocommit and bus._engine.invalidated == 2
+
+
+def test_notify_reaches_the_other_listeners():
+    """Two buses on one PostgreSQL database; set TEST_POSTGRES_URL to run."""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(url)
+    sender, receiver = invalidation.InvalidationBus(), invalidation.InvalidationBus()
+    receiver.start(engine)
+    sender.start(engine)
+    try:
+        remote = _samples("cache_invalidations_total", cache=cache.name, source="remote")
+        deadline = time.monotonic() + 10
+        # Published until the listeners have subscribed and one of them applied it
+        while _samples("cache_invalidations_total", cache=cache.name, source="remote") == remote:
+            assert time.monotonic() < deadline
+            sender.publish(cache.name, 1)
+            time.sleep(0.1)
+    finally:
+        sender.stop()
+        receiver.stop()
+        engine.dispose()
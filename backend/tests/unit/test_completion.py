@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.models import Booking, BookingStatus
+from app.services.completion import complete_ended_bookings
+
+NOW = datetime(2030, 1, 10, 12, 0)
+
+
+def _booking(court_id: int, end: datetime, status: BookingStatus) -> Booking:
+    return Booking(
+        user_id=1,
+        court_id=court_id,
+        start_time=end - timedelta(hours=1),
+        end_time=end,
+        status=status,
+    )
+
+
+def _seed(session: Session, court_id: int) -> None:
+    session.add_all(
+        [_booking(court_id, NOW - timedelta(hours=h), BookingStatus.CONFIRMED) for h in range(1, 6)]
+        + [
+            _booking(court_id, NOW + timedelta(hours=1), BookingStatus.CONFIRMED),
+            _booking(court_id, NOW - timedelta(hours=1), BookingStatus.PENDING),
+            _booking(court_id, NOW - timedelta(hours=1), BookingStatus.CANCELLED),
+        ]
+    )
+    session.commit()
+
+
+def _statuses(session: Session) -> dict[BookingStatus, int]:
+    session.expire_all()
+    counts: dict[BookingStatus, int] = {}
+    for booking in session.exec(select(Booking)).all():
+        counts[booking.status] = counts.get(booking.status, 0) + 1
+    return counts
+
+
+def test_dry_run_counts_without_writing(session: Session, sample_court):
+    _seed(session, sample_court.id)
+
+    report = complete_ended_bookings(session.get_bind(), cutoff=NOW, batch_size=2, dry_run=True)
+
+    assert (report.scanned, report.completed, report.batches) == (5, 5, 3)
+    assert BookingStatus.COMPLETED not in _statuses(session)
+
+
+def test_completes_only_ended_confirmed_bookings_in_batches(session: Session, sample_court):
+    _seed(session, sample_court.id)
+    progress = []
+
+    report = complete_ended_bookings(
+        session.get_bind(), cutoff=NOW, batch_size=2, on_batch=lambda r: progress.append(r.completed)
+    )
+
+    assert report.completed == 5
+    assert progress == [2, 4, 5]
+    assert _statuses(session) == {
+        BookingStatus.COMPLETED: 5,
+        BookingStatus.CONFIRMED: 1,
+        BookingStatus.PENDING: 1,
+        BookingStatus.CANCELLED: 1,
+    }
+    completed = session.exec(select(Booking).where(Booking.status == BookingStatus.COMPLETED)).all()
+    assert {booking.version for booking in completed} == {2}
+
+    again = complete_ended_bookings(session.get_bind(), cutoff=NOW, batch_size=2)
+    assert (again.scanned, again.completed) == (0, 0)
+
+
+def test_max_batches_resumes_where_it_stopped(session: Session, sample_court):
+    _seed(session, sample_court.id)
+
+    first = complete_ended_bookings(session.get_bind(), cutoff=NOW, batch_size=2, max_batches=1)
+    rest = complete_ended_bookings(session.get_bind(), cutoff=NOW, batch_size=2)
+
+    assert (first.completed, rest.completed) == (2, 3)
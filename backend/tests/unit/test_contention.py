@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.main import app
+from app.models import Booking, BookingStatus, User
+from app.services import write_queue
+from benchmarks.contention import RushConfig, find_double_bookings, run_rush
+
+
+def test_find_double_bookings_reports_only_active_overlaps(session: Session, sample_court):
+    start = datetime(2030, 1, 1, 18, 0)
+    session.add_all(
+        [
+            Booking(user_id=1, court_id=sample_court.id, start_time=start,
+                    end_time=start + timedelta(hours=1)),
+            Booking(user_id=1, court_id=sample_court.id, start_time=start + timedelta(minutes=30),
+                    end_time=start + timedelta(hours=2)),
+            Booking(user_id=1, court_id=sample_court.id, start_time=start,
+                    end_time=start + timedelta(hours=1), status=BookingStatus.CANCELLED),
+        ]
+    )  # fmt: skip
+    session.commit()
+
+    assert find_double_bookings(session) == [(1, 2)]
+
+
+def test_rush_on_one_slot_books_it_once(client: TestClient, session: Session, sample_court):
+    del client  # installs the session override on the app
+    players = []
+    for i in range(3):
+        email = f"rush{i}@example.com"
+        session.add(User(email=email, full_name="Rush", hashed_password=get_password_hash("RushPass123")))
+        players.append((email, "RushPass123"))
+    session.commit()
+
+    config = RushConfig(
+        court_id=sample_court.id,
+        first_slot=(datetime.utcnow() + timedelta(days=2)).replace(
+            hour=19, minute=0, second=0, microsecond=0
+        ),
+        requests=20,
+        concurrency=10,
+    )
+
+    async def _run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as rush_client:
+            return await run_rush(rush_client, config, players)
+
+    report = asyncio.run(_run())
+
+    assert report.statuses[201] == 1
+    assert report.statuses[409] == 19
+    assert find_double_bookings(session, sample_court.id) == []
+    assert report.as_dict()["requests"] == 20
+
+
+def test_rush_through_write_queue_books_each_slot_once(
+    client: TestClient, session: Session, sample_court, monkeypatch
+):
+    del client  # installs the session override on the app
+    monkeypatch.setattr(settings, "booking_write_queue", True)
+    monkeypatch.setattr(settings, "booking_write_queue_window_ms", 20.0)
+    batch_sizes = []
+    resolve = write_queue.resolve
+
+    def counting_resolve(engine, court_id, day, batch):
+        batch_sizes.append(len(batch))
+        return resolve(engine, court_id, day, batch)
+
+    monkeypatch.setattr(write_queue, "resolve", counting_resolve)
+    players = []
+    for i in range(3):
+        email = f"queue{i}@example.com"
+        session.add(User(email=email, full_name="Queue", hashed_password=get_password_hash("QueuePass123")))
+        players.append((email, "QueuePass123"))
+    session.commit()
+
+    config = RushConfig(
+        court_id=sample_court.id,
+        first_slot=(datetime.utcnow() + timedelta(days=2)).replace(
+            hour=19, minute=0, second=0, microsecond=0
+        ),
+        requests=20,
+        concurrency=20,
+        slots=2,
+    )
+
+    async def _run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as rush_client:
+            return await run_rush(rush_client, config, players)
+
+    report = asyncio.run(_run())
+
+    assert report.statuses[201] == 2
+    assert report.statuses[409] == 18
+    # Contending requests were resolved together, not one transaction each
+    assert sum(batch_sizes) == 20 and len(batch_sizes) < 20
+    assert find_double_bookings(session, sample_court.id) == []
+    assert len(write_queue.queue) == 0
+
+
+def test_cancelled_leader_does_not_strand_queued_followers(monkeypatch):
+    monkeypatch.setattr(settings, "booking_write_queue_window_ms", 20.0)
+    resolving = threading.Event()
+    release = threading.Event()
+
+    def slow_resolve(engine, court_id, day, batch):
+        resolving.set()
+        release.wait(5)
+        return [None] * len(batch)
+
+    monkeypatch.setattr(write_queue, "resolve", slow_resolve)
+    queue = write_queue.BookingWriteQueue()
+    start = datetime(2030, 1, 1, 18, 0)
+
+    def booking(user_id: int) -> Booking:
+        return Booking(
+            user_id=user_id, court_id=1, start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    async def _run():
+        leader = asyncio.create_task(queue.submit(None, booking(1)))
+        followers = [asyncio.create_task(queue.submit(None, booking(i))) for i in (2, 3)]
+        await asyncio.to_thread(resolving.wait, 5)
+        # The client that opened the batch disconnects while it is being resolved
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await asyncio.wait_for(asyncio.gather(*followers), 5)
+
+    leader, results = asyncio.run(_run())
+
+    assert leader.cancelled()
+    assert results == [None, None]
+    assert len(queue) == 0
@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.models import Court, Job, JobStatus, SlotHold, User
+from app.services import jobs
+
+NOW = datetime(2030, 1, 10, 8, 0)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """A file-backed SQLite database, so worker threads get their own connections."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "job_poll_interval_seconds", 0.01)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    monkeypatch.setattr(jobs, "registry", dict(jobs.registry))
+    monkeypatch.setattr(jobs, "schedules", dict(jobs.schedules))
+    received: list[dict] = []
+
+    @jobs.task("test.record", queue="test")
+    def record(engine, payload):
+        received.append(payload)
+
+    @jobs.task("test.broken", queue="test", max_attempts=2, backoff=timedelta(0))
+    def broken(engine, payload):
+        raise RuntimeError("still broken")
+
+    return received
+
+
+def _jobs(engine) -> list[Job]:
+    with Session(engine) as session:
+        return list(session.exec(select(Job).order_by(Job.id)).all())
+
+
+def test_worker_runs_jobs_and_retries_failures_until_max_attempts(engine, calls):
+    with Session(engine) as session:
+        jobs.enqueue(session, "test.record", {"court_id": 7})
+        jobs.enqueue(session, "test.broken")
+        session.commit()
+
+    jobs.Worker(engine, queues=["test"], threads=2).run(threading.Event(), burst=True)
+
+    assert calls == [{"court_id": 7}]
+    done, failed = _jobs(engine)
+    assert (done.status, done.attempts, done.locked_by) == (JobStatus.DONE, 1, None)
+    assert (failed.status, failed.attempts) == (JobStatus.FAILED, 2)
+    assert "still broken" in failed.last_error
+    with Session(engine) as session, pytest.raises(ValueError):
+        jobs.enqueue(session, "test.unknown")
+
+
+def test_queue_concurrency_limit_and_lapsed_leases(engine, calls, monkeypatch):
+    monkeypatch.setattr(settings, "job_queue_concurrency", "test=1")
+    with Session(engine) as session:
+        for court_id in range(3):
+            jobs.enqueue(session, "test.record", {"court_id": court_id}, run_at=NOW)
+        session.commit()
+
+        first = jobs.claim(session, "test", 10, "worker-a", now=NOW)
+        assert [job.id for job in first] == [1]
+        assert jobs.claim(session, "test", 10, "worker-b", now=NOW) == []
+        session.commit()
+
+        # worker-a died: once its lease lapses the job is claimable again
+        lapsed = NOW + timedelta(seconds=settings.job_lease_seconds + 1)
+        again = jobs.claim(session, "test", 10, "worker-b", now=lapsed)
+        assert [(job.id, job.attempts) for job in again] == [(1, 2)]
+        session.commit()
+
+        # A late outcome from worker-a does not overwrite worker-b's lease
+        jobs.finish(session, first[0], "worker-a")
+        job = session.get(Job, 1)
+        session.refresh(job)
+        assert (job.status, job.locked_by) == (JobStatus.RUNNING, "worker-b")
+
+
+def test_periodic_job_is_enqueued_once_per_interval(engine, calls):
+    jobs.every(timedelta(minutes=5), "test.record", name="test.every", source="schedule")
+
+    with Session(engine) as session:
+        assert jobs.enqueue_due_schedules(session, NOW, queues=["test"]) == 1
+        # A second worker polling at the same time finds it already advanced
+        assert jobs.enqueue_due_schedules(session, NOW, queues=["test"]) == 0
+        assert jobs.enqueue_due_schedules(session, NOW + timedelta(minutes=4), queues=["test"]) == 0
+        assert jobs.enqueue_due_schedules(session, NOW + timedelta(minutes=5), queues=["test"]) == 1
+
+    queued = _jobs(engine)
+    assert [(job.task, job.payload, job.run_at) for job in queued] == [
+        ("test.record", '{"source":"schedule"}', NOW),
+        ("test.record", '{"source":"schedule"}', NOW + timedelta(minutes=5)),
+    ]
+
+
+def test_expire_holds_job_keeps_holds_awaiting_their_notice(engine):
+    from app.services import maintenance
+
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(User(email="holder@example.com", full_name="Holder", hashed_password="x"))
+        session.add(Court(name="Court 1", hourly_rate=25))
+        session.commit()
+        for minutes_ago in (60, 1):
+            session.add(
+                SlotHold(
+                    court_id=1,
+                    user_id=1,
+                    start_time=NOW,
+                    end_time=NOW + timedelta(hours=1),
+                    expires_at=now - timedelta(minutes=minutes_ago),
+                )
+            )
+        session.commit()
+
+        maintenance.expire_holds(engine, {})
+
+        remaining = session.exec(select(SlotHold.expires_at)).all()
+        assert remaining == [now - timedelta(minutes=1)]
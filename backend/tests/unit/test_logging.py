@@ -0,0 +1,62 @@
+import json
+import logging
+
+from app.core import logging as app_logging
+from app.core.logging import JsonFormatter, SamplingFilter, parse_sampling
+
+
+def _record(name: str, level: int, msg: str, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_escapes_quotes_and_keeps_extra_fields():
+    """Messages with quotes and tracebacks must still produce valid JSON."""
+    try:
+        raise ValueError('bad "value"')
+    except ValueError:
+        import sys
+
+        record = logging.LogRecord(
+            "app.test", logging.ERROR, __file__, 1, 'failed: "%s"', ("x",), sys.exc_info()
+        )
+    record.booking_id = 42
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == 'failed: "x"'
+    assert payload["booking_id"] == 42
+    assert 'ValueError: bad "value"' in payload["exception"]
+    assert payload["level"] == "ERROR"
+
+
+def test_parse_sampling_clamps_rates():
+    assert parse_sampling("app.api=0.5, httpx=0,noisy=3") == {
+        "app.api": 0.5,
+        "httpx": 0.0,
+        "noisy": 1.0,
+    }
+    assert parse_sampling("") == {}
+
+
+def test_sampling_filter_uses_longest_prefix_and_keeps_warnings():
+    sampling = SamplingFilter({"app": 1.0, "app.api.bookings": 0.0})
+
+    assert not sampling.filter(_record("app.api.bookings", logging.DEBUG, "hot path"))
+    assert sampling.filter(_record("app.api.bookings", logging.WARNING, "conflict"))
+    assert sampling.filter(_record("app.api.courts", logging.DEBUG, "other"))
+    assert not sampling.filter(_record("app.api.bookings.sub", logging.INFO, "child"))
+
+
+def test_setup_logging_registers_exit_hook_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(app_logging, "_atexit_registered", False)
+    monkeypatch.setattr(app_logging.atexit, "register", registered.append)
+    try:
+        app_logging.setup_logging()
+        app_logging.setup_logging()
+    finally:
+        app_logging.shutdown_logging()
+
+    assert registered == [app_logging.shutdown_logging]
@@ -0,0 +1,200 @@
+import asyncio
+import gzip
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine, func, select
+
+from alembic import command
+from alembic.config import Config
+from app.api.bookings import check_court_availability
+from app.api.courts import get_court_availability
+from app.core.config import settings
+from app.db.partitions import (
+    add_months,
+    archive_partition,
+    create_partition,
+    is_partitioned,
+    list_partitions,
+    maintain,
+    partition_name,
+)
+from app.models import Booking, BookingStatus, Court, User
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+
+def test_month_arithmetic_and_names():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "bookings_p2026_03"
+
+
+def test_pruning_bound_keeps_full_day_bookings_in_conflict_check(session: Session, sample_court):
+    day = datetime(2030, 1, 10)
+    session.add(
+        Booking(user_id=1, court_id=sample_court.id, start_time=day, end_time=day + timedelta(days=1),
+                status=BookingStatus.CONFIRMED, is_blocked=True)
+    )  # fmt: skip
+    session.commit()
+
+    late = day + timedelta(hours=23)
+    assert not check_court_availability(session, sample_court.id, late, late + timedelta(hours=1))
+    next_day = day + timedelta(days=1)
+    assert check_court_availability(session, sample_court.id, next_day, next_day + timedelta(hours=1))
+
+
+@pytest.fixture(name="pg_engine")
+def pg_engine_fixture(monkeypatch):
+    """A PostgreSQL database migrated to head; set TEST_POSTGRES_URL to run these tests."""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP SCHEMA public CASCADE")
+        connection.exec_driver_sql("CREATE SCHEMA public")
+    monkeypatch.setattr(settings, "database_url", url)
+    config = Config()
+    config.set_main_option("script_location", str(BACKEND / "alembic"))
+    command.upgrade(config, "head")
+    with engine.begin() as connection:
+        for month in (date(2030, 1, 1), date(2030, 2, 1), date(2030, 3, 1)):
+            create_partition(connection, month)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="pg_session")
+def pg_session_fixture(pg_engine: Engine):
+    with Session(pg_engine) as session:
+        user = User(email="partitions@example.com", full_name="P", hashed_password="x")
+        court = Court(name="Centrale", hourly_rate=25.0)
+        session.add_all([user, court])
+        session.commit()
+        yield session
+
+
+def _explain_captured(engine: Engine, run) -> str:
+    """Run ``run()`` and return the EXPLAIN output of the last bookings query it sent."""
+    captured: list[tuple[str, dict]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM bookings" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars()
+        return "\n".join(rows)
+
+
+def test_migration_creates_monthly_partitions(pg_engine: Engine):
+    with pg_engine.connect() as connection:
+        assert is_partitioned(connection)
+        names = [partition.name for partition in list_partitions(connection)]
+    current = date.today().replace(day=1)
+    assert partition_name(current) in names
+    assert partition_name(add_months(current, 3)) in names
+
+
+def test_conflict_check_prunes_to_the_booking_month(pg_engine: Engine, pg_session: Session):
+    court_id = pg_session.exec(select(Court.id)).one()
+    start = datetime(2030, 2, 10, 18, 0)
+
+    plan = _explain_captured(
+        pg_engine,
+        lambda: check_court_availability(pg_session, court_id, start, start + timedelta(hours=1)),
+    )
+
+    assert "bookings_p2030_02" in plan
+    assert "bookings_p2030_01" not in plan
+    assert "bookings_p2030_03" not in plan
+
+
+def test_conflict_check_at_month_start_also_reads_previous_month(
+    pg_engine: Engine, pg_session: Session
+):
+    court_id = pg_session.exec(select(Court.id)).one()
+    start = datetime(2030, 2, 1, 0, 30)
+
+    plan = _explain_captured(
+        pg_engine,
+        lambda: check_court_availability(pg_session, court_id, start, start + timedelta(hours=1)),
+    )
+
+    assert "bookings_p2030_01" in plan and "bookings_p2030_02" in plan
+    assert "bookings_p2030_03" not in plan
+
+
+def test_court_availability_prunes_to_the_day_month(pg_engine: Engine, pg_session: Session):
+    court_id = pg_session.exec(select(Court.id)).one()
+
+    plan = _explain_captured(
+        pg_engine,
+        lambda: asyncio.run(get_court_availability(court_id, date(2030, 3, 15), pg_session)),
+    )
+
+    assert "bookings_p2030_03" in plan
+    assert "bookings_p2030_02" not in plan
+
+
+def test_new_partition_takes_rows_from_default(pg_engine: Engine, pg_session: Session):
+    user_id = pg_session.exec(select(User.id)).one()
+    court_id = pg_session.exec(select(Court.id)).one()
+    start = datetime(2031, 6, 5, 10, 0)
+    pg_session.add(Booking(user_id=user_id, court_id=court_id, start_time=start,
+                           end_time=start + timedelta(hours=1)))  # fmt: skip
+    pg_session.commit()
+
+    with pg_engine.begin() as connection:
+        assert create_partition(connection, date(2031, 6, 1))
+        assert not create_partition(connection, date(2031, 6, 1))
+        moved = connection.execute(text("SELECT count(*) FROM bookings_p2031_06")).scalar_one()
+        left = connection.execute(text("SELECT count(*) FROM bookings_default")).scalar_one()
+    assert (moved, left) == (1, 0)
+    assert pg_session.exec(select(func.count()).select_from(Booking)).one() == 1
+
+
+def test_archive_dumps_and_drops_old_months(pg_engine: Engine, pg_session: Session, tmp_path: Path):
+    user_id = pg_session.exec(select(User.id)).one()
+    court_id = pg_session.exec(select(Court.id)).one()
+    for month in (1, 2):
+        start = datetime(2030, month, 5, 10, 0)
+        pg_session.add(Booking(user_id=user_id, court_id=court_id, start_time=start,
+                               end_time=start + timedelta(hours=1), notes=f"month {month}"))  # fmt: skip
+    pg_session.commit()
+
+    report = maintain(
+        pg_engine, ahead=0, detach_before=date(2030, 2, 1), archive_dir=tmp_path, today=date(2030, 3, 1)
+    )
+
+    # Months created by the migration (around today) are older still and go too
+    assert "bookings_p2030_01" in report.detached
+    assert "bookings_p2030_02" not in report.detached
+    with gzip.open(tmp_path / "bookings_p2030_01.csv.gz", "rt") as archive:
+        lines = archive.read().splitlines()
+    assert lines[0].startswith("id,") and len(lines) == 2 and "month 1" in lines[1]
+    with pg_engine.connect() as connection:
+        assert connection.execute(text("SELECT to_regclass('bookings_p2030_01')")).scalar() is None
+    assert [b.notes for b in pg_session.exec(select(Booking)).all()] == ["month 2"]
+
+
+def test_detach_without_archive_keeps_the_table(pg_engine: Engine, pg_session: Session):
+    with pg_engine.connect() as connection:
+        partition = list_partitions(connection)[0]
+
+    assert archive_partition(pg_engine, partition, None) is None
+
+    with pg_engine.connect() as connection:
+        assert partition not in list_partitions(connection)
+        assert connection.execute(text("SELECT to_regclass(:n)"), {"n": partition.name}).scalar()
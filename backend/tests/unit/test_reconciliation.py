@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Booking, BookingStatus, OutboxEvent, PaymentStatus, User
+from app.services import outbox, payments
+
+
+@pytest.fixture
+def stripe(monkeypatch):
+    """Stubbed checkout sessions by id, and the ids ``retrieve`` was called with."""
+    monkeypatch.setattr(settings, "payments_enabled", True)
+    monkeypatch.setattr(settings, "stripe_secret_key", "sk_test_reconcile")
+    checkouts: dict[str, object] = {}
+    retrieved: list[str] = []
+
+    def retrieve(checkout_id):
+        retrieved.append(checkout_id)
+        checkout = checkouts[checkout_id]
+        if isinstance(checkout, Exception):
+            raise checkout
+        return checkout
+
+    monkeypatch.setattr(payments.stripe.checkout.Session, "retrieve", retrieve)
+    return SimpleNamespace(checkouts=checkouts, retrieved=retrieved)
+
+
+def _pending(session: Session, user: User, court_id: int, hour: int, age: timedelta) -> Booking:
+    start = (datetime.utcnow() + timedelta(days=2)).replace(hour=hour, minute=0, microsecond=0)
+    booking = Booking(
+        user_id=user.id,
+        court_id=court_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        total_price=25.0,
+        stripe_session_id=f"cs_{hour}",
+    )
+    session.add(booking)
+    session.commit()
+    # Backdated without bumping the version, as if the checkout started ``age`` ago
+    session.exec(  # type: ignore[call-overload]
+        update(Booking).where(Booking.id == booking.id).values(updated_at=datetime.utcnow() - age)
+    )
+    session.commit()
+    return booking
+
+
+def test_reconcile_settles_each_checkout_on_its_own(
+    session: Session, test_user: User, sample_court, stripe
+):
+    hour = timedelta(hours=1)
+    paid = _pending(session, test_user, sample_court.id, 8, 5 * hour)
+    failing = _pending(session, test_user, sample_court.id, 9, 4 * hour)
+    expired = _pending(session, test_user, sample_court.id, 10, 3 * hour)
+    still_open = _pending(session, test_user, sample_court.id, 11, 2 * hour)
+    _pending(session, test_user, sample_court.id, 12, timedelta(minutes=1))  # too recent
+    _pending(session, test_user, sample_court.id, 13, timedelta(days=4))  # past the window
+    stripe.checkouts.update(
+        cs_8=SimpleNamespace(payment_status="paid", status="complete"),
+        cs_9=ConnectionError("stripe unreachable"),
+        cs_10=SimpleNamespace(payment_status="unpaid", status="expired"),
+        cs_11=SimpleNamespace(payment_status="unpaid", status="open"),
+    )
+
+    assert payments.reconcile(session.get_bind()) == 1
+
+    assert stripe.retrieved == ["cs_8", "cs_9", "cs_10", "cs_11"]
+    states = {
+        booking.id: (booking.status, booking.payment_status)
+        for booking in session.exec(select(Booking)).all()
+    }
+    assert states[paid.id] == (BookingStatus.CONFIRMED, PaymentStatus.PAID)
+    assert states[expired.id] == (BookingStatus.CANCELLED, PaymentStatus.PENDING)
+    assert (
+        states[failing.id]
+        == states[still_open.id]
+        == (
+            BookingStatus.PENDING,
+            PaymentStatus.PENDING,
+        )
+    )
+    topics = session.exec(select(OutboxEvent.topic, OutboxEvent.aggregate_id)).all()
+    assert sorted(topics) == sorted(
+        [(outbox.BOOKING_PAID, paid.id), (outbox.BOOKING_CANCELLED, expired.id)]
+    )
+
+    # The next run only polls what is still undecided
+    stripe.retrieved.clear()
+    stripe.checkouts["cs_9"] = SimpleNamespace(payment_status="paid", status="complete")
+    assert payments.reconcile(session.get_bind()) == 1
+    assert stripe.retrieved == ["cs_9", "cs_11"]
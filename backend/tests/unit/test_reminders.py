@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Booking, BookingStatus, Notification, PaymentStatus, SlotHold, User
+from app.services import outbox, reminders, stats
+from app.services.notifications import FileSender
+
+NOW = datetime(2030, 1, 10, 8, 0)
+LEAD = timedelta(hours=2)
+
+
+@pytest.fixture
+def player(session: Session) -> User:
+    user = User(email="reminded@example.com", full_name="Reminded Player", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _booking(session: Session, user: User, court_id: int, hour: int, **fields) -> Booking:
+    start = NOW.replace(hour=hour)
+    booking = Booking(
+        user_id=user.id,
+        court_id=court_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        status=BookingStatus.CONFIRMED,
+        **fields,
+    )
+    session.add(booking)
+    session.commit()
+    session.refresh(booking)
+    return booking
+
+
+def test_heap_pops_due_reminders_in_order_and_skips_moved_ones():
+    scheduler = reminders.ReminderScheduler()
+    at = [NOW + timedelta(minutes=minutes) for minutes in range(5)]
+    scheduler.schedule_many(reminders.hold_notice(hold_id, at[hold_id]) for hold_id in range(5))
+    scheduler.schedule(reminders.hold_notice(0, at[4]))  # moved later
+    assert scheduler.cancel(reminders.HOLD_EXPIRED, 1)
+
+    assert [r.ref_id for r in scheduler.pop_due(at[3], limit=10)] == [2, 3]
+    assert [r.ref_id for r in scheduler.pop_due(at[4], limit=1)] == [0]
+    assert [r.ref_id for r in scheduler.pop_due(at[4], limit=10)] == [4]
+    assert len(scheduler) == 0
+
+
+def test_heap_handles_many_pending_reminders():
+    scheduler = reminders.ReminderScheduler()
+    count = 200_000
+    scheduler.schedule_many(
+        reminders.hold_notice(hold_id, NOW + timedelta(seconds=(hold_id * 7919) % count))
+        for hold_id in range(count)
+    )
+    for hold_id in range(0, count, 2):
+        scheduler.cancel(reminders.HOLD_EXPIRED, hold_id)
+
+    due = scheduler.pop_due(NOW + timedelta(seconds=999), limit=count)
+    assert len(due) == 500
+    assert [r.due_at for r in due] == sorted(r.due_at for r in due)
+    assert len(scheduler) == count // 2 - 500
+
+
+def test_dispatch_sends_each_reminder_once_across_restarts(
+    session: Session, player: User, sample_court, tmp_path
+):
+    reminded = _booking(session, player, sample_court.id, 9)
+    cancelled = _booking(session, player, sample_court.id, 10)
+    _booking(session, player, sample_court.id, 18)  # not due yet
+    sender = FileSender(tmp_path / "notifications.jsonl")
+    engine = session.get_bind()
+
+    scheduler = reminders.ReminderScheduler()
+    assert reminders.load(session, scheduler, now=NOW) == 3
+    cancelled.status = BookingStatus.CANCELLED
+    session.add(cancelled)
+    session.commit()
+    assert reminders.dispatch_due(engine, scheduler, sender, now=NOW + LEAD) == 2
+
+    sent = sender.read()
+    assert [(m["kind"], m["data"]["booking_id"]) for m in sent] == [
+        (reminders.BOOKING_REMINDER, reminded.id)
+    ]
+    assert sent[0]["email"] == player.email
+    assert session.exec(select(Notification.sent_at)).one() is not None
+
+    # A restarted worker reloads the window but does not send the reminder again
+    restarted = reminders.ReminderScheduler()
+    reminders.load(session, restarted, now=NOW + LEAD)
+    reminders.dispatch_due(engine, restarted, sender, now=NOW + LEAD)
+    assert len(sender.read()) == 1
+    assert len(restarted) == 1
+
+
+def test_hold_notice_only_for_holds_that_expired_unused(
+    session: Session, player: User, sample_court, tmp_path
+):
+    def hold(hour: int) -> SlotHold:
+        start = NOW.replace(hour=hour)
+        row = SlotHold(
+            court_id=sample_court.id,
+            user_id=player.id,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            expires_at=NOW + timedelta(minutes=2),
+        )
+        session.add(row)
+        session.commit()
+        session.refresh(row)
+        return row
+
+    expired, booked_anyway = hold(11), hold(12)
+    _booking(session, player, sample_court.id, 12)
+    scheduler = reminders.ReminderScheduler()
+    for row in (expired, booked_anyway):
+        scheduler.schedule(reminders.hold_notice(row.id, row.expires_at))
+
+    class Failing:
+        def send(self, messages):
+            raise ConnectionError("smtp down")
+
+    engine = session.get_bind()
+    reminders.dispatch_due(engine, scheduler, Failing(), now=expired.expires_at)
+    # Unclaimed and rescheduled for a retry
+    assert session.exec(select(Notification)).all() == []
+    assert len(scheduler) == 1
+
+    sender = FileSender(tmp_path / "notifications.jsonl")
+    retry_at = expired.expires_at + reminders.RETRY_DELAY
+    assert reminders.dispatch_due(engine, scheduler, sender, now=retry_at) == 1
+    assert [(m["kind"], m["data"]["hold_id"]) for m in sender.read()] == [
+        (reminders.HOLD_EXPIRED, expired.id)
+    ]
+
+
+@pytest.fixture
+def shared_scheduler():
+    reminders.scheduler.clear()
+    yield reminders.scheduler
+    reminders.scheduler.clear()
+
+
+def _event(booking_id: int, start_time: datetime, **state) -> outbox.Event:
+    fields = {
+        "court_id": 1,
+        "start_time": start_time,
+        "end_time": start_time + timedelta(hours=1),
+        "status": BookingStatus.CONFIRMED,
+        "payment_status": PaymentStatus.PAID,
+        "is_blocked": False,
+        "total_price": 25.0,
+        **state,
+    }
+    # As the relay hands it over: decoded from the stored JSON
+    payload = orjson.loads(
+        orjson.dumps(outbox.booking_payload(booking_id, stats.BookingState(**fields)))
+    )
+    return outbox.Event(1, outbox.BOOKING_UPDATED, booking_id, payload, datetime.utcnow(), 0)
+
+
+def test_booking_events_schedule_move_and_cancel_reminders(shared_scheduler):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(hours=5)
+
+    reminders.on_booking_event(_event(1, start))
+    reminders.on_booking_event(_event(2, start, is_blocked=True))
+    reminders.on_booking_event(_event(3, start + timedelta(days=30)))  # beyond the horizon
+    assert len(shared_scheduler) == 1
+
+    moved = start + timedelta(hours=2)
+    reminders.on_booking_event(_event(1, moved))
+    due = shared_scheduler.pop_due(moved, limit=10)
+    assert due == [reminders.booking_reminder(1, moved)]
+
+    reminders.on_booking_event(_event(1, moved))
+    reminders.on_booking_event(_event(1, moved, status=BookingStatus.CANCELLED))
+    assert len(shared_scheduler) == 0
+
+
+def test_granted_hold_gets_its_notice_after_expiry_purges(
+    client: TestClient,
+    session: Session,
+    player_token: str,
+    auth_token: str,
+    sample_court,
+    shared_scheduler,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "reminders_enabled", True)
+    start = (datetime.utcnow() + timedelta(days=1)).replace(
+        hour=18, minute=0, second=0, microsecond=0
+    )
+
+    def hold(token: str, hour: int):
+        slot = start.replace(hour=hour)
+        response = client.post(
+            f"/api/courts/{sample_court.id}/holds",
+            json={
+                "start_time": slot.isoformat(),
+                "end_time": (slot + timedelta(hours=1)).isoformat(),
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    hold_id = hold(player_token, 18)
+    assert len(shared_scheduler) == 1
+    expired_at = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=1)
+    session.exec(update(SlotHold).where(SlotHold.id == hold_id).values(expires_at=expired_at))
+    session.commit()
+    shared_scheduler.schedule(reminders.hold_notice(hold_id, expired_at))
+
+    # Another grant on the court purges expired holds, but not those awaiting their notice
+    hold(auth_token, 20)
+    sender = FileSender(tmp_path / "notifications.jsonl")
+    assert reminders.dispatch_due(session.get_bind(), shared_scheduler, sender) == 1
+    assert [(m["kind"], m["data"]["hold_id"]) for m in sender.read()] == [
+        (reminders.HOLD_EXPIRED, hold_id)
+    ]
@@ -0,0 +1,57 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Booking, BookingDailyStats
+from app.services import stats
+
+DAY = datetime(2030, 1, 10)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A file-backed SQLite database, so the concurrent writer gets its own connection."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _book(engine, hour: int) -> None:
+    """Insert a booking and its rollup delta in one transaction, as booking writes do."""
+    start = DAY + timedelta(hours=hour)
+    booking = Booking(user_id=1, court_id=1, start_time=start, end_time=start + timedelta(hours=1))
+    with Session(engine) as session:
+        session.add(booking)
+        stats.record_change(session, None, stats.snapshot(booking))
+        session.commit()
+
+
+def _booked(engine) -> dict[int, int]:
+    with Session(engine) as session:
+        rows = session.exec(select(BookingDailyStats)).all()
+        return {row.hour: row.booked_minutes for row in rows if row.booked_minutes}
+
+
+def test_booking_written_during_a_rebuild_keeps_its_rollup(engine, monkeypatch):
+    _book(engine, 10)
+    aggregate = stats._aggregate
+    writers = []
+
+    def aggregate_while_booking(**columns):
+        # Another request books while the rebuild is between its read and its write
+        writer = threading.Thread(target=_book, args=(engine, 18))
+        writer.start()
+        writers.append(writer)
+        time.sleep(0.2)
+        return aggregate(**columns)
+
+    monkeypatch.setattr(stats, "_aggregate", aggregate_while_booking)
+
+    stats.rebuild(engine, DAY.date(), DAY.date() + timedelta(days=1))
+    writers[0].join()
+
+    assert _booked(engine) == {10: 60, 18: 60}
@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.core.security import verify_password
+from app.db.synthetic import (
+    REFERENCE_TIME,
+    SYNTHETIC_PASSWORD,
+    GeneratorConfig,
+    generate,
+    reset_synthetic_data,
+)
+from app.models import Booking, BookingStatus, Court, CourtOpeningHours, Notification, User
+
+ACTIVE = [BookingStatus.PENDING, BookingStatus.CONFIRMED]
+
+
+def _generate(seed: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    config = GeneratorConfig(
+        courts=3,
+        users=50,
+        bookings=2_000,
+        seed=seed,
+        end=date(2026, 6, 30),
+        reference_time=datetime(2026, 6, 1),
+    )
+    return engine, generate(engine, config)
+
+
+def test_generator_is_deterministic_and_sized():
+    engine_a, result = _generate(seed=7)
+    engine_b, _ = _generate(seed=7)
+
+    columns = (Booking.court_id, Booking.start_time, Booking.status, Booking.user_id)
+    with Session(engine_a) as first, Session(engine_b) as second:
+        rows_a = first.exec(select(*columns).order_by(Booking.id)).all()
+        rows_b = second.exec(select(*columns).order_by(Booking.id)).all()
+
+    assert result.bookings == len(rows_a) == 2_000
+    assert rows_a == rows_b
+
+
+def test_generated_active_bookings_never_overlap():
+    engine, _ = _generate(seed=11)
+    other = aliased(Booking)
+
+    with Session(engine) as session:
+        overlaps = session.exec(
+            select(func.count())
+            .select_from(Booking)
+            .join(
+                other,
+                (other.court_id == Booking.court_id)
+                & (other.id > Booking.id)
+                & (other.start_time < Booking.end_time)
+                & (Booking.start_time < other.end_time),
+            )
+            .where(Booking.status.in_(ACTIVE), other.status.in_(ACTIVE))
+        ).one()
+        user = session.exec(select(User).limit(1)).one()
+
+    assert overlaps == 0
+    assert verify_password(SYNTHETIC_PASSWORD, user.hashed_password)
+
+
+def test_default_dates_do_not_depend_on_the_current_day():
+    config = GeneratorConfig()
+
+    assert config.reference_time == REFERENCE_TIME
+    assert config.last_day == REFERENCE_TIME.date() + timedelta(days=30)
+
+
+def test_reset_only_deletes_synthetic_rows():
+    engine, _ = _generate(seed=3)
+    with Session(engine) as session:
+        owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+        court = Court(name="Centre Court", hourly_rate=30)
+        session.add_all([owner, court])
+        session.commit()
+        start = datetime(2026, 7, 1, 18)
+        session.add(
+            Booking(
+                user_id=owner.id,
+                court_id=court.id,
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                status=BookingStatus.CONFIRMED,
+            )
+        )
+        session.add(CourtOpeningHours(court_id=1, weekday_mask=127, start_minute=0, end_minute=600))
+        session.add(Notification(key="booking_reminder:1", kind="booking_reminder", user_id=2))
+        session.commit()
+
+    reset_synthetic_data(engine)
+
+    with Session(engine) as session:
+        assert session.exec(select(User.email)).all() == ["owner@example.com"]
+        assert session.exec(select(Court.name)).all() == ["Centre Court"]
+        assert len(session.exec(select(Booking)).all()) == 1
+        assert session.exec(select(CourtOpeningHours)).all() == []
+        assert session.exec(select(Notification)).all() == []